@@ -0,0 +1,155 @@
+"""
+Runs the micro-benchmarks of benchmarks/micro against the code of a baseline git
+ref and the working tree in the same job, and compares the two.
+
+Runs of the baseline and the candidate are interleaved so that both see the same
+machine and the same drift. Every benchmark is compared by its fastest round, and
+the allowed slowdown is derived from the run to run variance measured on the way.
+
+Usage:
+    python benchmarks/compare_baseline.py                            # against HEAD
+    python benchmarks/compare_baseline.py --baseline-ref origin/main # against a branch
+    python benchmarks/compare_baseline.py -k perform_comparison      # a subset only
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+BENCHMARK_DIR = Path(REPO_DIR, "benchmarks", "micro")
+
+# Allowed slowdown as a multiple of the noise measured for the benchmark
+NOISE_FACTOR = 2
+
+
+def run_benchmarks(code_dir: Path, output: Path, rounds: int, select: str = None) -> int:
+    # The benchmarks of the working tree are run against the code in code_dir
+    command = [
+        sys.executable,
+        "-m",
+        "pytest",
+        "-q",
+        "-p",
+        "no:cacheprovider",
+        str(BENCHMARK_DIR),
+        f"--benchmark-json={output}",
+        f"--benchmark-min-rounds={rounds}",
+    ]
+    if select:
+        command += ["-k", select]
+    env = {**os.environ, "PYTHONPATH": str(Path(code_dir, "core"))}
+    return subprocess.run(command, env=env, cwd=REPO_DIR).returncode
+
+
+def load_stats(path: Path):
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text())
+    return {b["fullname"]: b["stats"] for b in data["benchmarks"]}
+
+
+def get_noise(runs) -> float:
+    # Run to run variance: relative spread of the fastest rounds of every run
+    fastest = min(s["min"] for s in runs)
+    return (max(s["min"] for s in runs) - fastest) / fastest
+
+
+def get_iqr(runs) -> float:
+    # Interquartile range of the rounds, relative to the median, of the fastest run
+    fastest = min(runs, key=lambda s: s["min"])
+    return fastest["iqr"] / fastest["median"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tulona micro-benchmark gate")
+    parser.add_argument(
+        "--baseline-ref", default="HEAD", help="Git ref to compare against"
+    )
+    parser.add_argument("-k", dest="select", help="Only run matching benchmarks")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs of the baseline and the candidate"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=20, help="Minimum rounds of every benchmark"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Smallest slowdown considered a regression (0.05 = 5%%)",
+    )
+    args = parser.parse_args()
+
+    baseline_runs, candidate_runs = [], []
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_dir = Path(tmp, "baseline")
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", str(baseline_dir), args.baseline_ref],
+            cwd=REPO_DIR,
+            check=True,
+        )
+        try:
+            for i in range(args.repeat):
+                for code_dir, runs, label in [
+                    (baseline_dir, baseline_runs, "baseline"),
+                    (REPO_DIR, candidate_runs, "candidate"),
+                ]:
+                    output = Path(tmp, f"{label}_{i}.json")
+                    returncode = run_benchmarks(
+                        code_dir, output, args.rounds, args.select
+                    )
+                    # Benchmarks of functions the baseline doesn't have fail there
+                    # and are left out, failures of the candidate fail the gate
+                    failed = failed or (label == "candidate" and returncode != 0)
+                    runs.append(load_stats(output))
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", str(baseline_dir)],
+                cwd=REPO_DIR,
+                check=True,
+            )
+
+    regressions = []
+    for name in sorted(set().union(*candidate_runs)):
+        candidate = [run[name] for run in candidate_runs if name in run]
+        baseline = [run[name] for run in baseline_runs if name in run]
+        seconds = min(s["min"] for s in candidate)
+        if not baseline:
+            print(f"{name}: {seconds * 1000:.3f} ms (not in baseline)")
+            continue
+
+        baseline_seconds = min(s["min"] for s in baseline)
+        change = seconds / baseline_seconds - 1
+        threshold = max(
+            args.threshold, NOISE_FACTOR * max(get_noise(candidate), get_noise(baseline))
+        )
+        print(
+            f"{name}: {seconds * 1000:.3f} ms vs {baseline_seconds * 1000:.3f} ms"
+            f" ({change:+.1%}, allowed {threshold:+.1%},"
+            f" iqr {get_iqr(candidate):.1%} vs {get_iqr(baseline):.1%})"
+        )
+        if change > threshold:
+            regressions.append(
+                f"{name}: {seconds * 1000:.3f} ms vs baseline"
+                f" {baseline_seconds * 1000:.3f} ms ({change:+.1%})"
+            )
+
+    if regressions:
+        print("Micro-benchmarks regressed:\n" + "\n".join(regressions))
+        return 1
+    if failed:
+        print("Micro-benchmarks failed")
+        return 1
+
+    print("No micro-benchmark regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Synthetic table pairs for benchmarks.
+
+The right table is a copy of the left one where a `drift_rate` fraction of rows
+has one changed value and a `missing_rate` fraction of rows is missing.
+Generation is vectorized, so even 1e7 rows take seconds, and seeded, so every
+run of a benchmark compares the same data.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY_TYPES = ["int", "str", "composite"]
+COLUMN_TYPES = ["int", "float", "str", "date"]
+WORD_POOL_SIZE = 1000
+
+
+def parse_rows(value: str) -> int:
+    # Accepts 10000 as well as 1e4
+    return int(float(value))
+
+
+def get_size_label(rows: int) -> str:
+    exponent = int(np.log10(rows))
+    return f"1e{exponent}" if 10**exponent == rows else str(rows)
+
+
+def get_key_columns(key_type: str) -> List[str]:
+    return ["id_1", "id_2"] if key_type == "composite" else ["id"]
+
+
+def generate_keys(rows: int, key_type: str) -> pd.DataFrame:
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+    if key_type == "int":
+        return pd.DataFrame({"id": ids})
+    if key_type == "str":
+        return pd.DataFrame({"id": "key_" + pd.Series(ids).astype(str)})
+    if key_type == "composite":
+        return pd.DataFrame({"id_1": ids // 1000, "id_2": ids % 1000})
+    raise ValueError(f"Key type must be one of {KEY_TYPES}, got: {key_type}")
+
+
+def generate_column(rng: np.random.Generator, column_type: str, rows: int) -> np.ndarray:
+    if column_type == "int":
+        return rng.integers(0, 1_000_000, size=rows)
+    if column_type == "float":
+        return rng.normal(1000, 250, size=rows).round(4)
+    if column_type == "str":
+        pool = np.array([f"word_{i}" for i in range(WORD_POOL_SIZE)], dtype=object)
+        return pool[rng.integers(0, WORD_POOL_SIZE, size=rows)]
+    if column_type == "date":
+        return np.datetime64("2015-01-01") + rng.integers(0, 3650, size=rows).astype(
+            "timedelta64[D]"
+        )
+    raise ValueError(f"Column type must be one of {COLUMN_TYPES}, got: {column_type}")
+
+
+def generate_table(rows: int, width: int = 8, key_type: str = "int", seed: int = 42):
+    rng = np.random.default_rng(seed)
+    df = generate_keys(rows, key_type)
+    for i in range(width):
+        column_type = COLUMN_TYPES[i % len(COLUMN_TYPES)]
+        df[f"c{i}_{column_type}"] = generate_column(rng, column_type, rows)
+    return df
+
+
+def apply_drift(
+    df: pd.DataFrame,
+    drift_rate: float,
+    missing_rate: float = 0.0,
+    key_type: str = "int",
+    seed: int = 43,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    value_columns = [c for c in df.columns if c not in get_key_columns(key_type)]
+
+    drifted = rng.choice(len(df), size=int(len(df) * drift_rate), replace=False)
+    # Every drifted row gets exactly one changed value, spread over all columns
+    step = len(value_columns)
+    for i, column in enumerate(value_columns):
+        rows = drifted[i::step]
+        column_type = column.rsplit("_", 1)[1]
+        df.iloc[rows, df.columns.get_loc(column)] = generate_column(
+            rng, column_type, len(rows)
+        )
+
+    missing = rng.choice(len(df), size=int(len(df) * missing_rate), replace=False)
+    return df.drop(df.index[missing]).reset_index(drop=True)
+
+
+def generate_table_pair(
+    rows: int,
+    width: int = 8,
+    drift_rate: float = 0.01,
+    missing_rate: float = 0.001,
+    key_type: str = "int",
+    seed: int = 42,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    left = generate_table(rows, width=width, key_type=key_type, seed=seed)
+    right = apply_drift(
+        left,
+        drift_rate=drift_rate,
+        missing_rate=missing_rate,
+        key_type=key_type,
+        seed=seed + 1,
+    )
+    return left, right
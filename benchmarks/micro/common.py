@@ -0,0 +1,18 @@
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+# Table pairs come from the same generator as the end to end benchmark
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from datagen import generate_table_pair  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+DS_NAMES = ["left", "right"]
+
+
+@lru_cache(maxsize=None)
+def get_table_pair(rows: int, key_type: str = "int"):
+    return generate_table_pair(
+        rows, width=8, drift_rate=0.01, missing_rate=0.001, key_type=key_type
+    )
@@ -0,0 +1,9 @@
+import pytest
+from tulona.util.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    # Every call of an instrumented function adds a phase record
+    yield
+    metrics.reset()
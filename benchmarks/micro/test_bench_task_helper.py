@@ -0,0 +1,23 @@
+import pytest
+from common import DS_NAMES, SIZES, get_table_pair
+from tulona.task.helper import perform_comparison
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_perform_comparison(benchmark, rows):
+    dataframes = list(get_table_pair(rows))
+    df = benchmark(perform_comparison, DS_NAMES, dataframes, on="id")
+    assert df.shape[0] == dataframes[1].shape[0]
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_perform_comparison_composite_key(benchmark, rows):
+    dataframes = list(get_table_pair(rows, key_type="composite"))
+    df = benchmark(
+        perform_comparison,
+        DS_NAMES,
+        dataframes,
+        on=["id_1", "id_2"],
+        case_insensitive=True,
+    )
+    assert df.shape[0] == dataframes[1].shape[0]
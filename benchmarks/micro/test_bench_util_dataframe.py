@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+from common import SIZES, get_table_pair
+from tulona.util.dataframe import apply_column_exclusion, get_sample_rows_for_each_value
+
+
+@pytest.mark.parametrize("columns", [10, 100, 1000])
+def test_apply_column_exclusion(benchmark, columns):
+    df = pd.DataFrame({f"col_{i}": range(100) for i in range(columns)})
+    # Half of the columns are excluded, a few of them aren't present
+    exclude_columns = [f"col_{i}" for i in range(1, columns + 10, 2)]
+    df_excluded = benchmark(apply_column_exclusion, df, ["col_0"], exclude_columns, "ds")
+    assert df_excluded.shape[1] == columns // 2
+
+
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("distinct_values", [10, 1000])
+def test_get_sample_rows_for_each_value(benchmark, rows, distinct_values):
+    df = get_table_pair(rows)[0].copy()
+    df["value"] = df["id"] % distinct_values
+    sample = benchmark(get_sample_rows_for_each_value, df, 5, "value")
+    assert sample["value"].nunique() == min(rows, distinct_values)
@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+import pytest
+from common import DS_NAMES, SIZES, get_table_pair
+from openpyxl import Workbook
+from tulona.task.helper import perform_comparison
+from tulona.util.excel import highlight_mismatch_cells
+
+
+@lru_cache(maxsize=None)
+def get_comparison_frame(rows: int):
+    return perform_comparison(DS_NAMES, list(get_table_pair(rows)), on="id")
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_highlight_mismatch_cells(benchmark, rows):
+    df = get_comparison_frame(rows)
+    worksheet = Workbook().active
+    benchmark(highlight_mismatch_cells, worksheet, df, DS_NAMES, "id")
+    assert worksheet.max_row > 1
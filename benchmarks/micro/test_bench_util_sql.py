@@ -0,0 +1,23 @@
+import pytest
+from common import SIZES, get_table_pair
+from tulona.util.sql import build_filter_query_expression, get_metric_query
+
+METRICS = ["min", "max", "avg", "count", "distinct_count"]
+COLUMN_TYPES = ["integer", "numeric", "varchar", "timestamp"]
+
+
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("key", ["id", "c2_str"])
+def test_build_filter_query_expression(benchmark, rows, key):
+    df = get_table_pair(rows)[0]
+    expr = benchmark(build_filter_query_expression, df, key)
+    assert expr.startswith(f"{key} in (")
+
+
+@pytest.mark.parametrize("columns", [10, 100, 1000])
+def test_get_metric_query(benchmark, columns):
+    columns_dtype = {
+        f"col_{i}": COLUMN_TYPES[i % len(COLUMN_TYPES)] for i in range(columns)
+    }
+    query = benchmark(get_metric_query, "schema.table", columns_dtype, METRICS)
+    assert "col_0_count" in query
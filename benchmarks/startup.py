@@ -0,0 +1,82 @@
+"""
+Measures CLI startup time and compares it against a stored baseline.
+
+Usage:
+    python benchmarks/startup.py                # compare against baseline
+    python benchmarks/startup.py --update       # record a new baseline
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASELINE_FILE = Path(Path(__file__).resolve().parent, "baselines", "startup.json")
+
+SCENARIOS = {
+    "import_cli": [sys.executable, "-c", "import tulona.cli.base"],
+    "help": [sys.executable, "-m", "tulona.cli.base", "--help"],
+}
+
+
+def measure(command, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tulona CLI startup benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown relative to the baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--update", action="store_true", help="Write a new baseline")
+    args = parser.parse_args()
+
+    # Reference interpreter startup so baselines stay comparable across machines
+    interpreter = measure([sys.executable, "-c", "pass"], args.repeat)
+    results = {
+        name: measure(command, args.repeat) - interpreter
+        for name, command in SCENARIOS.items()
+    }
+    for name, seconds in results.items():
+        print(f"{name}: {seconds * 1000:.1f} ms (over interpreter startup)")
+
+    if args.update:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written into: {BASELINE_FILE}")
+        return 0
+
+    if not BASELINE_FILE.exists():
+        print(f"No baseline found at {BASELINE_FILE}, run with --update first")
+        return 1
+
+    baseline = json.loads(BASELINE_FILE.read_text())
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + args.threshold):
+            regressions.append(
+                f"{name}: {seconds * 1000:.1f} ms vs baseline {baseline[name] * 1000:.1f} ms"
+            )
+
+    if regressions:
+        print("Startup time regressed:\n" + "\n".join(regressions))
+        return 1
+
+    print("No startup regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 
 @dataclass
 class BaseConnectionManager:
     conn_profile: Dict
+    # Only used to label logs, metrics and traces
+    datasource: Optional[str] = None
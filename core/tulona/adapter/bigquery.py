@@ -1,18 +1,26 @@
-from typing import Dict
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
+import pyarrow as pa
 from sqlalchemy import create_engine
 
+from tulona.adapter.registry import get_profile_key
 
-class BigQueryConnection:
-    _instance = None
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_READ_STREAMS = 4
+
+_storage_clients = {}
+_storage_clients_lock = threading.Lock()
 
-    def __new__(cls, credentials: Dict):
-        if cls._instance is None:
-            cls._instance = super(BigQueryConnection, cls).__new__(cls)
-            cls._instance._init_connection(credentials)
-        return cls._instance
 
-    def _init_connection(self, credentials: Dict):
+class BigQueryConnection:
+    def __init__(self, credentials: Dict, **kwargs):
+        self._init_connection(credentials, **kwargs)
+
+    def _init_connection(self, credentials: Dict, **kwargs):
         if credentials["method"] == "service_account":
             # validate private_key
             if not credentials["key_file"].endswith(".json"):
@@ -22,7 +30,76 @@ class BigQueryConnection:
                 url=f"bigquery://{credentials['project']}",
                 credentials_path=credentials["key_file"],
                 echo=False,
+                **kwargs,
             )
 
     def get_engine(self):
         return self.engine
+
+
+def get_storage_clients(credentials: Dict):
+    # Query and Storage Read API clients are shared per connection profile, like engines
+    key = get_profile_key(credentials)
+    with _storage_clients_lock:
+        if key not in _storage_clients:
+            from google.cloud import bigquery, bigquery_storage
+            from google.oauth2 import service_account
+
+            sa_credentials = service_account.Credentials.from_service_account_file(
+                credentials["key_file"]
+            )
+            _storage_clients[key] = (
+                bigquery.Client(
+                    project=credentials["project"], credentials=sa_credentials
+                ),
+                bigquery_storage.BigQueryReadClient(credentials=sa_credentials),
+            )
+        return _storage_clients[key]
+
+
+def get_table_path(table_fqn: str) -> str:
+    project, dataset, table = [p.strip("`") for p in table_fqn.split(".")]
+    return f"projects/{project}/datasets/{dataset}/tables/{table}"
+
+
+def read_table_as_arrow(
+    read_client,
+    project: str,
+    table_fqn: str,
+    columns: Optional[List[str]] = None,
+    row_restriction: Optional[str] = None,
+    max_streams: int = DEFAULT_MAX_READ_STREAMS,
+) -> pa.Table:
+    from google.cloud.bigquery_storage import types
+
+    requested_session = types.ReadSession(
+        table=get_table_path(table_fqn),
+        data_format=types.DataFormat.ARROW,
+        read_options=types.ReadSession.TableReadOptions(
+            selected_fields=columns or [],
+            row_restriction=row_restriction or "",
+        ),
+    )
+    session = read_client.create_read_session(
+        parent=f"projects/{project}",
+        read_session=requested_session,
+        max_stream_count=max_streams,
+    )
+    log.debug(f"Reading {table_fqn} with {len(session.streams)} stream[s]")
+
+    if len(session.streams) == 0:
+        schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+        return schema.empty_table()
+
+    def read_stream(stream):
+        return read_client.read_rows(stream.name).to_arrow(session)
+
+    with ThreadPoolExecutor(max_workers=len(session.streams)) as executor:
+        tables = list(executor.map(read_stream, session.streams))
+
+    return pa.concat_tables(tables)
+
+
+def read_query_output_as_arrow(client, read_client, query_text: str) -> pa.Table:
+    # Results are downloaded with the Storage Read API instead of tabledata.list
+    return client.query(query_text).result().to_arrow(bqstorage_client=read_client)
@@ -1,40 +1,58 @@
+import importlib
 import logging
 from dataclasses import dataclass
+from typing import Dict
 
 from tulona.adapter.base.connection import BaseConnectionManager
-from tulona.adapter.bigquery import BigQueryConnection
-from tulona.adapter.mssql import get_mssql_engine
-from tulona.adapter.mysql import get_mysql_engine
-from tulona.adapter.postgres import get_postgres_engine
-from tulona.adapter.snowflake import SnowflakeConnection
+from tulona.adapter.registry import engine_registry
 from tulona.exceptions import TulonaNotImplementedError
 
 log = logging.getLogger(__name__)
 
+# Adapter modules are imported on demand as the driver stacks are expensive to load
+ADAPTERS = {
+    "snowflake": ("tulona.adapter.snowflake", "SnowflakeConnection"),
+    "bigquery": ("tulona.adapter.bigquery", "BigQueryConnection"),
+    "mssql": ("tulona.adapter.mssql", "get_mssql_engine"),
+    "postgres": ("tulona.adapter.postgres", "get_postgres_engine"),
+    "mysql": ("tulona.adapter.mysql", "get_mysql_engine"),
+}
+
+
+def load_adapter(dbtype: str):
+    dbtype = dbtype.lower()
+    if dbtype not in ADAPTERS:
+        raise TulonaNotImplementedError(
+            f"Tulona connection manager is not set up for {dbtype}"
+        )
+    module_name, attr = ADAPTERS[dbtype]
+    log.debug(f"Loading adapter for {dbtype}: {module_name}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def create_engine_for_profile(conn_profile: Dict, **kwargs):
+    dbtype = conn_profile["type"].lower()
+    adapter = load_adapter(dbtype)
+    if dbtype in ["snowflake", "bigquery"]:
+        engine = adapter(credentials=conn_profile, **kwargs).get_engine()
+    else:
+        engine = adapter(conn_profile, **kwargs)
+    return engine
+
 
 @dataclass
 class ConnectionManager(BaseConnectionManager):
     def get_engine(self):
-        dbtype = self.conn_profile["type"].lower()
-        if dbtype == "snowflake":
-            self.engine = SnowflakeConnection(credentials=self.conn_profile).get_engine()
-        elif dbtype == "bigquery":
-            self.engine = BigQueryConnection(credentials=self.conn_profile).get_engine()
-        elif dbtype == "mssql":
-            self.engine = get_mssql_engine(self.conn_profile)
-        elif dbtype == "postgres":
-            self.engine = get_postgres_engine(self.conn_profile)
-        elif dbtype == "mysql":
-            self.engine = get_mysql_engine(self.conn_profile)
-        else:
-            raise TulonaNotImplementedError(
-                f"Tulona connection manager is not set up for {dbtype}"
-            )
+        # Engines are shared process wide, one per connection profile
+        self.engine = engine_registry.get_engine(
+            self.conn_profile, engine_factory=create_engine_for_profile
+        )
+        return self.engine
 
     def open(self):
         self.get_engine()
         self.conn = self.engine.connect()
 
     def close(self):
+        # Only the connection is returned to the pool, the engine stays in the registry
         self.conn.close()
-        self.engine.dispose()
@@ -5,11 +5,11 @@ from sqlalchemy import create_engine
 # from sqlalchemy.engine import URL
 
 
-def get_mssql_engine(conn_profile: Dict):
+def get_mssql_engine(conn_profile: Dict, **kwargs):
     if "connection_string" in conn_profile:
         connection_string = conn_profile["connection_string"]
         # url = URL.create("mssql+pyodbc", query={"odbc_connect": connection_string})
-        engine = create_engine(connection_string)
+        engine = create_engine(connection_string, **kwargs)
 
     # validate properties
     if "connection_string" not in conn_profile:
@@ -6,7 +6,7 @@ from sqlalchemy.engine import URL
 from tulona.exceptions import TulonaMissingPropertyError
 
 
-def get_mysql_engine(conn_profile: Dict):
+def get_mysql_engine(conn_profile: Dict, **kwargs):
     # TODO: Implement
     # if 'connection_string' in conn_profile:
     #     connection_string = conn_profile['connection_string']
@@ -32,6 +32,6 @@ def get_mysql_engine(conn_profile: Dict):
             host=conn_profile["host"],
             port=conn_profile["port"],
         )
-        engine = create_engine(url, echo=False)
+        engine = create_engine(url, echo=False, **kwargs)
 
     return engine
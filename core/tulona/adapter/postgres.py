@@ -1,12 +1,17 @@
-from typing import Dict
+import datetime
+import json
+from decimal import Decimal
+from tempfile import SpooledTemporaryFile
+from typing import Dict, List, Tuple
 
+import pandas as pd
 from sqlalchemy import create_engine
 from sqlalchemy.engine import URL
 
-from tulona.exceptions import TulonaMissingPropertyError
+from tulona.exceptions import TulonaMissingPropertyError, TulonaNotImplementedError
 
 
-def get_postgres_engine(conn_profile: Dict):
+def get_postgres_engine(conn_profile: Dict, **kwargs):
     # TODO: Implement
     # if 'connection_string' in conn_profile:
     #     connection_string = conn_profile['connection_string']
@@ -32,6 +37,121 @@ def get_postgres_engine(conn_profile: Dict):
             host=conn_profile["host"],
             port=conn_profile["port"],
         )
-        engine = create_engine(url, echo=False)
+        engine = create_engine(url, echo=False, **kwargs)
 
     return engine
+
+
+# Postgres type OIDs that need special handling when parsing COPY output
+PG_BOOL_OIDS = [16]
+PG_INTEGER_OIDS = [20, 21, 23, 26]  # int8, int2, int4, oid
+PG_FLOAT_OIDS = [700, 701]  # float4, float8
+PG_NUMERIC_OIDS = [1700]
+PG_BYTEA_OIDS = [17]
+PG_JSON_OIDS = [114, 3802]  # json, jsonb
+PG_DATE_OIDS = [1082]
+PG_TIMESTAMP_OIDS = [1114]
+PG_TIMESTAMPTZ_OIDS = [1184]
+PG_TEXT_OIDS = [18, 19, 25, 1042, 1043, 2950]  # char, name, text, bpchar, varchar, uuid
+# Types whose COPY output is converted into what psycopg2 returns, queries with
+# any other type (arrays, time, interval etc.) are extracted with a regular fetch
+COPY_SUPPORTED_OIDS = set(
+    PG_BOOL_OIDS
+    + PG_INTEGER_OIDS
+    + PG_FLOAT_OIDS
+    + PG_NUMERIC_OIDS
+    + PG_BYTEA_OIDS
+    + PG_JSON_OIDS
+    + PG_DATE_OIDS
+    + PG_TIMESTAMP_OIDS
+    + PG_TIMESTAMPTZ_OIDS
+    + PG_TEXT_OIDS
+)
+COPY_NULL_MARKER = "\\N"
+COPY_SPOOL_MAX_SIZE = 256 * 1024 * 1024
+
+
+def get_copy_query(query_text: str) -> str:
+    query_text = query_text.strip().rstrip(";")
+    return (
+        f"copy ({query_text}) to stdout"
+        f" with (format csv, header true, null '{COPY_NULL_MARKER}')"
+    )
+
+
+def get_copy_unsupported_columns(column_types: List[Tuple[str, int]]) -> List[str]:
+    return [name for name, oid in column_types if oid not in COPY_SUPPORTED_OIDS]
+
+
+def copy_output_to_df(buffer, column_types: List[Tuple[str, int]]) -> pd.DataFrame:
+    import pyarrow as pa
+    from pyarrow import csv
+
+    # Only booleans and plain numbers are parsed by arrow, everything else is read
+    # as the text Postgres wrote so that values like '007', '' or numerics with
+    # more digits than a float holds survive. Quoted values are never NULL, a
+    # text value equal to the NULL marker is written quoted
+    arrow_types = {}
+    for name, oid in column_types:
+        if oid in PG_BOOL_OIDS:
+            arrow_types[name] = pa.bool_()
+        elif oid in PG_INTEGER_OIDS:
+            arrow_types[name] = pa.int64()
+        elif oid in PG_FLOAT_OIDS:
+            arrow_types[name] = pa.float64()
+        else:
+            arrow_types[name] = pa.string()
+    convert_options = csv.ConvertOptions(
+        column_types=arrow_types,
+        null_values=[COPY_NULL_MARKER],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,
+        true_values=["t"],
+        false_values=["f"],
+    )
+    table = csv.read_csv(buffer, convert_options=convert_options)
+    df = table.to_pandas()
+
+    # Values are converted into what psycopg2 returns for the same types
+    for name, oid in column_types:
+        if oid in PG_NUMERIC_OIDS:
+            df[name] = df[name].map(lambda v: None if v is None else Decimal(v))
+        elif oid in PG_BYTEA_OIDS:
+            df[name] = df[name].map(lambda v: None if v is None else bytes.fromhex(v[2:]))
+        elif oid in PG_JSON_OIDS:
+            df[name] = df[name].map(lambda v: None if v is None else json.loads(v))
+        elif oid in PG_DATE_OIDS:
+            df[name] = df[name].map(
+                lambda v: None if v is None else datetime.date.fromisoformat(v)
+            )
+        elif oid in PG_TIMESTAMP_OIDS:
+            df[name] = pd.to_datetime(df[name])
+        elif oid in PG_TIMESTAMPTZ_OIDS:
+            df[name] = pd.to_datetime(df[name], utc=True)
+
+    return df
+
+
+def copy_query_output_as_df(engine, query_text: str) -> pd.DataFrame:
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(
+            f"select * from ({query_text.strip().rstrip(';')}) tulona__ limit 0"
+        )
+        column_types = [(d.name, d.type_code) for d in cursor.description]
+        unsupported_columns = get_copy_unsupported_columns(column_types)
+        if unsupported_columns:
+            raise TulonaNotImplementedError(
+                f"COPY extraction of column[s] {unsupported_columns} is not supported"
+            )
+
+        with SpooledTemporaryFile(max_size=COPY_SPOOL_MAX_SIZE) as buffer:
+            cursor.copy_expert(get_copy_query(query_text), buffer)
+            buffer.seek(0)
+            df = copy_output_to_df(buffer, column_types)
+        cursor.close()
+    finally:
+        raw_conn.close()
+
+    return df
@@ -0,0 +1,71 @@
+import atexit
+import hashlib
+import json
+import logging
+import threading
+from typing import Callable, Dict
+
+log = logging.getLogger(__name__)
+
+# Connection profile properties that tune the pool rather than identify the database
+POOL_PROPERTIES = ["pool_size", "max_overflow", "pool_recycle", "pool_pre_ping"]
+
+DEFAULT_POOL_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+}
+
+
+def get_profile_key(conn_profile: Dict) -> str:
+    profile_str = json.dumps(conn_profile, sort_keys=True, default=str)
+    return hashlib.sha256(profile_str.encode()).hexdigest()
+
+
+def get_pool_options(conn_profile: Dict) -> Dict:
+    pool_options = DEFAULT_POOL_OPTIONS.copy()
+    for prop in POOL_PROPERTIES:
+        if prop in conn_profile:
+            pool_options[prop] = conn_profile[prop]
+    return pool_options
+
+
+class EngineRegistry:
+    def __init__(self):
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, conn_profile: Dict, engine_factory: Callable):
+        key = get_profile_key(conn_profile)
+        with self._lock:
+            if key not in self._engines:
+                pool_options = get_pool_options(conn_profile)
+                log.debug(
+                    f"Creating engine for {conn_profile['type']} connection profile"
+                    f" with pool options: {pool_options}"
+                )
+                self._engines[key] = engine_factory(conn_profile, **pool_options)
+            else:
+                log.debug(f"Reusing engine for {conn_profile['type']} connection profile")
+            return self._engines[key]
+
+    def dispose(self, conn_profile: Dict) -> None:
+        key = get_profile_key(conn_profile)
+        with self._lock:
+            engine = self._engines.pop(key, None)
+        if engine is not None:
+            engine.dispose()
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            try:
+                engine.dispose()
+            except Exception as exc:
+                log.debug(f"Failed to dispose engine: {exc}")
+
+
+engine_registry = EngineRegistry()
+atexit.register(engine_registry.dispose_all)
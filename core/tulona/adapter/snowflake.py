@@ -1,24 +1,25 @@
 import logging
-from typing import Dict
+from typing import Dict, Iterator, Union
 
+import pandas as pd
+import pyarrow as pa
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
+from snowflake.connector.errorcode import ER_NO_ARROW_RESULT, ER_NO_PYARROW
+from snowflake.connector.errors import NotSupportedError, ProgrammingError
 from snowflake.sqlalchemy import URL
 from sqlalchemy import create_engine
 
 logging.getLogger("snowflake").setLevel(logging.ERROR)
 
+log = logging.getLogger(__name__)
 
-class SnowflakeConnection:
-    _instance = None
 
-    def __new__(cls, credentials: Dict):
-        if cls._instance is None:
-            cls._instance = super(SnowflakeConnection, cls).__new__(cls)
-            cls._instance._init_connection(credentials)
-        return cls._instance
+class SnowflakeConnection:
+    def __init__(self, credentials: Dict, **kwargs):
+        self._init_connection(credentials, **kwargs)
 
-    def _init_connection(self, credentials: Dict):
+    def _init_connection(self, credentials: Dict, **kwargs):
         if "password" in credentials:
             self.engine = create_engine(
                 URL(
@@ -36,6 +37,7 @@ class SnowflakeConnection:
                     )
                 },
                 echo=False,
+                **kwargs,
             )
 
         if "private_key" in credentials:
@@ -77,6 +79,7 @@ class SnowflakeConnection:
                     ),
                 },
                 echo=False,
+                **kwargs,
             )
 
         if "authenticator" in credentials:
@@ -97,7 +100,82 @@ class SnowflakeConnection:
                         )
                     },
                     echo=False,
+                    **kwargs,
                 )
 
     def get_engine(self):
         return self.engine
+
+
+def normalize_column_name(name: str) -> str:
+    # Same as snowflake-sqlalchemy: case insensitive (upper case) identifiers become lower case
+    return name.lower() if name.upper() == name else name
+
+
+def normalize_batch_columns(
+    batch: Union[pd.DataFrame, pa.Table],
+) -> Union[pd.DataFrame, pa.Table]:
+    if isinstance(batch, pa.Table):
+        return batch.rename_columns(
+            [normalize_column_name(c) for c in batch.column_names]
+        )
+    return batch.rename(columns={c: normalize_column_name(c) for c in batch.columns})
+
+
+def fetch_query_output_batches(
+    engine, query_text: str, as_arrow: bool = False
+) -> Iterator[Union[pd.DataFrame, pa.Table]]:
+    # Batch sizes are decided by Snowflake (one batch per result chunk)
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(query_text)
+        if hasattr(cursor, "fetch_pandas_batches"):
+            batches = (
+                cursor.fetch_arrow_batches()
+                if as_arrow
+                else cursor.fetch_pandas_batches()
+            )
+        else:
+            # Local stand-ins (e.g. fakesnow) can only fetch everything at once
+            df = cursor.fetch_pandas_all()
+            batches = [pa.Table.from_pandas(df, preserve_index=False) if as_arrow else df]
+
+        for batch in batches:
+            yield normalize_batch_columns(batch)
+        cursor.close()
+    finally:
+        raw_conn.close()
+
+
+def fetch_query_output_as_df(engine, query_text: str) -> pd.DataFrame:
+    raw_conn = engine.raw_connection()
+    # Scaled NUMBER columns of this extraction only are fetched as exact decimals.
+    # The connector reads the setting from the connection when results arrive, it's
+    # restored before the connection goes back to the pool
+    dbapi_conn = raw_conn.dbapi_connection
+    arrow_number_to_decimal = getattr(dbapi_conn, "_arrow_number_to_decimal", False)
+    dbapi_conn._arrow_number_to_decimal = True
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(query_text)
+        try:
+            df = cursor.fetch_pandas_all()
+        except (NotSupportedError, ProgrammingError) as exc:
+            # Results that can't be fetched as Arrow are fetched as rows from the
+            # same cursor, the query isn't run again
+            if isinstance(exc, ProgrammingError) and exc.errno not in [
+                ER_NO_ARROW_RESULT,
+                ER_NO_PYARROW,
+            ]:
+                raise
+            log.warning(f"Arrow extraction not available, fetching rows: {exc}")
+            df = pd.DataFrame(
+                cursor.fetchall(), columns=[c.name for c in cursor.description]
+            )
+        cursor.close()
+    finally:
+        dbapi_conn._arrow_number_to_decimal = arrow_number_to_decimal
+        raw_conn.close()
+
+    return normalize_batch_columns(df)
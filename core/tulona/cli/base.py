@@ -1,39 +1,97 @@
 import logging
-import traceback
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import click
 
 from tulona.cli import params as p
 from tulona.config.profile import Profile
 from tulona.config.project import Project
-from tulona.exceptions import TulonaMissingPropertyError
-from tulona.task.compare import CompareColumnTask, CompareRowTask, CompareTask
-from tulona.task.ping import PingTask
-from tulona.task.profile import ProfileTask
-from tulona.task.scan import ScanTask
-from tulona.util.filesystem import get_runid, get_task_outdir, get_task_outfile
+from tulona.exceptions import TulonaMissingPropertyError, TulonaUnSupportedTaskError
+from tulona.util.filesystem import (
+    get_run_outdir,
+    get_runid,
+    get_task_outdir,
+    get_task_outfile,
+)
+from tulona.util.metrics import metrics, task_metrics
+from tulona.util.profiles import extract_profile_name
+from tulona.util.profiling import SamplingProfiler, memory_tracker
+from tulona.util.tracing import span, tracer
 
 log = logging.getLogger()
-log_formatter = logging.Formatter(
-    "[%(asctime)s] {%(filename)s:%(lineno)d} %(levelname)s - %(message)s"
-)
+nlog = logging.getLogger(__name__)
 
-consloe_handler = logging.StreamHandler()
-consloe_handler.setFormatter(log_formatter)
-consloe_handler.setLevel(logging.INFO)
-log.addHandler(consloe_handler)
 
-log_dir = Path(Path().absolute(), "log")
-log_dir.mkdir(parents=True, exist_ok=True)
-log_file_fqn = Path(log_dir, f"tulona_{datetime.now().strftime('%Y%m%d%H%M%S')}.log")
-file_handler = logging.FileHandler(log_file_fqn)
-file_handler.setFormatter(log_formatter)
-file_handler.setLevel(logging.DEBUG)
-log.addHandler(file_handler)
+def configure_logging() -> Path:
+    # Configured at command invocation (not import) so that `--help` stays side effect free
+    log_formatter = logging.Formatter(
+        "[%(asctime)s] {%(filename)s:%(lineno)d} %(levelname)s - %(message)s"
+    )
+
+    consloe_handler = logging.StreamHandler()
+    consloe_handler.setFormatter(log_formatter)
+    consloe_handler.setLevel(logging.INFO)
+    log.addHandler(consloe_handler)
+
+    log_dir = Path(Path().absolute(), "log")
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file_fqn = Path(log_dir, f"tulona_{datetime.now().strftime('%Y%m%d%H%M%S')}.log")
+    file_handler = logging.FileHandler(log_file_fqn)
+    file_handler.setFormatter(log_formatter)
+    file_handler.setLevel(logging.DEBUG)
+    log.addHandler(file_handler)
+
+    logging.getLogger("tulona").setLevel(logging.DEBUG)
+    return log_file_fqn
+
+
+def get_task_name(tconf: Dict, idx: Optional[int] = None) -> str:
+    if "name" in tconf:
+        return tconf["name"]
+    return tconf["task"] if idx is None else f"{tconf['task']}_{idx + 1}"
+
+
+def execute_task(task, name: str) -> None:
+    # All task executions go through here so that they are measured the same way
+    with task_metrics(name), span(f"task {name}", **{"tulona.task": name}):
+        task.execute()
+
+
+def write_run_metrics(project: Dict, metrics_textfile: Optional[str] = None) -> None:
+    if not metrics.get_records():
+        return
+    metrics_fqn = Path(
+        get_run_outdir(project["outdir"], project["runid"]), "metrics.json"
+    )
+    nlog.info(f"Writing metrics into: {metrics_fqn}")
+    metrics.write_json(metrics_fqn, runid=project["runid"])
+    if metrics_textfile:
+        metrics.write_prometheus(metrics_textfile)
+
+
+def write_cpu_profile(project: Dict, profiler: SamplingProfiler) -> None:
+    profiler.stop()
+    profile_fqn = Path(
+        get_run_outdir(project["outdir"], project["runid"]), "cpu_profile.collapsed"
+    )
+    nlog.info(f"Writing CPU profile into: {profile_fqn}")
+    profiler.write_collapsed(profile_fqn)
 
-nlog = logging.getLogger(__name__)
+
+def write_memory_report(project: Dict) -> None:
+    report_fqn = Path(get_run_outdir(project["outdir"], project["runid"]), "memory.json")
+    nlog.info(f"Writing memory report into: {report_fqn}")
+    memory_tracker.write_report(report_fqn, metrics.get_records())
+    memory_tracker.stop()
+
+
+def write_trace(project: Dict) -> None:
+    tracer.stop()
+    trace_fqn = Path(get_run_outdir(project["outdir"], project["runid"]), "trace.json")
+    nlog.info(f"Writing trace into: {trace_fqn}")
+    tracer.write_otlp_json(trace_fqn)
 
 
 # command: tulona
@@ -43,9 +101,13 @@ nlog = logging.getLogger(__name__)
     epilog="Execute: tulona <command> -h/--help for more help with specific commands",
 )
 @click.pass_context
-def cli(ctx):
+@p.metrics_textfile
+@p.profile_cpu
+@p.trace_memory
+@p.trace
+def cli(ctx, **kwargs):
     """Tulona compares data sources to find out differences"""
-    logging.getLogger("tulona").setLevel(logging.DEBUG)
+    log_file_fqn = configure_logging()
     nlog.info(f"Writing debug log into: {log_file_fqn}")
 
     prof = Profile()
@@ -54,6 +116,21 @@ def cli(ctx):
     ctx.obj["project"] = proj.load_project_config()
     ctx.obj["profile"] = prof.load_profile_config()[ctx.obj["project"]["name"]]
     ctx.obj["project"]["runid"] = get_runid()
+    # Runs even if the command fails, metrics of a failed run are the interesting ones
+    ctx.call_on_close(
+        lambda: write_run_metrics(ctx.obj["project"], kwargs["metrics_textfile"])
+    )
+
+    if kwargs["profile_cpu"]:
+        profiler = SamplingProfiler()
+        profiler.start()
+        ctx.call_on_close(lambda: write_cpu_profile(ctx.obj["project"], profiler))
+    if kwargs["trace_memory"]:
+        memory_tracker.start()
+        ctx.call_on_close(lambda: write_memory_report(ctx.obj["project"]))
+    if kwargs["trace"]:
+        tracer.start()
+        ctx.call_on_close(lambda: write_trace(ctx.obj["project"]))
 
 
 # command: tulona ping
@@ -63,7 +140,6 @@ def cli(ctx):
 @p.datasources
 def ping(ctx, **kwargs):
     """Test connectivity to datasources"""
-
     ping_tasks = []
     if kwargs["datasources"]:
         task_config = {
@@ -83,11 +159,8 @@ def ping(ctx, **kwargs):
 
     for tconf in ping_tasks:
         nlog.info(f"Executing ping with task profile: {tconf}")
-        PingTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
-            datasources=tconf["datasources"],
-        ).execute()
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
 
 
 # command: tulona scan
@@ -99,6 +172,9 @@ def ping(ctx, **kwargs):
 @p.sample_count
 @p.composite
 @p.case_insensitive
+@p.summary_only
+@p.output_format
+@p.shard
 def scan(ctx, **kwargs):
     """Scan data sources to collect metadata"""
     scan_tasks = []
@@ -115,9 +191,18 @@ def scan(ctx, **kwargs):
             task_config["composite"] = kwargs["composite"]
         if kwargs["case_insensitive"]:
             task_config["case_insensitive"] = kwargs["case_insensitive"]
+        if kwargs["summary_only"]:
+            task_config["summary_only"] = kwargs["summary_only"]
+        if kwargs["output_format"]:
+            task_config["output_format"] = kwargs["output_format"]
+        if kwargs["shard"]:
+            task_config["shard"] = kwargs["shard"]
         scan_tasks.append(task_config)
     else:
         scan_tasks = [t for t in ctx.obj["project"]["task_config"] if t["task"] == "scan"]
+        # A shard given on the command line applies to the scans from task_config
+        if kwargs["shard"]:
+            scan_tasks = [{**t, "shard": kwargs["shard"]} for t in scan_tasks]
 
     if len(scan_tasks) == 0:
         raise RuntimeError(
@@ -128,25 +213,34 @@ def scan(ctx, **kwargs):
 
     for tconf in scan_tasks:
         nlog.info(f"Executing scan with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        nlog.debug(f"Output will be stored in: {final_outdir}")
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
 
-        ScanTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
-            datasources=tconf["datasources"],
-            final_outdir=final_outdir,
-            compare=tconf["compare"] if "compare" in tconf else None,
-            sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
-            composite=tconf["composite"] if "composite" in tconf else None,
-            case_insensitive=(
-                tconf["case_insensitive"] if "case_insensitive" in tconf else False
-            ),
-        ).execute()
+
+# command: tulona merge-results
+@cli.command("merge-results")
+@click.pass_context
+@click.argument("inputs", nargs=-1, required=True, type=click.Path(exists=True))
+@p.outdir
+@p.output_format
+def merge_results(ctx, inputs, **kwargs):
+    """
+    Merge the results of sharded scan runs [scan --compare --shard i/N].
+    INPUTS are the output directories or manifest files of the shards
+    """
+    from tulona.task.merge import MergeResultsTask
+
+    final_outdir = kwargs["outdir"] or Path(
+        ctx.obj["project"]["outdir"], "merged", ctx.obj["project"]["runid"]
+    )
+    nlog.debug(f"Output will be stored in: {final_outdir}")
+
+    task = MergeResultsTask(
+        inputs=list(inputs),
+        final_outdir=final_outdir,
+        output_format=kwargs["output_format"] or ctx.obj["project"]["output_format"],
+    )
+    execute_task(task, "merge-results")
 
 
 # command: tulona profile
@@ -155,6 +249,7 @@ def scan(ctx, **kwargs):
 # @p.exec_engine
 @p.datasources
 @p.compare
+@p.output_format
 def profile(ctx, **kwargs):
     """Profile data sources to collect metadata [row count, column min/max/mean etc.]"""
     profile_tasks = []
@@ -165,6 +260,8 @@ def profile(ctx, **kwargs):
         }
         if kwargs["compare"]:
             task_config["compare"] = kwargs["compare"]
+        if kwargs["output_format"]:
+            task_config["output_format"] = kwargs["output_format"]
         profile_tasks.append(task_config)
     else:
         profile_tasks = [
@@ -180,22 +277,8 @@ def profile(ctx, **kwargs):
 
     for tconf in profile_tasks:
         nlog.info(f"Executing profile with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        ProfileTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
-            datasources=tconf["datasources"],
-            outfile_fqn=outfile_fqn,
-            compare=tconf["compare"] if "compare" in tconf else None,
-        ).execute()
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
 
 
 # command: tulona compare-row
@@ -205,8 +288,12 @@ def profile(ctx, **kwargs):
 @p.datasources
 @p.sample_count
 @p.case_insensitive
+@p.long_format
+@p.summary_only
+@p.output_format
+@p.memory_budget
 def compare_row(ctx, **kwargs):
-    """Compares rows from two data entities"""
+    """Compares rows from two or more data entities"""
     compare_row_tasks = []
     if kwargs["datasources"]:
         task_config = {
@@ -217,6 +304,14 @@ def compare_row(ctx, **kwargs):
             task_config["sample_count"] = kwargs["sample_count"]
         if kwargs["case_insensitive"]:
             task_config["case_insensitive"] = kwargs["case_insensitive"]
+        if kwargs["long_format"]:
+            task_config["long_format"] = kwargs["long_format"]
+        if kwargs["summary_only"]:
+            task_config["summary_only"] = kwargs["summary_only"]
+        if kwargs["output_format"]:
+            task_config["output_format"] = kwargs["output_format"]
+        if kwargs["memory_budget"]:
+            task_config["memory_budget"] = kwargs["memory_budget"]
         compare_row_tasks.append(task_config)
     else:
         compare_row_tasks = [
@@ -232,25 +327,8 @@ def compare_row(ctx, **kwargs):
 
     for tconf in compare_row_tasks:
         nlog.info(f"Executing compare-row with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        CompareRowTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
-            datasources=tconf["datasources"],
-            outfile_fqn=outfile_fqn,
-            sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
-            case_insensitive=(
-                tconf["case_insensitive"] if "case_insensitive" in tconf else False
-            ),
-        ).execute()
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
 
 
 # command: tulona compare-column
@@ -260,6 +338,9 @@ def compare_row(ctx, **kwargs):
 @p.datasources
 @p.composite
 @p.case_insensitive
+@p.summary_only
+@p.output_format
+@p.memory_budget
 def compare_column(ctx, **kwargs):
     """
     Column name must be specified for task: compare-column
@@ -277,6 +358,12 @@ def compare_column(ctx, **kwargs):
             task_config["composite"] = kwargs["composite"]
         if kwargs["case_insensitive"]:
             task_config["case_insensitive"] = kwargs["case_insensitive"]
+        if kwargs["summary_only"]:
+            task_config["summary_only"] = kwargs["summary_only"]
+        if kwargs["output_format"]:
+            task_config["output_format"] = kwargs["output_format"]
+        if kwargs["memory_budget"]:
+            task_config["memory_budget"] = kwargs["memory_budget"]
         compare_column_tasks.append(task_config)
     else:
         compare_column_tasks = [
@@ -292,25 +379,8 @@ def compare_column(ctx, **kwargs):
 
     for tconf in compare_column_tasks:
         nlog.info(f"Executing compare-column with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        CompareColumnTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
-            datasources=tconf["datasources"],
-            outfile_fqn=outfile_fqn,
-            composite=tconf["composite"] if "composite" in tconf else None,
-            case_insensitive=(
-                tconf["case_insensitive"] if "case_insensitive" in tconf else False
-            ),
-        ).execute()
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
 
 
 # command: tulona compare
@@ -321,6 +391,10 @@ def compare_column(ctx, **kwargs):
 @p.sample_count
 @p.composite
 @p.case_insensitive
+@p.long_format
+@p.summary_only
+@p.output_format
+@p.memory_budget
 def compare(ctx, **kwargs):
     """
     Compare everything(profiles, rows and columns) for the given datasoures
@@ -337,6 +411,14 @@ def compare(ctx, **kwargs):
             task_config["composite"] = kwargs["composite"]
         if kwargs["case_insensitive"]:
             task_config["case_insensitive"] = kwargs["case_insensitive"]
+        if kwargs["long_format"]:
+            task_config["long_format"] = kwargs["long_format"]
+        if kwargs["summary_only"]:
+            task_config["summary_only"] = kwargs["summary_only"]
+        if kwargs["output_format"]:
+            task_config["output_format"] = kwargs["output_format"]
+        if kwargs["memory_budget"]:
+            task_config["memory_budget"] = kwargs["memory_budget"]
         compare_tasks.append(task_config)
     else:
         compare_tasks = [
@@ -352,185 +434,221 @@ def compare(ctx, **kwargs):
 
     for tconf in compare_tasks:
         nlog.info(f"Executing compare with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
+        task = build_task(tconf, ctx.obj["project"], ctx.obj["profile"])
+        execute_task(task, get_task_name(tconf))
+
+
+def build_task(tconf: Dict, project: Dict, profile: Dict):
+    # Builds the task for a task_config entry, task modules are imported lazily
+    task = tconf["task"]
+    if task == "ping":
+        from tulona.task.ping import PingTask
+
+        return PingTask(
+            profile=profile,
+            project=project,
+            datasources=tconf["datasources"],
         )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
 
-        CompareTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
+    final_outdir = get_task_outdir(
+        base_dir=project["outdir"],
+        runid=project["runid"],
+        ds_list=tconf["datasources"],
+    )
+    nlog.debug(f"Output will be stored in: {final_outdir}")
+    output_format = (
+        tconf["output_format"] if "output_format" in tconf else project["output_format"]
+    )
+
+    if task == "scan":
+        from tulona.task.scan import ScanTask
+
+        return ScanTask(
+            profile=profile,
+            project=project,
             datasources=tconf["datasources"],
-            outfile_fqn=outfile_fqn,
+            final_outdir=final_outdir,
+            compare=tconf["compare"] if "compare" in tconf else None,
             sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
             composite=tconf["composite"] if "composite" in tconf else None,
             case_insensitive=(
                 tconf["case_insensitive"] if "case_insensitive" in tconf else False
             ),
-        ).execute()
+            summary_only=tconf["summary_only"] if "summary_only" in tconf else None,
+            output_format=output_format,
+            shard=tconf["shard"] if "shard" in tconf else None,
+        )
 
+    outfilename = get_task_outfile(task_conf=tconf)
+    outfile_fqn = Path(final_outdir, outfilename)
 
-# command: tulona run
-@cli.command("run")
-@click.pass_context
-# @p.exec_engine
-def run(ctx, **kwargs):
-    """Run all tasks defined by `task_config` attribute in the project config file"""
-    if "task_config" not in ctx.obj["project"]:
-        raise TulonaMissingPropertyError(
-            "Attribute `task_config` is not defined in project config"
-        )
+    if task == "profile":
+        from tulona.task.profile import ProfileTask
 
-    # Extract tasks
-    ping_tasks = [t for t in ctx.obj["project"]["task_config"] if t["task"] == "ping"]
-    profile_tasks = [
-        t for t in ctx.obj["project"]["task_config"] if t["task"] == "profile"
-    ]
-    compare_row_tasks = [
-        t for t in ctx.obj["project"]["task_config"] if t["task"] == "compare-row"
-    ]
-    compare_column_tasks = [
-        t for t in ctx.obj["project"]["task_config"] if t["task"] == "compare-column"
-    ]
-    compare_tasks = [
-        t for t in ctx.obj["project"]["task_config"] if t["task"] == "compare"
-    ]
-    scan_tasks = [t for t in ctx.obj["project"]["task_config"] if t["task"] == "scan"]
-
-    # PingTask
-    for tconf in ping_tasks:
-        nlog.info(f"Executing ping with task profile: {tconf}")
-        PingTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
+        return ProfileTask(
+            profile=profile,
+            project=project,
             datasources=tconf["datasources"],
-        ).execute()
-
-    # ProfileTask
-    for tconf in profile_tasks:
-        nlog.info(f"Executing profile with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        try:
-            ProfileTask(
-                profile=ctx.obj["profile"],
-                project=ctx.obj["project"],
-                datasources=tconf["datasources"],
-                outfile_fqn=outfile_fqn,
-                compare=tconf["compare"] if "compare" in tconf else None,
-            ).execute()
-        except Exception:
-            log.error(f"Profiling failed with error: {traceback.format_exc()}")
-
-    # CompareRowTask
-    for tconf in compare_row_tasks:
-        nlog.info(f"Executing compare-row with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        try:
-            CompareRowTask(
-                profile=ctx.obj["profile"],
-                project=ctx.obj["project"],
-                datasources=tconf["datasources"],
-                outfile_fqn=outfile_fqn,
-                sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
-                case_insensitive=(
-                    tconf["case_insensitive"] if "case_insensitive" in tconf else False
-                ),
-            ).execute()
-        except Exception:
-            log.error(f"Row comparison failed with error: {traceback.format_exc()}")
-
-    # CompareColumnTask
-    for tconf in compare_column_tasks:
-        nlog.info(f"Executing compare-column with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
-        )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
-
-        try:
-            CompareColumnTask(
-                profile=ctx.obj["profile"],
-                project=ctx.obj["project"],
-                datasources=tconf["datasources"],
-                outfile_fqn=outfile_fqn,
-                composite=tconf["composite"] if "composite" in tconf else None,
-                case_insensitive=(
-                    tconf["case_insensitive"] if "case_insensitive" in tconf else False
-                ),
-            ).execute()
-        except Exception:
-            log.error(f"Column comparison failed with errorr: {traceback.format_exc()}")
-
-    # CompareTask
-    for tconf in compare_tasks:
-        nlog.info(f"Executing compare with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
+            outfile_fqn=outfile_fqn,
+            compare=tconf["compare"] if "compare" in tconf else None,
+            output_format=output_format,
         )
-        outfilename = get_task_outfile(task_conf=tconf)
-        outfile_fqn = Path(final_outdir, outfilename)
-        nlog.debug(f"Output will be stored in: {final_outdir}")
+    elif task == "compare-row":
+        from tulona.task.compare import CompareRowTask
 
-        CompareTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
+        return CompareRowTask(
+            profile=profile,
+            project=project,
             datasources=tconf["datasources"],
             outfile_fqn=outfile_fqn,
             sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
-            composite=tconf["composite"] if "composite" in tconf else None,
             case_insensitive=(
                 tconf["case_insensitive"] if "case_insensitive" in tconf else False
             ),
-        ).execute()
+            long_format=tconf["long_format"] if "long_format" in tconf else None,
+            summary_only=tconf["summary_only"] if "summary_only" in tconf else None,
+            output_format=output_format,
+            memory_budget=tconf["memory_budget"] if "memory_budget" in tconf else None,
+        )
+    elif task == "compare-column":
+        from tulona.task.compare import CompareColumnTask
 
-    # ScanTask
-    for tconf in scan_tasks:
-        nlog.info(f"Executing scan with task profile: {tconf}")
-        final_outdir = get_task_outdir(
-            base_dir=ctx.obj["project"]["outdir"],
-            runid=ctx.obj["project"]["runid"],
-            ds_list=tconf["datasources"],
+        return CompareColumnTask(
+            profile=profile,
+            project=project,
+            datasources=tconf["datasources"],
+            outfile_fqn=outfile_fqn,
+            composite=tconf["composite"] if "composite" in tconf else None,
+            case_insensitive=(
+                tconf["case_insensitive"] if "case_insensitive" in tconf else False
+            ),
+            summary_only=tconf["summary_only"] if "summary_only" in tconf else None,
+            output_format=output_format,
+            memory_budget=tconf["memory_budget"] if "memory_budget" in tconf else None,
         )
-        nlog.debug(f"Output will be stored in: {final_outdir}")
+    elif task == "compare":
+        from tulona.task.compare import CompareTask
 
-        ScanTask(
-            profile=ctx.obj["profile"],
-            project=ctx.obj["project"],
+        return CompareTask(
+            profile=profile,
+            project=project,
             datasources=tconf["datasources"],
-            final_outdir=final_outdir,
-            compare=tconf["compare"] if "compare" in tconf else None,
+            outfile_fqn=outfile_fqn,
             sample_count=tconf["sample_count"] if "sample_count" in tconf else None,
             composite=tconf["composite"] if "composite" in tconf else None,
             case_insensitive=(
                 tconf["case_insensitive"] if "case_insensitive" in tconf else False
             ),
-        ).execute()
+            long_format=tconf["long_format"] if "long_format" in tconf else None,
+            summary_only=tconf["summary_only"] if "summary_only" in tconf else None,
+            output_format=output_format,
+            memory_budget=tconf["memory_budget"] if "memory_budget" in tconf else None,
+        )
+    else:
+        raise TulonaUnSupportedTaskError(f"Task {task} is not supported")
+
+
+def get_task_nodes(project: Dict, profile: Dict) -> List:
+    from tulona.task.dag import TaskNode
+
+    nodes = []
+    for idx, tconf in enumerate(project["task_config"]):
+        name = get_task_name(tconf, idx)
+        depends_on = tconf["depends_on"] if "depends_on" in tconf else []
+        depends_on = [depends_on] if isinstance(depends_on, str) else depends_on
+
+        def run_task(tconf=tconf, name=name):
+            nlog.info(f"Executing {name} with task profile: {tconf}")
+            execute_task(build_task(tconf, project, profile), name)
+
+        nodes.append(
+            TaskNode(
+                name=name,
+                run=run_task,
+                depends_on=depends_on,
+                resources=[
+                    extract_profile_name(project, ds) for ds in tconf["datasources"]
+                ],
+            )
+        )
+    return nodes
+
+
+# command: tulona run
+@cli.command("run")
+@click.pass_context
+# @p.exec_engine
+@p.max_workers
+def run(ctx, **kwargs):
+    """
+    Run all tasks defined by `task_config` attribute in the project config file.
+    With --max-workers above 1 tasks run concurrently, respecting `depends_on`
+    and the `max_concurrency` of the connection profiles
+    """
+    from tulona.task.dag import FAILED, SKIPPED, DagScheduler
+
+    if "task_config" not in ctx.obj["project"]:
+        raise TulonaMissingPropertyError(
+            "Attribute `task_config` is not defined in project config"
+        )
+
+    nodes = get_task_nodes(ctx.obj["project"], ctx.obj["profile"])
+    resource_limits = {
+        name: conn_profile["max_concurrency"]
+        for name, conn_profile in ctx.obj["profile"]["profiles"].items()
+        if "max_concurrency" in conn_profile
+    }
+    scheduler = DagScheduler(
+        nodes=nodes,
+        max_workers=kwargs["max_workers"],
+        resource_limits=resource_limits,
+    )
+    nlog.debug(f"Number of tasks to execute: {len(nodes)}")
+    status = scheduler.run()
+
+    failed = [n for n, s in status.items() if s == FAILED]
+    skipped = [n for n, s in status.items() if s == SKIPPED]
+    nlog.info(
+        f"Executed {len(status)} tasks, failed: {failed or None}, skipped: {skipped or None}"
+    )
+    if failed:
+        ctx.exit(1)
+
+
+# command: tulona serve
+@cli.command("serve")
+@click.pass_context
+@p.host
+@p.port
+@p.socket
+@p.max_workers
+def serve(ctx, **kwargs):
+    """
+    Run as a daemon accepting jobs over a local HTTP endpoint or Unix socket.
+    Configs are parsed once and database engines stay warm across jobs
+    """
+    from tulona.cli.server import JobManager, create_server
+
+    job_manager = JobManager(
+        project=ctx.obj["project"],
+        profile=ctx.obj["profile"],
+        max_workers=kwargs["max_workers"],
+    )
+    job_manager.warm_up()
+    server = create_server(
+        job_manager,
+        host=kwargs["host"],
+        port=kwargs["port"],
+        socket_path=kwargs["socket"],
+    )
+    nlog.info(f"Serving jobs on: {kwargs['socket'] or (kwargs['host'], kwargs['port'])}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        nlog.info("Shutting down, waiting for running jobs to finish")
+    finally:
+        server.server_close()
+        job_manager.shutdown()
 
 
 if __name__ == "__main__":
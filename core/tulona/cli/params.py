@@ -1,5 +1,34 @@
 import click
 
+from tulona.config.project import OUTPUT_FORMATS
+
+metrics_textfile = click.option(
+    "--metrics-textfile",
+    help="Also write the per phase metrics of the run into this file"
+    " in Prometheus text format [for the node exporter textfile collector]",
+)
+
+profile_cpu = click.option(
+    "--profile-cpu",
+    is_flag=True,
+    help="Sample the call stacks of the run and write them into"
+    " <outdir>/<runid>/cpu_profile.collapsed [viewable with speedscope]",
+)
+
+trace_memory = click.option(
+    "--trace-memory",
+    is_flag=True,
+    help="Trace memory allocations and write the peak of every phase"
+    " and the top allocation sites into <outdir>/<runid>/memory.json",
+)
+
+trace = click.option(
+    "--trace",
+    is_flag=True,
+    help="Record tasks, phases and every SQL statement as spans and write them into"
+    " <outdir>/<runid>/trace.json in OpenTelemetry [OTLP JSON] format",
+)
+
 exec_engine = click.option(
     "--engine", help="Execution engine. Can be one of Pandas right now", type=click.STRING
 )
@@ -31,3 +60,74 @@ case_insensitive = click.option(
     is_flag=True,
     help="If row and/or column comparison are case insensitive or not",
 )
+
+long_format = click.option(
+    "--long-format",
+    is_flag=True,
+    help="Used with compare-row task to write one row per mismatched cell"
+    " [primary key, column, left_value, right_value] and a mismatch summary"
+    " instead of the side by side comparison",
+)
+
+summary_only = click.option(
+    "--summary-only",
+    is_flag=True,
+    help="Write only match/mismatch statistics into a JSON report"
+    " instead of the row level comparison",
+)
+
+memory_budget = click.option(
+    "--memory-budget",
+    help="Memory the comparison of extracted rows may use, e.g. 512MB or 2GB."
+    " Larger comparisons are processed in chunks."
+    " Overrides `memory_budget` from project config",
+)
+
+output_format = click.option(
+    "--output-format",
+    type=click.Choice(OUTPUT_FORMATS),
+    help="Format of the output files. Overrides `output_format` from project config."
+    " Every sheet is written as a separate file for formats other than xlsx",
+)
+
+shard = click.option(
+    "--shard",
+    help="Used with scan --compare to run only a slice of the table comparisons,"
+    " given as i/N [for example 2/4]. Tables are assigned to shards by a stable hash"
+    " so N workers can each take one shard",
+)
+
+outdir = click.option(
+    "--outdir",
+    help="Directory to write the merged results into."
+    " Defaults to <outdir>/merged/<runid> of the project",
+)
+
+max_workers = click.option(
+    "--max-workers",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Maximum number of tasks executed concurrently by the run and serve commands."
+    " The default runs them one by one",
+)
+
+host = click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="Address the serve command listens on",
+)
+
+port = click.option(
+    "--port",
+    type=int,
+    default=8765,
+    show_default=True,
+    help="Port the serve command listens on",
+)
+
+socket = click.option(
+    "--socket",
+    help="Path of a Unix socket for the serve command to listen on instead of host/port",
+)
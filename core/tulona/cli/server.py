@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.filesystem import get_runid, get_task_outdir
+from tulona.util.metrics import MetricsCollector, collect_metrics
+from tulona.util.profiles import get_connection_profile
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_WORKERS = 4
+JOB_TASKS = ["ping", "profile", "compare-row", "compare-column", "compare", "scan"]
+
+
+@dataclass
+class Job:
+    id: str
+    task_config: Dict
+    status: str = "queued"
+    outdir: Optional[str] = None
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class JobManager:
+    def __init__(
+        self, project: Dict, profile: Dict, max_workers: int = DEFAULT_MAX_WORKERS
+    ):
+        self.project = project
+        self.profile = profile
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tulona-job"
+        )
+
+    def warm_up(self) -> None:
+        # Engines are kept in the process wide registry, connecting once here
+        # pays the auth handshake before the first job arrives
+        from tulona.adapter.connection import ConnectionManager
+
+        conn_profiles = {}
+        for ds_config in self.project["datasources"].values():
+            if "connection_profile" in ds_config:
+                conn_profiles[ds_config["connection_profile"]] = get_connection_profile(
+                    self.profile, ds_config
+                )
+        for name, conn_profile in conn_profiles.items():
+            try:
+                log.info(f"Warming up connection profile: {name}")
+                conman = ConnectionManager(conn_profile)
+                conman.open()
+                conman.close()
+            except Exception as exc:
+                log.warning(f"Could not warm up connection profile {name}: {exc}")
+
+    def validate(self, task_config: Dict) -> None:
+        if not isinstance(task_config, dict):
+            raise TulonaInvalidConfigError("Job must be a task config object")
+        if task_config.get("task") not in JOB_TASKS:
+            raise TulonaInvalidConfigError(
+                f"Job task must be one of {JOB_TASKS}, got: {task_config.get('task')}"
+            )
+        datasources = task_config.get("datasources")
+        if not datasources or not isinstance(datasources, list):
+            raise TulonaInvalidConfigError("Job must have a list of `datasources`")
+        unknown = [ds for ds in datasources if ds not in self.project["datasources"]]
+        if unknown:
+            raise TulonaInvalidConfigError(f"Unknown datasource[s]: {unknown}")
+
+    def submit(self, task_config: Dict) -> Job:
+        self.validate(task_config)
+        job = Job(id=uuid.uuid4().hex, task_config=task_config)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._executor.submit(self.run_job, job)
+        log.info(f"Accepted job {job.id}: {task_config}")
+        return job
+
+    def run_job(self, job: Job) -> None:
+        from tulona.cli.base import build_task, execute_task, get_task_name
+
+        job.status = "running"
+        job.started_at = time.time()
+        # Every job gets a project config, run id and metrics of its own so that
+        # jobs never share state or outputs. Run ids are made unique by the job id
+        project = {**deepcopy(self.project), "runid": f"{get_runid()}__{job.id}"}
+        collector = MetricsCollector()
+        try:
+            if job.task_config["task"] != "ping":
+                outdir = get_task_outdir(
+                    base_dir=project["outdir"],
+                    runid=project["runid"],
+                    ds_list=job.task_config["datasources"],
+                )
+                job.outdir = str(Path(outdir).absolute())
+            with collect_metrics(collector):
+                execute_task(
+                    build_task(job.task_config, project, self.profile),
+                    get_task_name(job.task_config),
+                )
+            job.status = "success"
+        except Exception as exc:
+            log.error(f"Job {job.id} failed with error: {traceback.format_exc()}")
+            job.error = str(exc)
+            job.status = "failed"
+        finally:
+            if job.outdir and collector.get_records():
+                collector.write_json(
+                    Path(job.outdir, "metrics.json"), runid=project["runid"], job=job.id
+                )
+            if job.outdir and os.path.exists(job.outdir):
+                job.outputs = sorted(
+                    str(p) for p in Path(job.outdir).rglob("*") if p.is_file()
+                )
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    # Set on the server: server.job_manager
+
+    def send_json(self, status: int, body) -> None:
+        payload = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        manager = self.server.job_manager
+        parts = [p for p in self.path.split("/") if p]
+        if parts == ["health"]:
+            self.send_json(200, {"status": "ok"})
+        elif parts == ["jobs"]:
+            self.send_json(200, [asdict(j) for j in manager.list()])
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = manager.get(parts[1])
+            if job is None:
+                self.send_json(404, {"error": f"Job {parts[1]} not found"})
+            else:
+                self.send_json(200, asdict(job))
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        manager = self.server.job_manager
+        if self.path.rstrip("/") != "/jobs":
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            task_config = json.loads(self.rfile.read(length) or b"null")
+            job = manager.submit(task_config)
+        except (ValueError, TulonaInvalidConfigError) as exc:
+            self.send_json(400, {"error": str(exc)})
+            return
+        self.send_json(202, asdict(job))
+
+    def log_message(self, format, *args):
+        log.debug(f"{self.address_string()} - {format % args}")
+
+
+class UnixThreadingHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+    def server_close(self):
+        super().server_close()
+        if is_socket(self.server_address):
+            os.unlink(self.server_address)
+
+
+def is_socket(path: str) -> bool:
+    return os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode)
+
+
+def create_server(
+    job_manager: JobManager,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+):
+    if socket_path:
+        # Only a stale socket is replaced, never a file that happens to be there
+        if is_socket(socket_path):
+            os.unlink(socket_path)
+        elif os.path.exists(socket_path):
+            raise TulonaInvalidConfigError(f"{socket_path} exists and is not a socket")
+        server = UnixThreadingHTTPServer(socket_path, JobRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.job_manager = job_manager
+    return server
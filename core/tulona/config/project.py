@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union, get_args
 
 from pydantic import BaseModel
 
@@ -12,6 +12,9 @@ log = logging.getLogger(__name__)
 
 PROJECT_FILE_NAME = "tulona-project.yml"
 
+OutputFormat = Literal["xlsx", "parquet", "arrow", "csv.zst", "jsonl"]
+OUTPUT_FORMATS = list(get_args(OutputFormat))
+
 
 # TODO: Add datasource model to validation
 class ProjectModel(BaseModel):
@@ -20,6 +23,8 @@ class ProjectModel(BaseModel):
     config_version: int = 1
     engine: Optional[str] = "pandas"
     outdir: str = "output"
+    output_format: OutputFormat = "xlsx"
+    memory_budget: Optional[Union[int, str]] = None
     datasources: Dict
     task_config: Optional[List[Dict]] = []
 
@@ -1,15 +1,20 @@
 from abc import ABCMeta, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
 
 from tulona.adapter.connection import ConnectionManager
 from tulona.exceptions import TulonaNotImplementedError
+from tulona.util.metrics import phase
 
 
 class BaseTask(metaclass=ABCMeta):
 
-    def get_connection_manager(self, conn_profile: Dict) -> ConnectionManager:
-        conman = ConnectionManager(conn_profile)
-        conman.get_engine()
+    def get_connection_manager(
+        self, conn_profile: Dict, datasource: Optional[str] = None
+    ) -> ConnectionManager:
+        # Engine comes from the process wide registry so all tasks share connection pools
+        conman = ConnectionManager(conn_profile, datasource=datasource)
+        with phase("connect", datasource=datasource):
+            conman.get_engine()
         return conman
 
     @abstractmethod
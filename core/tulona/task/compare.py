@@ -1,46 +1,72 @@
+import contextvars
 import logging
-import os
 import re
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from dataclasses import _MISSING_TYPE, dataclass, fields
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from tulona.exceptions import (
     TulonaInvalidConfigError,
-    TulonaMissingPrimaryKeyError,
     TulonaMissingPropertyError,
     TulonaUnsupportedQueryError,
 )
 from tulona.task.base import BaseTask
-from tulona.task.helper import perform_comparison
+from tulona.task.helper import get_presence_mismatches, perform_chunked_comparison
+from tulona.task.plan import DatasourcePlan, get_datasource_plans
 from tulona.task.profile import ProfileTask
-from tulona.util.database import get_table_primary_keys
-from tulona.util.dataframe import apply_column_exclusion, get_sample_rows_for_each_value
-from tulona.util.excel import highlight_mismatch_cells
+from tulona.util.dataframe import (
+    KeyEncoding,
+    apply_column_exclusion,
+    compact_dataframes,
+    get_key_presence_summary,
+    get_long_mismatch_frame,
+    get_row_comparison_summary,
+    get_sample_rows_for_each_value,
+    parse_memory_size,
+    restore_decimal_columns,
+)
 from tulona.util.filesystem import create_dir_if_not_exist
-from tulona.util.profiles import extract_profile_name, get_connection_profile
+from tulona.util.metrics import phase
+from tulona.util.normalize import get_tolerances, normalize_dataframes
+from tulona.util.output import OutputSession, get_output_session
 from tulona.util.sql import (
+    BULK_EXTRACTION_THRESHOLD,
     build_filter_query_expression,
-    get_column_query,
     get_query_output_as_df,
+    get_row_count,
     get_table_data_query,
-    get_table_fqn,
+    get_table_output_as_df,
 )
 
 log = logging.getLogger(__name__)
 
 DEFAULT_VALUES = {
+    "output_format": "xlsx",
     "sample_count": 20,
     "compare_column_composite": False,
     "case_insensitive": False,
+    "long_format": False,
+    "summary_only": False,
+    "memory_budget": None,
 }
 
 
+def get_memory_budget(
+    memory_budget: Union[str, int, None], project: Dict
+) -> Optional[int]:
+    # The task level budget takes precedence over the project level one
+    if memory_budget is None:
+        memory_budget = project.get("memory_budget")
+    return parse_memory_size(memory_budget)
+
+
 @dataclass
 class CompareRowTask(BaseTask):
     profile: Dict
@@ -49,6 +75,12 @@ class CompareRowTask(BaseTask):
     outfile_fqn: Path
     sample_count: int = DEFAULT_VALUES["sample_count"]
     case_insensitive: bool = DEFAULT_VALUES["case_insensitive"]
+    long_format: bool = DEFAULT_VALUES["long_format"]
+    summary_only: bool = DEFAULT_VALUES["summary_only"]
+    output_format: str = DEFAULT_VALUES["output_format"]
+    memory_budget: str = DEFAULT_VALUES["memory_budget"]
+    session: OutputSession = None
+    plans: Dict[str, DatasourcePlan] = None
 
     # Support for default values
     def __post_init__(self):
@@ -59,8 +91,13 @@ class CompareRowTask(BaseTask):
                 and getattr(self, field.name) is None
             ):
                 setattr(self, field.name, field.default)
+        self.econf_dict = None
 
     def extract_confs(self):
+        # Resolved once per task, CompareTask needs the primary key before execute
+        if self.econf_dict is not None:
+            return self.econf_dict
+
         def validate_conjunct_configs(econf_dict: Dict):
             if len(econf_dict["queries"]) > 0 and len(econf_dict["queries"]) != len(
                 self.datasources
@@ -92,6 +129,9 @@ class CompareRowTask(BaseTask):
 
         # TODO: Add support for different names of primary keys in different tables
         # Check if primary key[s] is[are] specified for row comparison
+        plans = get_datasource_plans(
+            self.profile, self.project, self.datasources, self.plans
+        )
         econf_dict = {}
         econf_dict["primary_keys"] = []
         econf_dict["ds_names"] = []
@@ -102,105 +142,162 @@ class CompareRowTask(BaseTask):
         econf_dict["queries"] = []
         econf_dict["connection_managers"] = []
         econf_dict["exclude_columns_lol"] = []
+        econf_dict["column_types"] = []
         for ds_name in self.datasources:
             log.debug(f"Extracting configs for: {ds_name}")
+            plan = plans[ds_name]
             econf_dict["ds_names"].append(ds_name)
-            econf_dict["ds_name_compressed_list"].append(ds_name.replace("_", ""))
+            econf_dict["ds_name_compressed_list"].append(plan.ds_name_compressed)
+            econf_dict["ds_configs"].append(plan.ds_config)
+            econf_dict["dbtypes"].append(plan.dbtype)
 
-            ds_config = self.project["datasources"][ds_name]
-            econf_dict["ds_configs"].append(ds_config)
-            dbtype = self.profile["profiles"][
-                extract_profile_name(self.project, ds_name)
-            ]["type"]
-            econf_dict["dbtypes"].append(dbtype)
-
-            if "query" in ds_config:
-                econf_dict["queries"].append(ds_config["query"])
-
-            if "table" in ds_config:
-                # MySQL doesn't have logical database
-                if "database" in ds_config and dbtype.lower() != "mysql":
-                    database = ds_config["database"]
-                elif dbtype.lower() == "bigquery":
-                    database = ds_config["project"]
-                else:
-                    database = None
+            if plan.query:
+                econf_dict["queries"].append(plan.query)
 
-                if dbtype.lower() == "bigquery":
-                    schema = ds_config["dataset"]
-                else:
-                    schema = ds_config["schema"]
-
-                table = ds_config["table"]
-
-                table_fqn = get_table_fqn(database, schema, table)
-                econf_dict["table_fqns"].append(table_fqn)
+            if plan.table:
+                econf_dict["table_fqns"].append(plan.table_fqn)
 
             exclude_columns = (
-                ds_config["exclude_columns"] if "exclude_columns" in ds_config else []
+                plan.ds_config["exclude_columns"]
+                if "exclude_columns" in plan.ds_config
+                else []
             )
             if isinstance(exclude_columns, str):
                 exclude_columns = [exclude_columns]
             econf_dict["exclude_columns_lol"].append(exclude_columns)
 
-            log.debug(f"Acquiring connection to the database of: {ds_name}")
-            connection_profile = get_connection_profile(self.profile, ds_config)
-            conman = self.get_connection_manager(conn_profile=connection_profile)
-            econf_dict["connection_managers"].append(conman)
-
-            if "primary_key" in ds_config:
-                ds_pk = (
-                    (ds_config["primary_key"],)
-                    if isinstance(ds_config["primary_key"], str)
-                    else tuple(sorted(ds_config["primary_key"]))
-                )
-                log.debug(f"Provided primary key for datasource {ds_name}: {ds_pk}")
-            else:
-                log.debug(
-                    f"Primary key not provided for datasource {ds_name}."
-                    " Tulona will try to extract it from table metadata"
-                )
-                ds_pk = tuple(get_table_primary_keys(conman.engine, schema, table))
-                if not ds_pk:
-                    raise TulonaMissingPrimaryKeyError(
-                        "Primary key[s] is[are] not available"
-                        f" for {table_fqn}[{ds_name}]. Abort!"
-                    )
-                else:
-                    log.debug(f"Extracted primary key for datasource {ds_name}: {ds_pk}")
-
-            if ds_pk:
-                econf_dict["primary_keys"].append(ds_pk)
+            econf_dict["connection_managers"].append(plan.connection_manager)
+            econf_dict["primary_keys"].append(plan.get_primary_key())
+            econf_dict["column_types"].append(plan.get_column_types())
 
         # Validate the config counterparts
         validate_conjunct_configs(econf_dict)
 
         econf_dict["primary_key"] = econf_dict["primary_keys"][0]
+        econf_dict["tolerances"] = get_tolerances(econf_dict["ds_configs"])
         log.debug(f"Final primary key: {econf_dict['primary_key']}")
 
+        self.econf_dict = econf_dict
         return econf_dict
 
+    def extract_filtered_rows(
+        self,
+        econf_dict: Dict,
+        dbtype: str,
+        connection_manager,
+        data_container: str,
+        query_expr: str,
+        bulk: bool,
+    ) -> pd.DataFrame:
+        if len(econf_dict["queries"]) > 0:
+            query = get_table_data_query(
+                dbtype=dbtype,
+                data_container=data_container,
+                sample_count=self.sample_count,
+                query_expr=query_expr,
+            )
+            sanitized_query = re.sub(r"where(.*)\(.*\)", r"where\g<1>(...)", query)
+            log.debug(f"Executing query: {sanitized_query}")
+            return get_query_output_as_df(
+                connection_manager=connection_manager, query_text=query, bulk=bulk
+            )
+
+        # Tables are read through the adapter so that the key filter can be pushed
+        # down where the platform supports it (e.g. BigQuery Storage Read API)
+        return get_table_output_as_df(
+            connection_manager=connection_manager,
+            table_fqn=data_container,
+            query_expr=query_expr,
+            bulk=bulk,
+        )
+
+    def prepare_extracted_rows(
+        self,
+        econf_dict: Dict,
+        df: pd.DataFrame,
+        primary_key: Tuple,
+        ds_index: int,
+        data_container: str,
+    ) -> pd.DataFrame:
+        df = df.rename(columns={c: c.lower() for c in df.columns})
+        for k in primary_key:
+            if k.lower() not in df.columns.tolist():
+                raise ValueError(f"Primary key {k} not present in {data_container}")
+
+        # Exclude columns
+        ds_name = econf_dict["ds_names"][ds_index]
+        exclude_columns = econf_dict["exclude_columns_lol"][ds_index]
+        if len(exclude_columns) > 0:
+            log.debug(f"Excluding columns from {ds_name}: {exclude_columns}")
+            exclude_columns = [c.lower() for c in exclude_columns]
+            df = apply_column_exclusion(df, primary_key, exclude_columns, ds_name)
+        return df
+
+    def write_summary(
+        self,
+        econf_dict: Dict,
+        dataframes: List[pd.DataFrame],
+        primary_key: Tuple,
+        data_containers: List[str],
+    ) -> None:
+        ds_compressed_names = econf_dict["ds_name_compressed_list"]
+        log.debug(f"Preparing row comparison summary for: {ds_compressed_names}")
+        sample_summary, df_column_summary = get_row_comparison_summary(
+            dataframes=dataframes,
+            ds_compressed_names=ds_compressed_names,
+            primary_key=primary_key,
+            case_insensitive=self.case_insensitive,
+            tolerances=econf_dict["tolerances"],
+        )
+        # Other sides are extracted by the sampled keys of the first one, keys
+        # only they have are never seen. Only the first side's count is reported
+        sample_summary["only_in"] = {
+            ds_compressed_names[0]: sample_summary["only_in"][ds_compressed_names[0]]
+        }
+        sample_summary["columns"] = df_column_summary.to_dict(orient="records")
+        log.debug(
+            f"{sample_summary['rows_mismatched']} of {sample_summary['rows_compared']}"
+            " sampled rows have mismatches"
+        )
+
+        # Row counts are of the whole tables, every other figure is of the sample
+        summary = {
+            "row_count": {
+                ds: get_row_count(conman, container)
+                for ds, conman, container in zip(
+                    ds_compressed_names,
+                    econf_dict["connection_managers"],
+                    data_containers,
+                )
+            },
+            "sample": {"sample_count": self.sample_count, **sample_summary},
+        }
+
+        with get_output_session(
+            self.outfile_fqn, self.session, self.output_format
+        ) as session:
+            session.add_summary("compare_row", summary)
+
     def execute(self):
         log.info("------------------------ Starting task: compare-row")
         start_time = time.time()
 
-        if len(self.datasources) != 2:
-            raise ValueError("Data comparison needs two data sources.")
+        if len(self.datasources) < 2:
+            raise ValueError("Data comparison needs at least two data sources.")
         log.info(f"Comparing {self.datasources}")
 
         # Config extraction
         econf_dict = self.extract_confs()
-        dbtype1, dbtype2 = econf_dict["dbtypes"]
-        exclude_columns1, exclude_columns2 = econf_dict["exclude_columns_lol"]
-        conman1, conman2 = econf_dict["connection_managers"]
+        ds_names = econf_dict["ds_names"]
+        dbtypes = econf_dict["dbtypes"]
+        connection_managers = econf_dict["connection_managers"]
 
         if len(econf_dict["queries"]) > 0:
-            data_container1 = "(" + econf_dict["queries"][0] + ") as tulona__"
-            data_container2 = "(" + econf_dict["queries"][1] + ") as tulona__"
+            data_containers = [
+                "(" + query + ") as tulona__" for query in econf_dict["queries"]
+            ]
         else:
-            table_fqn1, table_fqn2 = econf_dict["table_fqns"]
-            data_container1 = table_fqn1
-            data_container2 = table_fqn2
+            data_containers = econf_dict["table_fqns"]
             log.debug(f"Sample count: {self.sample_count}")
 
         # TODO: push column exclusion down to the database/query
@@ -208,16 +305,19 @@ class CompareRowTask(BaseTask):
         # lists as that is already happening while extracting pks
         primary_key = tuple([k for k in econf_dict["primary_key"]])
         query_expr = None
+        bulk_extraction = self.sample_count >= BULK_EXTRACTION_THRESHOLD
 
-        df1 = df2 = pd.DataFrame()
+        # Rows are sampled from the first datasource and looked up in all the others
+        df1 = pd.DataFrame()
+        other_dfs = []
         num_try = 5
         i = 0
         while i < num_try:
             log.debug(f"Extraction iteration: {i + 1}/{num_try}")
 
             query1 = get_table_data_query(
-                dbtype=dbtype1,
-                data_container=data_container1,
+                dbtype=dbtypes[0],
+                data_container=data_containers[0],
                 sample_count=self.sample_count,
                 query_expr=query_expr,
             )
@@ -226,9 +326,12 @@ class CompareRowTask(BaseTask):
             log.debug(f"Executing query: {sanitized_query1}")
 
             try:
-                df1 = get_query_output_as_df(
-                    connection_manager=conman1, query_text=query1
-                )
+                with phase("extract", datasource=ds_names[0]):
+                    df1 = get_query_output_as_df(
+                        connection_manager=connection_managers[0],
+                        query_text=query1,
+                        bulk=bulk_extraction,
+                    )
             except Exception as exc:
                 log.warning(f"Previous query failed with error: {exc}")
                 if len(econf_dict["queries"]) > 0:
@@ -253,82 +356,66 @@ class CompareRowTask(BaseTask):
                     )
 
             if df1.empty:
-                raise ValueError(f"Couldn't extract rows from {data_container1}")
-
-            df1 = df1.rename(columns={c: c.lower() for c in df1.columns})
-            for k in primary_key:
-                if k.lower() not in df1.columns.tolist():
-                    raise ValueError(f"Primary key {k} not present in {data_container1}")
+                raise ValueError(f"Couldn't extract rows from {data_containers[0]}")
 
-            # Exclude columns
-            if len(exclude_columns1) > 0:
-                log.debug(
-                    f"Excluding columns from {econf_dict['ds_names'][0]}: {exclude_columns1}"
-                )
-                exclude_columns1 = [c.lower() for c in exclude_columns1]
-                df1 = apply_column_exclusion(
-                    df1, primary_key, exclude_columns1, econf_dict["ds_names"][0]
-                )
-
-            query2 = get_table_data_query(
-                dbtype=dbtype2,
-                data_container=data_container2,
-                sample_count=self.sample_count,
-                query_expr=build_filter_query_expression(df1, primary_key),
+            df1 = self.prepare_extracted_rows(
+                econf_dict, df1, primary_key, 0, data_containers[0]
             )
-            sanitized_query2 = re.sub(r"where(.*)\(.*\)", r"where\g<1>(...)", query2)
-            log.debug(f"Executing query: {sanitized_query2}")
-
-            try:
-                df2 = get_query_output_as_df(
-                    connection_manager=conman2, query_text=query2
-                )
-            except Exception as exc:
-                log.warning(f"Previous query failed with error: {exc}")
-                if len(econf_dict["queries"]) > 0:
-                    raise TulonaUnsupportedQueryError(
-                        "The provided query is unsupported!"
-                        " Please try to execute it in the database platform first."
-                        f" Query: {econf_dict['queries'][1]}"
-                    )
-                log.debug(
-                    "Trying query with quoted column names for the filter expression"
-                )
-                query2 = get_table_data_query(
-                    dbtype=dbtype2,
-                    data_container=data_container2,
-                    sample_count=self.sample_count,
-                    query_expr=build_filter_query_expression(
-                        df1, primary_key, quoted=True
-                    ),
-                )
-                sanitized_query2 = re.sub(r"where(.*)\(.*\)", r"where\g<1>(...)", query2)
-                log.debug(f"Executing query: {sanitized_query2}")
-                df2 = get_query_output_as_df(
-                    connection_manager=conman2, query_text=query2
-                )
-
-            df2 = df2.rename(columns={c: c.lower() for c in df2.columns})
 
-            for k in primary_key:
-                if k.lower() not in df2.columns.tolist():
-                    raise ValueError(f"Primary key {k} not present in {table_fqn2}")
-
-            # Exclude columns
-            if len(exclude_columns2) > 0:
-                log.debug(
-                    f"Excluding columns from {econf_dict['ds_names'][1]}: {exclude_columns2}"
+            other_dfs = []
+            for idx in range(1, len(ds_names)):
+                with phase("extract", datasource=ds_names[idx]):
+                    try:
+                        df = self.extract_filtered_rows(
+                            econf_dict=econf_dict,
+                            dbtype=dbtypes[idx],
+                            connection_manager=connection_managers[idx],
+                            data_container=data_containers[idx],
+                            query_expr=build_filter_query_expression(df1, primary_key),
+                            bulk=bulk_extraction,
+                        )
+                    except Exception as exc:
+                        log.warning(f"Previous query failed with error: {exc}")
+                        if len(econf_dict["queries"]) > 0:
+                            raise TulonaUnsupportedQueryError(
+                                "The provided query is unsupported!"
+                                " Please try to execute it in the database platform first."
+                                f" Query: {econf_dict['queries'][idx]}"
+                            )
+                        log.debug(
+                            "Trying query with quoted column names for the filter expression"
+                        )
+                        df = self.extract_filtered_rows(
+                            econf_dict=econf_dict,
+                            dbtype=dbtypes[idx],
+                            connection_manager=connection_managers[idx],
+                            data_container=data_containers[idx],
+                            query_expr=build_filter_query_expression(
+                                df1, primary_key, quoted=True
+                            ),
+                            bulk=bulk_extraction,
+                        )
+
+                df = self.prepare_extracted_rows(
+                    econf_dict, df, primary_key, idx, data_containers[idx]
                 )
-                exclude_columns2 = [c.lower() for c in exclude_columns2]
-                df2 = apply_column_exclusion(
-                    df2, primary_key, exclude_columns2, econf_dict["ds_names"][1]
+                if df.empty:
+                    break
+                other_dfs.append(df)
+
+            if len(other_dfs) == len(ds_names) - 1:
+                # Values are normalized once per side, before keys are matched
+                sample_data_list = normalize_dataframes(
+                    [df1] + other_dfs, econf_dict["column_types"]
                 )
-
-            if not df2.empty:
-                for k in primary_key:
-                    k = k.lower()
-                    df1 = df1[df1[k].isin(df2[k].tolist())]
-                row_data_list = [df1, df2]
+                # Only sampled rows found in all the other datasources are compared
+                keys = KeyEncoding(
+                    sample_data_list, [k.lower() for k in primary_key]
+                ).keys
+                found = np.ones(df1.shape[0], dtype=bool)
+                for key in keys[1:]:
+                    found &= pd.Index(keys[0]).isin(key)
+                row_data_list = [sample_data_list[0][found]] + sample_data_list[1:]
                 break
             else:
                 query_expr = build_filter_query_expression(
@@ -337,44 +424,72 @@ class CompareRowTask(BaseTask):
 
             i += 1
 
-        if df2.empty:
+        if len(other_dfs) < len(ds_names) - 1:
             raise ValueError(
-                f"Could not find common rows between {data_container1} and {data_container2}"
+                f"Could not find common rows between {', '.join(data_containers)}"
+            )
+
+        # Sides are compacted once, before they are compared. Columns compared
+        # with a tolerance keep their values as they are
+        primary_key_lower = [k.lower() for k in primary_key]
+        skip_columns = primary_key_lower + list(econf_dict["tolerances"])
+        if self.summary_only:
+            sample_data_list, _ = compact_dataframes(sample_data_list, skip_columns)
+            self.write_summary(
+                econf_dict,
+                sample_data_list,
+                primary_key,
+                data_containers,
             )
+            exec_time = time.time() - start_time
+            log.info(f"Finished task: compare-row in {exec_time:.2f} seconds")
+            return
 
         log.debug(
             f"Preparing row comparison for: {econf_dict['ds_name_compressed_list']}"
         )
-        df_row_comp = perform_comparison(
+        row_data_list, decimal_scales = compact_dataframes(row_data_list, skip_columns)
+        df_row_comp = perform_chunked_comparison(
             ds_compressed_names=econf_dict["ds_name_compressed_list"],
             dataframes=row_data_list,
             on=primary_key,
             case_insensitive=self.case_insensitive,
+            memory_budget=get_memory_budget(self.memory_budget, self.project),
+        )
+        df_row_comp = restore_decimal_columns(
+            df_row_comp, decimal_scales, econf_dict["ds_name_compressed_list"]
         )
         log.debug(f"Prepared comparison for {df_row_comp.shape[0]} rows")
 
         log.debug(f"Writing comparison result into: {self.outfile_fqn}")
         # TODO: Remove it as it is already happening in perform_comparison
         # Moving key columns to the beginning
-        primary_key_lower = [k.lower() for k in primary_key]
         new_columns = primary_key_lower + [
             col.lower() for col in df_row_comp.columns if col not in primary_key_lower
         ]
         df_row_comp = df_row_comp[new_columns]
 
-        _ = create_dir_if_not_exist(self.outfile_fqn.parent)
-        with pd.ExcelWriter(
-            self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-        ) as writer:
-            df_row_comp.to_excel(writer, sheet_name="Row Comparison", index=False)
-
-        log.debug("Highlighting mismtach cells")
-        highlight_mismatch_cells(
-            excel_file=self.outfile_fqn,
-            sheet="Row Comparison",
-            num_ds=len(self.datasources),
-            skip_columns=primary_key_lower,
-        )
+        with get_output_session(
+            self.outfile_fqn, self.session, self.output_format
+        ) as session:
+            if self.long_format:
+                df_row_mismatch, df_row_summary = get_long_mismatch_frame(
+                    df=df_row_comp,
+                    ds_compressed_names=econf_dict["ds_name_compressed_list"],
+                    primary_key=primary_key_lower,
+                    tolerances=econf_dict["tolerances"],
+                )
+                log.debug(f"Found {df_row_mismatch.shape[0]} mismatched cells")
+                session.add_sheet("Row Mismatches", df_row_mismatch)
+                session.add_sheet("Row Mismatch Summary", df_row_summary)
+            else:
+                session.add_sheet(
+                    "Row Comparison",
+                    df_row_comp,
+                    ds_compressed_names=econf_dict["ds_name_compressed_list"],
+                    skip_columns=primary_key_lower,
+                    tolerances=econf_dict["tolerances"],
+                )
 
         exec_time = time.time() - start_time
         log.info(f"Finished task: compare-row in {exec_time:.2f} seconds")
@@ -388,20 +503,33 @@ class CompareColumnTask(BaseTask):
     outfile_fqn: Path
     composite: bool = DEFAULT_VALUES["compare_column_composite"]
     case_insensitive: bool = DEFAULT_VALUES["case_insensitive"]
+    summary_only: bool = DEFAULT_VALUES["summary_only"]
+    output_format: str = DEFAULT_VALUES["output_format"]
+    memory_budget: str = DEFAULT_VALUES["memory_budget"]
+    session: OutputSession = None
+    plans: Dict[str, DatasourcePlan] = None
 
     def execute(self):
         log.info("------------------------ Starting task: compare-column")
         start_time = time.time()
 
-        if len(self.datasources) != 2:
-            raise ValueError("Comparison works between two entities, not more, not less.")
+        if len(self.datasources) < 2:
+            raise ValueError("Column comparison needs at least two data sources.")
 
+        plans = get_datasource_plans(
+            self.profile, self.project, self.datasources, self.plans
+        )
         ds_compressed_names = []
         compare_columns = []
         column_df_list = []
+        column_types = []
+        connection_managers = []
+        data_containers = []
         for ds_name in self.datasources:
             log.info(f"Processing data source {ds_name}")
-            ds_compressed_names.append(ds_name.replace("_", ""))
+            plan = plans[ds_name]
+            ds_compressed_names.append(plan.ds_name_compressed)
+            # Compare columns can be injected into the project by CompareTask
             ds_config = self.project["datasources"][ds_name]
 
             if "compare_column" in ds_config:
@@ -415,56 +543,43 @@ class CompareColumnTask(BaseTask):
                     " in project config for column comparison"
                 )
 
-            dbtype = self.profile["profiles"][
-                extract_profile_name(self.project, ds_name)
-            ]["type"]
-            log.debug(f"Database type: {dbtype}")
-
-            log.debug(f"Acquiring connection to the database of: {ds_name}")
-            connection_profile = get_connection_profile(self.profile, ds_config)
-            conman = self.get_connection_manager(conn_profile=connection_profile)
-
-            if "query" in ds_config:
-                query = ds_config["query"]
-                log.debug(f"Executing query: {query}")
-                df = get_query_output_as_df(connection_manager=conman, query_text=query)
-            elif "table" in ds_config:
-                # MySQL doesn't have logical database
-                if "database" in ds_config and dbtype.lower() != "mysql":
-                    database = ds_config["database"]
-                elif dbtype.lower() == "bigquery":
-                    database = ds_config["project"]
-                else:
-                    database = None
+            log.debug(f"Database type: {plan.dbtype}")
+            conman = plan.connection_manager
+            connection_managers.append(conman)
 
-                if dbtype.lower() == "bigquery":
-                    schema = ds_config["dataset"]
-                else:
-                    schema = ds_config["schema"]
-
-                table = ds_config["table"]
-                table_fqn = get_table_fqn(database, schema, table)
-                log.debug(f"Table FQN: {table_fqn}")
-                query = get_column_query(table_fqn, columns)
-                try:
-                    log.debug(f"Trying unquoted column names: {columns}")
+            with phase("extract", datasource=ds_name):
+                if plan.query:
+                    query = plan.query
+                    data_containers.append(f"({query}) as tulona__")
                     log.debug(f"Executing query: {query}")
                     df = get_query_output_as_df(
-                        connection_manager=conman, query_text=query
+                        connection_manager=conman, query_text=query, bulk=True
                     )
-                except Exception as exc:
-                    log.warning(f"Failed with error: {exc}")
-                    log.debug(f'Trying quoted column names: "{columns}"')
-                    query = get_column_query(table_fqn, columns, quoted=True)
-                    log.debug(f"Executing query: {query}")
-                    df = get_query_output_as_df(
-                        connection_manager=conman, query_text=query
+                elif plan.table:
+                    table_fqn = plan.table_fqn
+                    data_containers.append(table_fqn)
+                    log.debug(f"Table FQN: {table_fqn}")
+                    try:
+                        log.debug(f"Trying unquoted column names: {columns}")
+                        df = get_table_output_as_df(
+                            connection_manager=conman,
+                            table_fqn=table_fqn,
+                            columns=columns,
+                        )
+                    except Exception as exc:
+                        log.warning(f"Failed with error: {exc}")
+                        log.debug(f'Trying quoted column names: "{columns}"')
+                        df = get_table_output_as_df(
+                            connection_manager=conman,
+                            table_fqn=table_fqn,
+                            columns=columns,
+                            quoted=True,
+                        )
+                else:
+                    raise TulonaMissingPropertyError(
+                        "Either 'table' or 'query' must be specified"
+                        "in datasource config for row comparison."
                     )
-            else:
-                raise TulonaMissingPropertyError(
-                    "Either 'table' or 'query' must be specified"
-                    "in datasource config for row comparison."
-                )
 
             if df.shape[0] == 0:
                 raise ValueError("Query didn't find any data")
@@ -473,6 +588,7 @@ class CompareColumnTask(BaseTask):
 
             df = df.rename(columns={c: c.lower() for c in df.columns})
             column_df_list.append(df)
+            column_types.append(plan.get_column_types())
 
         compare_columns = {
             tuple(map(lambda c: c.lower(), clist)) for clist in compare_columns
@@ -486,11 +602,51 @@ class CompareColumnTask(BaseTask):
             )
         compare_columns = compare_columns.pop()
         log.debug(f"Final list of columns for comparison: {compare_columns}")
+        column_df_list = normalize_dataframes(column_df_list, column_types)
+        # Compare columns are the join keys, compacting them makes the join cheaper
+        column_df_list, decimal_scales = compact_dataframes(column_df_list)
+
+        if self.summary_only:
+            column_groups = (
+                [list(compare_columns)]
+                if self.composite
+                else [[c] for c in compare_columns]
+            )
+            summary = {
+                "row_count": {
+                    ds: get_row_count(conman, container)
+                    for ds, conman, container in zip(
+                        ds_compressed_names, connection_managers, data_containers
+                    )
+                },
+                "keys": {
+                    "-".join(columns): get_key_presence_summary(
+                        dataframes=column_df_list,
+                        ds_compressed_names=ds_compressed_names,
+                        columns=columns,
+                        case_insensitive=self.case_insensitive,
+                    )
+                    for columns in column_groups
+                },
+            }
+            with get_output_session(
+                self.outfile_fqn, self.session, self.output_format
+            ) as session:
+                session.add_summary("compare_column", summary)
+
+            exec_time = time.time() - start_time
+            log.info(f"Finished task: compare-column in {exec_time:.2f} seconds")
+            return
+
+        memory_budget = get_memory_budget(self.memory_budget, self.project)
+
+        def get_mismatches(df_comp: pd.DataFrame) -> pd.DataFrame:
+            return get_presence_mismatches(df_comp, ds_compressed_names, "presence")
 
         output_dataframes = dict()
         if self.composite:
             log.debug(f"Performing composite comparison for: {compare_columns}")
-            df_comp = perform_comparison(
+            df_comp = perform_chunked_comparison(
                 ds_compressed_names=ds_compressed_names,
                 dataframes=column_df_list,
                 on=compare_columns,
@@ -498,60 +654,54 @@ class CompareColumnTask(BaseTask):
                 indicator="presence",
                 validate="one_to_one",
                 case_insensitive=self.case_insensitive,
-            )
-            df_comp = df_comp[df_comp["presence"] != "both"]
-            df_comp["presence"] = df_comp["presence"].map(
-                {
-                    "left_only": ds_compressed_names[0],
-                    "right_only": ds_compressed_names[1],
-                }
+                memory_budget=memory_budget,
+                reduce=get_mismatches,
             )
             log.debug(f"Found {df_comp.shape[0]} mismatches all sides combined")
-            output_dataframes["-".join(compare_columns)] = df_comp
+            output_dataframes["-".join(compare_columns)] = restore_decimal_columns(
+                df_comp, decimal_scales, ds_compressed_names
+            )
         else:
             for c in compare_columns:
                 log.debug(f"Performing comparison for: {c}")
                 column_df_list_unique = [
                     pd.DataFrame(df[c].drop_duplicates()) for df in column_df_list
                 ]
-                df_comp = perform_comparison(
+                df_comp = perform_chunked_comparison(
                     ds_compressed_names=ds_compressed_names,
                     dataframes=column_df_list_unique,
                     on=c,
                     how="outer",
                     indicator="presence",
                     validate="one_to_one",
-                )
-                df_comp = df_comp[df_comp["presence"] != "both"]
-                df_comp["presence"] = df_comp["presence"].map(
-                    {
-                        "left_only": ds_compressed_names[0],
-                        "right_only": ds_compressed_names[1],
-                    }
+                    memory_budget=memory_budget,
+                    reduce=get_mismatches,
                 )
                 log.debug(f"Found {df_comp.shape[0]} mismatches all sides combined")
-                output_dataframes[c] = df_comp
+                output_dataframes[c] = restore_decimal_columns(
+                    df_comp, decimal_scales, ds_compressed_names
+                )
 
         log.debug(f"Writing output into: {self.outfile_fqn}")
         _ = create_dir_if_not_exist(self.outfile_fqn.parent)
-        for sheet, df in output_dataframes.items():
-            if df.shape[0] > 1000:
-                csv_file = str(self.outfile_fqn).replace(".xlsx", ".csv")
-                log.warning(
-                    f"The dataframe for {sheet} has {df.shape[0]} rows."
-                    " Writing 100 sample rows per unique value from"
-                    " `presence` column into Excel file"
-                    f" and all rows into csv file: {csv_file}"
-                )
-                df.to_csv(csv_file, index=False)
-                df = get_sample_rows_for_each_value(
-                    df=df, n_per_value=100, column_name="presence"
-                )
-            with pd.ExcelWriter(
-                path=self.outfile_fqn,
-                mode="a" if os.path.exists(self.outfile_fqn) else "w",
-            ) as writer:
-                df.to_excel(writer, sheet_name=f"Col Comp- {sheet}", index=False)
+        with get_output_session(
+            self.outfile_fqn, self.session, self.output_format
+        ) as session:
+            for sheet, df in output_dataframes.items():
+                # Excel can't hold all the rows, columnar formats keep everything
+                if session.output_format == "xlsx" and df.shape[0] > 1000:
+                    csv_file = str(self.outfile_fqn).replace(".xlsx", ".csv")
+                    log.warning(
+                        f"The dataframe for {sheet} has {df.shape[0]} rows."
+                        " Writing 100 sample rows per unique value from"
+                        " `presence` column into Excel file"
+                        f" and all rows into csv file: {csv_file}"
+                    )
+                    df.to_csv(csv_file, index=False)
+                    df = get_sample_rows_for_each_value(
+                        df=df, n_per_value=100, column_name="presence"
+                    )
+                session.add_sheet(f"Col Comp- {sheet}", df)
 
         exec_time = time.time() - start_time
         log.info(f"Finished task: compare-column in {exec_time:.2f} seconds")
@@ -566,6 +716,12 @@ class CompareTask(BaseTask):
     sample_count: int = DEFAULT_VALUES["sample_count"]
     composite: bool = DEFAULT_VALUES["compare_column_composite"]
     case_insensitive: bool = DEFAULT_VALUES["case_insensitive"]
+    long_format: bool = DEFAULT_VALUES["long_format"]
+    summary_only: bool = DEFAULT_VALUES["summary_only"]
+    output_format: str = DEFAULT_VALUES["output_format"]
+    memory_budget: str = DEFAULT_VALUES["memory_budget"]
+    session: OutputSession = None
+    plans: Dict[str, DatasourcePlan] = None
 
     # Support for default values
     def __post_init__(self):
@@ -581,50 +737,99 @@ class CompareTask(BaseTask):
         log.info("------------------------ Starting task: compare")
         start_time = time.time()
 
-        # Metadata comparison
-        try:
-            ProfileTask(
-                profile=self.profile,
-                project=self.project,
-                datasources=self.datasources,
-                outfile_fqn=self.outfile_fqn,
-                compare=True,
-            ).execute()
-        except Exception:
-            log.error(f"Profiling failed with error: {traceback.format_exc()}")
+        # Datasources are resolved and connected once for all the phases
+        plans = get_datasource_plans(
+            self.profile, self.project, self.datasources, self.plans
+        )
 
         # Row comparison
-        primary_key = None
         cdt = CompareRowTask(
             profile=self.profile,
             project=self.project,
             datasources=self.datasources,
             outfile_fqn=self.outfile_fqn,
+            plans=plans,
             sample_count=self.sample_count,
             case_insensitive=self.case_insensitive,
+            long_format=self.long_format,
+            summary_only=self.summary_only,
+            memory_budget=self.memory_budget,
         )
+
+        # Column comparison needs the primary key, which comes from the config
+        # (not from row comparison results), so it's resolved upfront
+        primary_key = None
         try:
             primary_key = cdt.extract_confs()["primary_key"]
-            cdt.execute()
         except Exception:
             log.error(f"Row comparison failed with error: {traceback.format_exc()}")
 
-        # Column comparison
         project_copy = deepcopy(self.project)
         for ds in self.datasources:
             if "compare_column" not in project_copy["datasources"][ds] and primary_key:
                 project_copy["datasources"][ds]["compare_column"] = primary_key
-        try:
-            CompareColumnTask(
-                profile=self.profile,
-                project=project_copy,
-                datasources=self.datasources,
-                outfile_fqn=self.outfile_fqn,
-                composite=self.composite,
-                case_insensitive=self.case_insensitive,
-            ).execute()
-        except Exception:
-            log.error(f"Column comparison failed with error: {traceback.format_exc()}")
+        cct = CompareColumnTask(
+            profile=self.profile,
+            project=project_copy,
+            datasources=self.datasources,
+            outfile_fqn=self.outfile_fqn,
+            plans=plans,
+            composite=self.composite,
+            case_insensitive=self.case_insensitive,
+            summary_only=self.summary_only,
+            memory_budget=self.memory_budget,
+        )
+
+        # Metadata comparison, it's a workbook of its own so summary mode skips it
+        phases = []
+        if not self.summary_only:
+            phases.append(
+                (
+                    "Profiling",
+                    ProfileTask(
+                        profile=self.profile,
+                        project=self.project,
+                        datasources=self.datasources,
+                        outfile_fqn=self.outfile_fqn,
+                        plans=plans,
+                        compare=True,
+                    ),
+                )
+            )
+        if primary_key:
+            phases.append(("Row comparison", cdt))
+        phases.append(("Column comparison", cct))
+
+        # Phases are independent and wait on the databases most of the time, so
+        # they run concurrently. Each one collects its sheets into a session of
+        # its own, which are merged in a fixed order to keep the output stable.
+        phase_sessions = []
+        with ThreadPoolExecutor(
+            max_workers=len(phases), thread_name_prefix="tulona-compare"
+        ) as executor:
+            futures = []
+            for name, task in phases:
+                task.session = OutputSession(self.outfile_fqn, self.output_format)
+                phase_sessions.append(task.session)
+                ctx = contextvars.copy_context()
+                futures.append((name, executor.submit(ctx.run, task.execute)))
+
+            for name, future in futures:
+                exc = future.exception()
+                if exc is not None:
+                    log.error(
+                        f"{name} failed with error: "
+                        + "".join(
+                            traceback.format_exception(type(exc), exc, exc.__traceback__)
+                        )
+                    )
+
+        # All the phases write into the same file, which is written once at the end
+        with get_output_session(
+            self.outfile_fqn, self.session, self.output_format
+        ) as session:
+            for phase_session in phase_sessions:
+                session.merge(phase_session)
 
         exec_time = time.time() - start_time
         log.info(
@@ -0,0 +1,142 @@
+import logging
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from tulona.exceptions import TulonaInvalidConfigError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+SUCCESS = "success"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class TaskNode:
+    name: str
+    run: Callable[[], None]
+    depends_on: List[str] = field(default_factory=list)
+    # Connection profiles used by the task, capped by their `max_concurrency`
+    resources: List[str] = field(default_factory=list)
+
+
+def get_execution_order(nodes: List[TaskNode]) -> List[str]:
+    names = [n.name for n in nodes]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise TulonaInvalidConfigError(f"Task names must be unique: {sorted(duplicates)}")
+
+    for node in nodes:
+        missing = [d for d in node.depends_on if d not in names]
+        if missing:
+            raise TulonaInvalidConfigError(
+                f"Task {node.name} depends on unknown task[s]: {missing}"
+            )
+
+    # Kahn's algorithm, ties are broken by the order in task_config
+    in_degree = {n.name: len(set(n.depends_on)) for n in nodes}
+    order = []
+    ready = [n for n in names if in_degree[n] == 0]
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for node in nodes:
+            if name in node.depends_on:
+                in_degree[node.name] -= 1
+                if in_degree[node.name] == 0:
+                    ready.append(node.name)
+
+    if len(order) != len(nodes):
+        cycle = [n for n in names if n not in order]
+        raise TulonaInvalidConfigError(f"Task dependencies have a cycle among: {cycle}")
+    return order
+
+
+class DagScheduler:
+    def __init__(
+        self,
+        nodes: List[TaskNode],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        resource_limits: Optional[Dict[str, int]] = None,
+    ):
+        if max_workers < 1:
+            raise TulonaInvalidConfigError("Number of workers must be at least 1")
+        self.nodes = {n.name: n for n in nodes}
+        self.order = get_execution_order(nodes)
+        self.max_workers = max_workers
+        self.resource_limits = {k: v for k, v in (resource_limits or {}).items() if v}
+        self.resource_usage = {k: 0 for k in self.resource_limits}
+        self.status = {}
+
+    def get_dependents(self, name: str) -> List[str]:
+        dependents = []
+        for node_name in self.order:
+            node = self.nodes[node_name]
+            if name in node.depends_on or set(node.depends_on) & set(dependents):
+                dependents.append(node_name)
+        return dependents
+
+    def has_capacity(self, node: TaskNode) -> bool:
+        return all(
+            self.resource_usage[r] < self.resource_limits[r]
+            for r in set(node.resources)
+            if r in self.resource_limits
+        )
+
+    def update_usage(self, node: TaskNode, delta: int) -> None:
+        for r in set(node.resources):
+            if r in self.resource_limits:
+                self.resource_usage[r] += delta
+
+    def is_ready(self, node: TaskNode) -> bool:
+        return all(self.status.get(d) == SUCCESS for d in node.depends_on)
+
+    def run(self) -> Dict[str, str]:
+        pending = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tulona"
+        ) as executor:
+            while pending or running:
+                for name in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    node = self.nodes[name]
+                    if self.is_ready(node) and self.has_capacity(node):
+                        log.info(f"Starting task: {name}")
+                        self.update_usage(node, 1)
+                        running[executor.submit(node.run)] = name
+                        pending.remove(name)
+
+                if not running:
+                    # Can't happen for an acyclic graph, guards against a busy loop
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.update_usage(self.nodes[name], -1)
+                    exc = future.exception()
+                    if exc is None:
+                        log.info(f"Finished task: {name}")
+                        self.status[name] = SUCCESS
+                        continue
+
+                    log.error(
+                        f"Task {name} failed with error: "
+                        + "".join(
+                            traceback.format_exception(type(exc), exc, exc.__traceback__)
+                        )
+                    )
+                    self.status[name] = FAILED
+                    for dependent in self.get_dependents(name):
+                        if dependent in pending:
+                            log.warning(f"Skipping task {dependent} as {name} failed")
+                            pending.remove(dependent)
+                            self.status[dependent] = SKIPPED
+
+        return self.status
@@ -1,12 +1,20 @@
 import logging
-from typing import List, Optional, Tuple, Union
+from typing import Callable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from tulona.util.dataframe import KEY_COLUMN, KeyEncoding, get_memory_footprint
+from tulona.util.metrics import phase
+
 log = logging.getLogger(__name__)
 
+SOURCE_COLUMN = "tulona__source"
+PRESENT_COLUMN = "tulona__present"
+
 
 # TODO: common param to toggle comparison result for common vs all columns
+@phase("compare")
 def perform_comparison(
     ds_compressed_names: List[str],
     dataframes: List[pd.DataFrame],
@@ -26,35 +34,224 @@ def perform_comparison(
         colset = {c.lower() for c in df.columns.tolist()}
         common_columns = common_columns.intersection(colset)
     log.debug(f"Common columns: {common_columns}")
+    value_columns = sorted(common_columns - set(primary_key))
 
-    for ds_name, df in zip(ds_compressed_names, dataframes):
-        df = df[list(common_columns)]
-        df = df.rename(
-            columns={
-                c: f"{c}-{ds_name}" if c.lower() not in primary_key else c
-                for c in df.columns
-            }
-        )
-        if case_insensitive:
-            for k in primary_key:
-                if pd.api.types.is_string_dtype(df[k]):
-                    df[k] = df[k].str.lower()
+    # Sides are joined on the encoded key, key columns are attached afterwards
+    encoding = KeyEncoding(dataframes, primary_key, case_insensitive)
+    for df, key in zip(dataframes, encoding.keys):
+        df = df.reindex(columns=value_columns)
+        df.insert(0, KEY_COLUMN, key)
         dataframes_final.append(df)
 
-    df_merge = dataframes_final[0]
-    for df in dataframes_final[1:]:
+    if len(dataframes) > 2:
+        df_merge = perform_nway_comparison(
+            ds_compressed_names=ds_compressed_names,
+            dataframes=dataframes_final,
+            value_columns=value_columns,
+            how=how,
+            indicator=indicator,
+            validate=validate,
+        )
+    else:
+        left, right = [
+            df.rename(columns={c: f"{c}-{ds_name}" for c in value_columns}, copy=False)
+            for ds_name, df in zip(ds_compressed_names, dataframes_final)
+        ]
         df_merge = pd.merge(
-            left=df_merge,
-            right=df,
-            on=primary_key,
+            left=left,
+            right=right,
+            on=KEY_COLUMN,
             how=how,
             suffixes=suffixes,
             indicator=indicator,
             validate=validate,
         )
 
-    df_merge = df_merge[sorted(df_merge.columns.tolist())]
-    new_columns = primary_key + [col for col in df_merge if col not in primary_key]
+    key_values = encoding.get_values(df_merge[KEY_COLUMN].to_numpy())
+    for k in primary_key:
+        df_merge[k] = key_values[k].array
+    new_columns = primary_key + sorted(
+        col for col in df_merge if col not in primary_key and col != KEY_COLUMN
+    )
     df_merge = df_merge[new_columns]
 
     return df_merge
+
+
+def get_key_chunks(
+    dataframes: List[pd.DataFrame],
+    on: Union[str, List],
+    n_chunks: int,
+    case_insensitive: bool = False,
+) -> Iterator[List[pd.DataFrame]]:
+    # Rows are split by their encoded key, so a key lands in the same chunk on
+    # every side. Chunks are taken one at a time to keep a single copy around
+    on = [on] if isinstance(on, str) else on
+    keys = KeyEncoding(dataframes, [k.lower() for k in on], case_insensitive).keys
+    partitions = []
+    for key in keys:
+        chunk_ids = key % n_chunks
+        order = np.argsort(chunk_ids, kind="stable")
+        bounds = np.searchsorted(chunk_ids[order], np.arange(n_chunks + 1))
+        partitions.append((order, bounds))
+
+    for i in range(n_chunks):
+        chunk = []
+        for df, (order, bounds) in zip(dataframes, partitions):
+            start, end = bounds[i], bounds[i + 1]
+            chunk.append(df.iloc[order[start:end]])
+        # Chunks without keys on any side have nothing to compare
+        if any(df.shape[0] for df in chunk):
+            yield chunk
+
+
+def perform_chunked_comparison(
+    ds_compressed_names: List[str],
+    dataframes: List[pd.DataFrame],
+    on: Union[str, List],
+    how: str = "inner",
+    indicator: Union[bool, str] = False,
+    validate: Optional[str] = None,
+    case_insensitive: bool = False,
+    memory_budget: Optional[int] = None,
+    reduce: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    # Comparisons estimated to exceed the memory budget run chunk by chunk, reduce
+    # is applied to the result of every chunk before they are combined
+    footprint = get_memory_footprint(dataframes) if memory_budget else 0
+    n_chunks = 1
+    if memory_budget and footprint > memory_budget:
+        n_chunks = min(
+            int(np.ceil(footprint / memory_budget)),
+            max(df.shape[0] for df in dataframes),
+        )
+
+    kwargs = dict(
+        how=how, indicator=indicator, validate=validate, case_insensitive=case_insensitive
+    )
+    if n_chunks <= 1:
+        df_comp = perform_comparison(ds_compressed_names, dataframes, on, **kwargs)
+        return reduce(df_comp) if reduce else df_comp
+
+    log.info(
+        f"Estimated footprint of {footprint} bytes exceeds the memory budget of"
+        f" {memory_budget} bytes, comparing in {n_chunks} chunks"
+    )
+    results = []
+    for chunk in get_key_chunks(dataframes, on, n_chunks, case_insensitive):
+        df_comp = perform_comparison(ds_compressed_names, chunk, on, **kwargs)
+        results.append(reduce(df_comp) if reduce else df_comp)
+    # Empty results may carry different dtypes, they are left out unless all are
+    results = [df for df in results if df.shape[0]] or results[:1]
+    df_comp = pd.concat(results, ignore_index=True)
+    return restore_key_order(df_comp, dataframes, on, how, case_insensitive)
+
+
+def restore_key_order(
+    df_comp: pd.DataFrame,
+    dataframes: List[pd.DataFrame],
+    on: Union[str, List],
+    how: str = "inner",
+    case_insensitive: bool = False,
+) -> pd.DataFrame:
+    # Rows of chunked comparisons are put back in the order of an unchunked one:
+    # keys in the order of the joined sides for merges [left, then right only
+    # keys], ascending encoded keys for pivots of more than two sides
+    on = [on] if isinstance(on, str) else on
+    encoding = KeyEncoding(
+        dataframes + [df_comp], [k.lower() for k in on], case_insensitive
+    )
+    *keys, result_keys = encoding.keys
+    if len(dataframes) > 2:
+        rank = result_keys
+    else:
+        keys = keys[::-1] if how == "right" else keys
+        rank = pd.Index(pd.unique(np.concatenate(keys))).get_indexer(result_keys)
+    return df_comp.iloc[np.argsort(rank, kind="stable")].reset_index(drop=True)
+
+
+def get_presence_mismatches(
+    df_comp: pd.DataFrame, ds_compressed_names: List[str], indicator: str
+) -> pd.DataFrame:
+    # Keys missing from at least one datasource, labelled with the datasources
+    # holding them
+    if len(ds_compressed_names) > 2:
+        return df_comp[df_comp[indicator] != ", ".join(ds_compressed_names)]
+
+    df_comp = df_comp[df_comp[indicator] != "both"].copy()
+    df_comp[indicator] = df_comp[indicator].map(
+        {
+            "left_only": ds_compressed_names[0],
+            "right_only": ds_compressed_names[1],
+        }
+    )
+    return df_comp
+
+
+def get_presence_labels(
+    present: np.ndarray, ds_compressed_names: List[str]
+) -> np.ndarray:
+    # Every combination of sources is labelled once instead of every row
+    codes = present.astype(np.int64) @ (1 << np.arange(present.shape[1], dtype=np.int64))
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    labels = np.array(
+        [
+            ", ".join(ds for i, ds in enumerate(ds_compressed_names) if code >> i & 1)
+            for code in unique_codes
+        ],
+        dtype=object,
+    )
+    return labels[inverse]
+
+
+def perform_nway_comparison(
+    ds_compressed_names: List[str],
+    dataframes: List[pd.DataFrame],
+    value_columns: List[str],
+    how: str = "inner",
+    indicator: Union[bool, str] = False,
+    validate: Optional[str] = None,
+) -> pd.DataFrame:
+    # All sides are stacked with a source tag and pivoted once on the encoded key,
+    # so the cost grows linearly with the number of sources instead of chaining
+    # merges. The indicator column lists the sources holding the key
+    frames = []
+    dtypes = {}
+    for ds_name, df in zip(ds_compressed_names, dataframes):
+        if validate in ("one_to_one", "1:1") and df[KEY_COLUMN].duplicated().any():
+            raise pd.errors.MergeError(f"Key is not unique in {ds_name}")
+        dtypes.update({f"{c}-{ds_name}": df[c].dtype for c in value_columns})
+        frames.append(df.assign(**{SOURCE_COLUMN: ds_name, PRESENT_COLUMN: True}))
+
+    stacked = pd.concat(frames, ignore_index=True)
+    index_columns = [KEY_COLUMN, SOURCE_COLUMN]
+    duplicated = stacked.duplicated(index_columns).any()
+    if duplicated:
+        # Repeated keys are lined up by their occurrence within every source
+        stacked["tulona__occurrence"] = stacked.groupby(index_columns).cumcount()
+        index_columns.append("tulona__occurrence")
+    wide = stacked.set_index(index_columns).unstack(SOURCE_COLUMN)
+
+    present = wide[PRESENT_COLUMN].reindex(columns=ds_compressed_names).notna()
+    if how == "inner":
+        keep = present.all(axis=1).to_numpy()
+        wide = wide[keep]
+        present = present[keep]
+
+    df_comp = pd.DataFrame(index=wide.index)
+    for c in value_columns:
+        for ds_name in ds_compressed_names:
+            name = f"{c}-{ds_name}"
+            # Sources without any rows don't make it into the pivot
+            df_comp[name] = wide[(c, ds_name)] if (c, ds_name) in wide else np.nan
+            # Pivoting turns the columns of incomplete sources nullable
+            if df_comp[name].dtype != dtypes[name] and df_comp[name].notna().all():
+                df_comp[name] = df_comp[name].astype(dtypes[name])
+    if indicator:
+        indicator = "_merge" if indicator is True else indicator
+        df_comp[indicator] = get_presence_labels(present.to_numpy(), ds_compressed_names)
+
+    df_comp = df_comp.reset_index()
+    if duplicated:
+        df_comp = df_comp.drop(columns="tulona__occurrence")
+    return df_comp
@@ -0,0 +1,141 @@
+import json
+import logging
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Union
+
+import pandas as pd
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.task.base import BaseTask
+from tulona.util.filesystem import create_dir_if_not_exist
+from tulona.util.output import OutputSession
+from tulona.util.shard import find_manifests, resolve_manifest_paths, write_manifest
+
+log = logging.getLogger(__name__)
+
+DEFAULT_VALUES = {
+    "output_format": "xlsx",
+}
+
+
+def merge_manifests(manifests: List[Dict]) -> Dict:
+    shard_counts = {m["shard_count"] for m in manifests}
+    if len(shard_counts) > 1:
+        raise TulonaInvalidConfigError(
+            f"Cannot merge scans with different number of shards: {sorted(shard_counts)}"
+        )
+    datasources = {tuple(m["datasources"]) for m in manifests}
+    if len(datasources) > 1:
+        raise TulonaInvalidConfigError(
+            f"Cannot merge scans of different datasources: {sorted(datasources)}"
+        )
+
+    shard_count = shard_counts.pop()
+    shards = [m["shard"] for m in manifests]
+    duplicates = sorted({s for s in shards if shards.count(s) > 1})
+    if duplicates:
+        raise TulonaInvalidConfigError(
+            f"Found more than one result for shard[s]: {duplicates}"
+        )
+    missing = sorted(set(range(1, shard_count + 1)) - set(shards))
+    if missing:
+        log.warning(f"Results are missing for shard[s] {missing} of {shard_count}")
+
+    merged = {
+        "datasources": list(datasources.pop()),
+        "runids": [m["runid"] for m in sorted(manifests, key=lambda m: m["shard"])],
+        "shard_count": shard_count,
+        "missing_shards": missing,
+        "files": [],
+        "tables": [],
+    }
+    for m in sorted(manifests, key=lambda m: m["shard"]):
+        merged["files"].extend(f for f in m["files"] if f not in merged["files"])
+        merged["tables"].extend({**t, "shard": m["shard"]} for t in m["tables"])
+    merged["tables"] = sorted(merged["tables"], key=lambda t: (t["schemas"], t["table"]))
+    return merged
+
+
+def get_merged_summary(tables: List[Dict], base_dir: Union[Path, str]) -> pd.DataFrame:
+    rows = []
+    for t in tables:
+        row = {
+            "schemas": " vs ".join(t["schemas"]),
+            "table": t["table"],
+            "shard": t["shard"],
+        }
+        for f in t["files"]:
+            f = Path(base_dir, f)
+            if f.name.endswith("__summary.json") and f.exists():
+                with open(f) as sf:
+                    summary = json.load(sf)
+                # Per column statistics stay in the per table files
+                flat = pd.json_normalize(
+                    {
+                        section: {k: v for k, v in s.items() if k != "columns"}
+                        for section, s in summary.items()
+                    },
+                    sep=".",
+                )
+                row.update(flat.iloc[0].to_dict())
+        rows.append(row)
+    if not rows:
+        return pd.DataFrame(columns=["schemas", "table", "shard"])
+    return pd.DataFrame(rows)
+
+
+@dataclass
+class MergeResultsTask(BaseTask):
+    inputs: List[Union[Path, str]]
+    final_outdir: Union[Path, str]
+    output_format: str = DEFAULT_VALUES["output_format"]
+
+    def execute(self):
+        log.info("Starting task: merge-results")
+        start_time = time.time()
+
+        manifest_files = find_manifests(self.inputs)
+        if not manifest_files:
+            raise TulonaInvalidConfigError(f"No scan manifest found in: {self.inputs}")
+        log.debug(f"Merging scan manifests: {manifest_files}")
+        manifests = []
+        for mf in manifest_files:
+            with open(mf) as f:
+                # Recorded paths are relative to the manifest they are in
+                manifests.append(resolve_manifest_paths(json.load(f), mf))
+        merged = merge_manifests(manifests)
+
+        _ = create_dir_if_not_exist(self.final_outdir)
+
+        def copy(f: str) -> str:
+            dest = Path(self.final_outdir, Path(f).name)
+            if not Path(f).exists():
+                log.warning(f"Output file not found, skipping: {f}")
+            elif Path(f).absolute() != dest.absolute():
+                shutil.copy2(f, dest)
+            return dest.name
+
+        merged["files"] = [copy(f) for f in merged["files"]]
+        for t in merged["tables"]:
+            t["files"] = [copy(f) for f in t["files"]]
+
+        # Named apart from the shard manifests so it's not picked up by a later merge
+        manifest_fqn = Path(self.final_outdir, "merge_manifest.json")
+        log.debug(f"Writing merged scan manifest into: {manifest_fqn}")
+        write_manifest(merged, manifest_fqn)
+
+        summary_fqn = Path(self.final_outdir, "scan_summary.xlsx")
+        log.debug(f"Writing merged scan summary into: {summary_fqn}")
+        with OutputSession(summary_fqn, self.output_format) as session:
+            session.add_sheet(
+                "tables", get_merged_summary(merged["tables"], self.final_outdir)
+            )
+
+        exec_time = time.time() - start_time
+        log.info(
+            f"Finished task: merge-results of {len(manifests)} shard[s]"
+            f" in {exec_time:.2f} seconds"
+        )
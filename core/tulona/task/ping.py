@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from typing import Dict, List
 
 from tulona.task.base import BaseTask
+from tulona.util.metrics import phase
 from tulona.util.profiles import get_connection_profile
 
 log = logging.getLogger(__name__)
@@ -31,11 +32,14 @@ class PingTask(BaseTask):
                 f"Testing connection to data source: {ds}[{connection_profile['type']}]"
             )
             try:
-                conman = self.get_connection_manager(conn_profile=connection_profile)
-                with conman.engine.connect() as connection:
-                    results = connection.execute("select 1").fetchone()
-                    _ = results[0]
-                    log.info("Connection successful")
+                conman = self.get_connection_manager(
+                    conn_profile=connection_profile, datasource=ds
+                )
+                with phase("connect", datasource=ds):
+                    with conman.engine.connect() as connection:
+                        results = connection.execute("select 1").fetchone()
+                        _ = results[0]
+                log.info("Connection successful")
             except Exception:
                 log.error(f"Connection failed with error: {traceback.format_exc()}")
 
@@ -0,0 +1,179 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from tulona.adapter.connection import ConnectionManager
+from tulona.exceptions import TulonaMissingPrimaryKeyError
+from tulona.util.database import get_table_primary_keys
+from tulona.util.metrics import phase
+from tulona.util.normalize import get_column_types
+from tulona.util.profiles import extract_profile_name, get_connection_profile
+from tulona.util.sql import (
+    get_information_schema_query,
+    get_query_output_as_df,
+    get_table_fqn,
+)
+from tulona.util.tracing import span
+
+log = logging.getLogger(__name__)
+
+
+def get_table_location(
+    dbtype: str, ds_config: Dict
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    # MySQL doesn't have logical database
+    if "database" in ds_config and dbtype.lower() != "mysql":
+        database = ds_config["database"]
+    elif dbtype.lower() == "bigquery":
+        database = ds_config.get("project")
+    else:
+        database = None
+
+    if dbtype.lower() == "bigquery":
+        schema = ds_config.get("dataset")
+    else:
+        schema = ds_config.get("schema")
+
+    return database, schema, ds_config.get("table")
+
+
+# Everything a task needs to know about a datasource, resolved once and shared
+# by all the sub-tasks of a compare. Catalog lookups are memoized.
+@dataclass
+class DatasourcePlan:
+    ds_name: str
+    ds_config: Dict
+    dbtype: str
+    connection_manager: ConnectionManager
+    database: Optional[str] = None
+    schema: Optional[str] = None
+    table: Optional[str] = None
+    _cache: Dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def ds_name_compressed(self) -> str:
+        return self.ds_name.replace("_", "")
+
+    @property
+    def table_fqn(self) -> Optional[str]:
+        if not self.table:
+            return None
+        return get_table_fqn(self.database, self.schema, self.table)
+
+    @property
+    def query(self) -> Optional[str]:
+        return self.ds_config.get("query")
+
+    def get_primary_key(self) -> Tuple:
+        with self._lock:
+            if "primary_key" not in self._cache:
+                self._cache["primary_key"] = self._resolve_primary_key()
+            return self._cache["primary_key"]
+
+    def _resolve_primary_key(self) -> Tuple:
+        if "primary_key" in self.ds_config:
+            ds_pk = (
+                (self.ds_config["primary_key"],)
+                if isinstance(self.ds_config["primary_key"], str)
+                else tuple(sorted(self.ds_config["primary_key"]))
+            )
+            log.debug(f"Provided primary key for datasource {self.ds_name}: {ds_pk}")
+            return ds_pk
+
+        log.debug(
+            f"Primary key not provided for datasource {self.ds_name}."
+            " Tulona will try to extract it from table metadata"
+        )
+        ds_pk = ()
+        with phase("catalog", datasource=self.ds_name), span(
+            "sql",
+            kind="client",
+            **{
+                "db.system": self.dbtype,
+                "db.operation": "reflect primary key",
+                "db.sql.table": self.table_fqn,
+                "tulona.datasource": self.ds_name,
+            },
+        ):
+            if self.table:
+                ds_pk = tuple(
+                    get_table_primary_keys(
+                        self.connection_manager.engine, self.schema, self.table
+                    )
+                )
+        if not ds_pk:
+            raise TulonaMissingPrimaryKeyError(
+                "Primary key[s] is[are] not available"
+                f" for {self.table_fqn}[{self.ds_name}]. Abort!"
+            )
+        log.debug(f"Extracted primary key for datasource {self.ds_name}: {ds_pk}")
+        return ds_pk
+
+    def get_columns_metadata(self) -> pd.DataFrame:
+        with self._lock:
+            if "columns" not in self._cache:
+                query = get_information_schema_query(
+                    self.database, self.schema, self.table, "columns", self.dbtype
+                )
+                log.debug(f"Executing query: {query}")
+                with phase("catalog", datasource=self.ds_name):
+                    df = get_query_output_as_df(
+                        connection_manager=self.connection_manager, query_text=query
+                    )
+                self._cache["columns"] = df.rename(
+                    columns={c: c.lower() for c in df.columns}
+                )
+            # Callers are free to modify their copy
+            return self._cache["columns"].copy()
+
+    def get_column_types(self) -> Dict[str, Dict]:
+        # Catalog types drive value normalization, queries have no catalog entry
+        if not self.table:
+            return {}
+        try:
+            return get_column_types(self.get_columns_metadata())
+        except Exception as exc:
+            log.warning(f"Column types of {self.table_fqn} are not available: {exc}")
+            return {}
+
+
+def get_datasource_plan(profile: Dict, project: Dict, ds_name: str) -> DatasourcePlan:
+    log.debug(f"Planning datasource: {ds_name}")
+    ds_config = project["datasources"][ds_name]
+    dbtype = profile["profiles"][extract_profile_name(project, ds_name)]["type"]
+    database, schema, table = get_table_location(dbtype, ds_config)
+
+    log.debug(f"Acquiring connection to the database of: {ds_name}")
+    connection_manager = ConnectionManager(
+        get_connection_profile(profile, ds_config), datasource=ds_name
+    )
+    with phase("connect", datasource=ds_name):
+        connection_manager.get_engine()
+
+    return DatasourcePlan(
+        ds_name=ds_name,
+        ds_config=ds_config,
+        dbtype=dbtype,
+        connection_manager=connection_manager,
+        database=database,
+        schema=schema,
+        table=table,
+    )
+
+
+def get_datasource_plans(
+    profile: Dict,
+    project: Dict,
+    datasources: List[str],
+    plans: Optional[Dict[str, DatasourcePlan]] = None,
+) -> Dict[str, DatasourcePlan]:
+    # Plans handed down by a parent task are reused, missing ones are created
+    plans = plans if plans is not None else {}
+    for ds_name in datasources:
+        if ds_name not in plans:
+            plans[ds_name] = get_datasource_plan(profile, project, ds_name)
+    return plans
@@ -1,5 +1,4 @@
 import logging
-import os
 import time
 from dataclasses import _MISSING_TYPE, dataclass, fields
 from pathlib import Path
@@ -10,9 +9,9 @@ import pandas as pd
 from tulona.exceptions import TulonaMissingPropertyError
 from tulona.task.base import BaseTask
 from tulona.task.helper import perform_comparison
-from tulona.util.excel import highlight_mismatch_cells
-from tulona.util.filesystem import create_dir_if_not_exist
-from tulona.util.profiles import extract_profile_name, get_connection_profile
+from tulona.task.plan import DatasourcePlan, get_datasource_plans
+from tulona.util.metrics import phase
+from tulona.util.output import OutputSession, get_output_session
 from tulona.util.sql import (
     get_information_schema_query,
     get_metric_query,
@@ -23,6 +22,7 @@ from tulona.util.sql import (
 log = logging.getLogger(__name__)
 
 DEFAULT_VALUES = {
+    "output_format": "xlsx",
     "compare_profiles": False,
 }
 
@@ -34,6 +34,9 @@ class ProfileTask(BaseTask):
     datasources: List[str]
     outfile_fqn: Union[Path, str]
     compare: bool = DEFAULT_VALUES["compare_profiles"]
+    output_format: str = DEFAULT_VALUES["output_format"]
+    session: OutputSession = None
+    plans: Dict[str, DatasourcePlan] = None
 
     # Support for default values
     def __post_init__(self):
@@ -54,17 +57,16 @@ class ProfileTask(BaseTask):
         table_constraint_frames = []
         metric_frames = []
         ds_name_compressed_list = []
+        plans = get_datasource_plans(
+            self.profile, self.project, self.datasources, self.plans
+        )
         for ds_name in self.datasources:
             log.info(f"Profiling {ds_name}")
-            log.debug(f"Extracting configs for: {ds_name}")
-            ds_name_compressed = ds_name.replace("_", "")
-            ds_name_compressed_list.append(ds_name_compressed)
+            plan = plans[ds_name]
+            ds_name_compressed_list.append(plan.ds_name_compressed)
 
-            ds_config = self.project["datasources"][ds_name]
-
-            dbtype = self.profile["profiles"][
-                extract_profile_name(self.project, ds_name)
-            ]["type"]
+            ds_config = plan.ds_config
+            dbtype = plan.dbtype
 
             mandatory_properties = ["table"]
             mandatory_properties += ["dataset"] if dbtype == "bigquery" else ["schema"]
@@ -79,35 +81,12 @@ class ProfileTask(BaseTask):
                     f"Profiling requires {missing_properties}"
                 )
 
-            # MySQL doesn't have logical database
-            if "database" in ds_config and dbtype.lower() != "mysql":
-                database = ds_config["database"]
-            elif dbtype.lower() == "bigquery":
-                database = ds_config["project"]
-            else:
-                database = None
-
-            if dbtype.lower() == "bigquery":
-                schema = ds_config["dataset"]
-            else:
-                schema = ds_config["schema"]
-
-            table = ds_config["table"]
-
-            log.debug(f"Acquiring connection to the database of: {ds_name}")
-            connection_profile = get_connection_profile(self.profile, ds_config)
-            conman = self.get_connection_manager(conn_profile=connection_profile)
+            database, schema, table = plan.database, plan.schema, plan.table
+            conman = plan.connection_manager
 
             # Extract metadata
             log.debug("Extracting metadata")
-            meta_query = get_information_schema_query(
-                database, schema, table, "columns", dbtype
-            )
-            log.debug(f"Executing query: {meta_query}")
-            df_meta = get_query_output_as_df(
-                connection_manager=conman, query_text=meta_query
-            )
-            df_meta = df_meta.rename(columns={c: c.lower() for c in df_meta.columns})
+            df_meta = plan.get_columns_metadata()
             meta_frames.append(df_meta)
 
             # Extract table constraints
@@ -116,9 +95,10 @@ class ProfileTask(BaseTask):
                 database, schema, table, "table_constraints", dbtype
             )
             log.debug(f"Executing query: {table_constraint_query}")
-            df_tab_constraint = get_query_output_as_df(
-                connection_manager=conman, query_text=table_constraint_query
-            )
+            with phase("catalog", datasource=ds_name):
+                df_tab_constraint = get_query_output_as_df(
+                    connection_manager=conman, query_text=table_constraint_query
+                )
             df_tab_constraint = df_tab_constraint.rename(
                 columns={c: c.lower() for c in df_tab_constraint.columns}
             )
@@ -152,26 +132,29 @@ class ProfileTask(BaseTask):
             }
 
             # TODO: quote for columns should be a config option, not an arbitrary thing
-            try:
-                log.debug("Trying query with unquoted column names")
-                metric_query = get_metric_query(data_container, columns_dtype, metrics)
-                log.debug(f"Executing query: {metric_query}")
-                df_metric = get_query_output_as_df(
-                    connection_manager=conman, query_text=metric_query
-                )
-            except Exception as exc:
-                log.warning(f"Previous query failed with error: {exc}")
-                log.debug("Trying query with quoted column names")
-                metric_query = get_metric_query(
-                    data_container,
-                    columns_dtype,
-                    metrics,
-                    quoted=True,
-                )
-                log.debug(f"Executing query: {metric_query}")
-                df_metric = get_query_output_as_df(
-                    connection_manager=conman, query_text=metric_query
-                )
+            with phase("extract", datasource=ds_name):
+                try:
+                    log.debug("Trying query with unquoted column names")
+                    metric_query = get_metric_query(
+                        data_container, columns_dtype, metrics
+                    )
+                    log.debug(f"Executing query: {metric_query}")
+                    df_metric = get_query_output_as_df(
+                        connection_manager=conman, query_text=metric_query
+                    )
+                except Exception as exc:
+                    log.warning(f"Previous query failed with error: {exc}")
+                    log.debug("Trying query with quoted column names")
+                    metric_query = get_metric_query(
+                        data_container,
+                        columns_dtype,
+                        metrics,
+                        quoted=True,
+                    )
+                    log.debug(f"Executing query: {metric_query}")
+                    df_metric = get_query_output_as_df(
+                        connection_manager=conman, query_text=metric_query
+                    )
 
             metric_dict = {m: [] for m in ["column_name"] + metrics}
             for col in df_meta["column_name"]:
@@ -186,135 +169,96 @@ class ProfileTask(BaseTask):
 
             metric_frames.append(df_metric)
 
-        _ = create_dir_if_not_exist(Path(self.outfile_fqn).parent)
-        if self.compare:
-            # Metadata comparison
-            log.debug("Preparing metadata comparison")
-            df_meta_merge = perform_comparison(
-                ds_compressed_names=ds_name_compressed_list,
-                dataframes=meta_frames,
-                on="column_name",
-                how="outer",
-                case_insensitive=True,
-            )
-            log.debug(
-                f"Calculated metadata comparison for {df_meta_merge.shape[0]} columns"
-            )
-
-            log.debug(f"Writing results into file: {self.outfile_fqn}")
-            primary_key_col = df_meta_merge.pop("column_name")
-            df_meta_merge.insert(loc=0, column="column_name", value=primary_key_col)
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
-                df_meta_merge.to_excel(
-                    writer, sheet_name="Metadata Comparison", index=False
+        with get_output_session(
+            self.outfile_fqn, self.session, self.output_format
+        ) as session:
+            if self.compare:
+                # Metadata comparison
+                log.debug("Preparing metadata comparison")
+                df_meta_merge = perform_comparison(
+                    ds_compressed_names=ds_name_compressed_list,
+                    dataframes=meta_frames,
+                    on="column_name",
+                    how="outer",
+                    case_insensitive=True,
+                )
+                log.debug(
+                    f"Calculated metadata comparison for {df_meta_merge.shape[0]} columns"
                 )
 
-            log.debug("Highlighting mismtach cells")
-            highlight_mismatch_cells(
-                excel_file=self.outfile_fqn,
-                sheet="Metadata Comparison",
-                num_ds=len(ds_name_compressed_list),
-                skip_columns="column_name",
-            )
-
-            # Constraint comparison
-            log.debug("Preparing table constraint comparison")
-            df_tab_constr_merge = perform_comparison(
-                ds_compressed_names=ds_name_compressed_list,
-                dataframes=table_constraint_frames,
-                on="table_constraint",
-                how="outer",
-                case_insensitive=True,
-            )
-            log.debug(
-                "Calculated table constraint comparison for"
-                f"{df_tab_constr_merge.shape[0]} columns"
-            )
-
-            log.debug(f"Writing results into file: {self.outfile_fqn}")
-            primary_key_col = df_tab_constr_merge.pop("table_constraint")
-            df_tab_constr_merge.insert(
-                loc=0, column="table_constraint", value=primary_key_col
-            )
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
-                df_tab_constr_merge.to_excel(
-                    writer, sheet_name="Table Constraint Comparison", index=False
+                primary_key_col = df_meta_merge.pop("column_name")
+                df_meta_merge.insert(loc=0, column="column_name", value=primary_key_col)
+                session.add_sheet(
+                    "Metadata Comparison",
+                    df_meta_merge,
+                    ds_compressed_names=ds_name_compressed_list,
+                    skip_columns="column_name",
                 )
 
-            log.debug("Highlighting mismtach cells")
-            highlight_mismatch_cells(
-                excel_file=self.outfile_fqn,
-                sheet="Table Constraint Comparison",
-                num_ds=len(ds_name_compressed_list),
-                skip_columns="table_constraint",
-            )
+                # Constraint comparison
+                log.debug("Preparing table constraint comparison")
+                df_tab_constr_merge = perform_comparison(
+                    ds_compressed_names=ds_name_compressed_list,
+                    dataframes=table_constraint_frames,
+                    on="table_constraint",
+                    how="outer",
+                    case_insensitive=True,
+                )
+                log.debug(
+                    "Calculated table constraint comparison for"
+                    f"{df_tab_constr_merge.shape[0]} columns"
+                )
 
-            # Metric comparison
-            log.debug("Preparing metric comparison")
-            df_metric_merge = perform_comparison(
-                ds_compressed_names=ds_name_compressed_list,
-                dataframes=metric_frames,
-                how="outer",
-                on="column_name",
-                case_insensitive=True,
-            )
-            log.debug(
-                f"Calculated metric comparison for {df_metric_merge.shape[0]} columns"
-            )
+                primary_key_col = df_tab_constr_merge.pop("table_constraint")
+                df_tab_constr_merge.insert(
+                    loc=0, column="table_constraint", value=primary_key_col
+                )
+                session.add_sheet(
+                    "Table Constraint Comparison",
+                    df_tab_constr_merge,
+                    ds_compressed_names=ds_name_compressed_list,
+                    skip_columns="table_constraint",
+                )
 
-            log.debug(f"Writing results into file: {self.outfile_fqn}")
-            primary_key_col = df_metric_merge.pop("column_name")
-            df_metric_merge.insert(loc=0, column="column_name", value=primary_key_col)
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
-                df_metric_merge.to_excel(
-                    writer, sheet_name="Metric Comparison", index=False
+                # Metric comparison
+                log.debug("Preparing metric comparison")
+                df_metric_merge = perform_comparison(
+                    ds_compressed_names=ds_name_compressed_list,
+                    dataframes=metric_frames,
+                    how="outer",
+                    on="column_name",
+                    case_insensitive=True,
+                )
+                log.debug(
+                    f"Calculated metric comparison for {df_metric_merge.shape[0]} columns"
                 )
 
-            log.debug("Highlighting mismtach cells")
-            highlight_mismatch_cells(
-                excel_file=self.outfile_fqn,
-                sheet="Metric Comparison",
-                num_ds=len(ds_name_compressed_list),
-                skip_columns="column_name",
-            )
-        else:
-            # Metadata output
-            log.debug(f"Writing metadata into file: {self.outfile_fqn}")
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
+                primary_key_col = df_metric_merge.pop("column_name")
+                df_metric_merge.insert(loc=0, column="column_name", value=primary_key_col)
+                session.add_sheet(
+                    "Metric Comparison",
+                    df_metric_merge,
+                    ds_compressed_names=ds_name_compressed_list,
+                    skip_columns="column_name",
+                )
+            else:
+                # Metadata output
                 for ds_name, df in zip(ds_name_compressed_list, meta_frames):
                     primary_key_col = df.pop("column_name")
                     df.insert(loc=0, column="column_name", value=primary_key_col)
-                    df.to_excel(writer, sheet_name=f"{ds_name} Metadata", index=False)
+                    session.add_sheet(f"{ds_name} Metadata", df)
 
-            # Table constraint output
-            log.debug(f"Writing table constraints into file: {self.outfile_fqn}")
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
+                # Table constraint output
                 for ds_name, df in zip(ds_name_compressed_list, table_constraint_frames):
                     primary_key_col = df.pop("table_constraint")
                     df.insert(loc=0, column="table_constraint", value=primary_key_col)
-                    df.to_excel(
-                        writer, sheet_name=f"{ds_name} Tab Constraint", index=False
-                    )
+                    session.add_sheet(f"{ds_name} Tab Constraint", df)
 
-            # Metric output
-            log.debug(f"Writing metric into file: {self.outfile_fqn}")
-            with pd.ExcelWriter(
-                self.outfile_fqn, mode="a" if os.path.exists(self.outfile_fqn) else "w"
-            ) as writer:
+                # Metric output
                 for ds_name, df in zip(ds_name_compressed_list, metric_frames):
                     primary_key_col = df.pop("column_name")
                     df.insert(loc=0, column="column_name", value=primary_key_col)
-                    df.to_excel(writer, sheet_name=f"{ds_name} Metric", index=False)
+                    session.add_sheet(f"{ds_name} Metric", df)
 
         exec_time = time.time() - start_time
         log.info(f"Finished task: profile in {exec_time:.2f} seconds")
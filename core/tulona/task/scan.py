@@ -1,5 +1,4 @@
 import logging
-import os
 import time
 from copy import deepcopy
 from dataclasses import dataclass
@@ -10,18 +9,29 @@ from tulona.exceptions import TulonaUnSupportedTaskError
 from tulona.task.base import BaseTask
 from tulona.task.compare import CompareTask
 from tulona.task.helper import perform_comparison
-from tulona.util.excel import dataframes_into_excel
 from tulona.util.filesystem import create_dir_if_not_exist
+from tulona.util.metrics import phase
+from tulona.util.output import OutputSession
 from tulona.util.profiles import extract_profile_name, get_connection_profile
+from tulona.util.shard import (
+    get_manifest_fqn,
+    get_manifest_relpath,
+    get_shard_key,
+    in_shard,
+    parse_shard,
+    write_manifest,
+)
 from tulona.util.sql import get_query_output_as_df
 
 log = logging.getLogger(__name__)
 
 DEFAULT_VALUES = {
+    "output_format": "xlsx",
     "compare_scans": False,
     "sample_count": 20,
     "compare_column_composite": False,
     "case_insensitive": False,
+    "summary_only": False,
 }
 META_EXCLUSION = {
     "schemas": ["INFORMATION_SCHEMA", "PERFORMANCE_SCHEMA"],
@@ -38,12 +48,21 @@ class ScanTask(BaseTask):
     sample_count: int = DEFAULT_VALUES["sample_count"]
     composite: bool = DEFAULT_VALUES["compare_column_composite"]
     case_insensitive: bool = DEFAULT_VALUES["case_insensitive"]
+    summary_only: bool = DEFAULT_VALUES["summary_only"]
+    output_format: str = DEFAULT_VALUES["output_format"]
+    shard: str = None
+
+    def __post_init__(self):
+        self.shard_index, self.shard_count = parse_shard(self.shard)
 
     def execute(self):
         log.info(f"Starting task: scan{' --compare' if self.compare else ''}")
         log.debug(f"Full output directory: {self.final_outdir}")
         start_time = time.time()
 
+        if self.shard and not self.compare:
+            log.warning("Sharding only applies to scan --compare, it will be ignored")
+
         scan_result = {}
         ds_name_compressed_list = []
         connection_profile_names = []
@@ -76,7 +95,9 @@ class ScanTask(BaseTask):
             scan_result[ds_name]["dbtype"] = dbtype.lower()
 
             connection_profile = get_connection_profile(self.profile, ds_config)
-            conman = self.get_connection_manager(conn_profile=connection_profile)
+            conman = self.get_connection_manager(
+                conn_profile=connection_profile, datasource=ds_name
+            )
 
             # MySQL doesn't have logical database
             if "database" in ds_config and dbtype.lower() != "mysql":
@@ -124,9 +145,10 @@ class ScanTask(BaseTask):
                     )
                 """
             log.debug(f"Executing query: {schemata_query}")
-            dbextract_df = get_query_output_as_df(
-                connection_manager=conman, query_text=schemata_query
-            )
+            with phase("catalog", datasource=ds_name):
+                dbextract_df = get_query_output_as_df(
+                    connection_manager=conman, query_text=schemata_query
+                )
             log.debug(f"Number of schemas found: {dbextract_df.shape[0]}")
 
             dbextract_df = dbextract_df.rename(
@@ -139,11 +161,8 @@ class ScanTask(BaseTask):
                     self.final_outdir, f"scan_db__{database.replace('_', '')}.xlsx"
                 )
                 log.debug(f"Writing db scan result into: {dbscan_outfile_fqn}")
-                dataframes_into_excel(
-                    sheet_df_map={database: dbextract_df},
-                    outfile_fqn=dbscan_outfile_fqn,
-                    mode="a" if os.path.exists(dbscan_outfile_fqn) else "w",
-                )
+                with OutputSession(dbscan_outfile_fqn, self.output_format) as session:
+                    session.add_sheet(database, dbextract_df)
 
             scan_result[ds_name]["database"][database.lower()] = dbextract_df
 
@@ -161,9 +180,10 @@ class ScanTask(BaseTask):
                     and upper(table_schema) = '{schema.upper()}'
                 """
                 log.debug(f"Executing query: {tables_query}")
-                schemaextract_df = get_query_output_as_df(
-                    connection_manager=conman, query_text=tables_query
-                )
+                with phase("catalog", datasource=ds_name):
+                    schemaextract_df = get_query_output_as_df(
+                        connection_manager=conman, query_text=tables_query
+                    )
                 log.debug(f"Number of tables found: {schemaextract_df.shape[0]}")
                 schemaextract_df = schemaextract_df.rename(
                     columns={c: c.lower() for c in schemaextract_df.columns}
@@ -178,17 +198,24 @@ class ScanTask(BaseTask):
                     log.debug(
                         f"Writing schema scan result into: {schemascan_outfile_fqn}"
                     )
-                    dataframes_into_excel(
-                        sheet_df_map={schema: schemaextract_df},
-                        outfile_fqn=schemascan_outfile_fqn,
-                        mode="a" if os.path.exists(schemascan_outfile_fqn) else "w",
-                    )
+                    with OutputSession(
+                        schemascan_outfile_fqn, self.output_format
+                    ) as session:
+                        session.add_sheet(schema, schemaextract_df)
                 scan_result[ds_name]["schema"][
                     f"{database.lower()}.{schema.lower()}"
                 ] = schemaextract_df
 
         if self.compare:
             log.debug("Preparing metadata comparison")
+            manifest = {
+                "datasources": self.datasources,
+                "runid": self.project.get("runid"),
+                "shard": self.shard_index,
+                "shard_count": self.shard_count,
+                "files": [],
+                "tables": [],
+            }
 
             # Handle primary keys for table comparison
             table_primary_key = list(set(primary_keys))
@@ -238,12 +265,15 @@ class ScanTask(BaseTask):
             dbcomp_outfile_fqn = Path(
                 self.final_outdir, f"compare_db__{'_'.join(dbs_compressed)}.xlsx"
             )
-            log.debug(f"Writing db scan comparison result into: {dbcomp_outfile_fqn}")
-            dataframes_into_excel(
-                sheet_df_map={f"db_{'|'.join(databases)}": db_comp},
-                outfile_fqn=dbcomp_outfile_fqn,
-                mode="a" if os.path.exists(dbcomp_outfile_fqn) else "w",
-            )
+            # Database and schema comparisons are written by the first shard only
+            write_metadata = self.shard_index == 1
+            if write_metadata:
+                log.debug(f"Writing db scan comparison result into: {dbcomp_outfile_fqn}")
+                with OutputSession(dbcomp_outfile_fqn, self.output_format) as session:
+                    session.add_sheet(f"db_{'|'.join(databases)}", db_comp)
+                manifest["files"].append(
+                    get_manifest_relpath(dbcomp_outfile_fqn, self.final_outdir)
+                )
 
             # Compare schema extracts: list[list[Dict, Dict]]
             # [
@@ -323,20 +353,38 @@ class ScanTask(BaseTask):
                     self.final_outdir,
                     f"compare_schema__{'_'.join(schema_compressed)}.xlsx",
                 )
-                log.debug(
-                    f"Writing schema scan comparison result into: {schemacomp_outfile_fqn}"
-                )
-                dataframes_into_excel(
-                    sheet_df_map={"|".join(schema_compressed): schema_comp},
-                    outfile_fqn=schemacomp_outfile_fqn,
-                    mode="a" if os.path.exists(schemacomp_outfile_fqn) else "w",
-                )
+                if write_metadata:
+                    log.debug(
+                        "Writing schema scan comparison result into:"
+                        f" {schemacomp_outfile_fqn}"
+                    )
+                    with OutputSession(
+                        schemacomp_outfile_fqn, self.output_format
+                    ) as session:
+                        session.add_sheet("|".join(schema_compressed), schema_comp)
+                    manifest["files"].append(
+                        get_manifest_relpath(schemacomp_outfile_fqn, self.final_outdir)
+                    )
 
                 # Compare tables
                 common_tables = schema_comp[schema_comp["presence"] == "both"][
                     "table_name"
                 ].tolist()
                 log.debug(f"Number of common_tables found: {len(common_tables)}")
+                if self.shard_count > 1:
+                    common_tables = [
+                        t
+                        for t in common_tables
+                        if in_shard(
+                            get_shard_key(schema_fqns, t),
+                            self.shard_index,
+                            self.shard_count,
+                        )
+                    ]
+                    log.debug(
+                        f"Number of common_tables in shard {self.shard}:"
+                        f" {len(common_tables)}"
+                    )
 
                 dynamic_project_config = deepcopy(self.project)
                 dynamic_project_config["datasources"] = {}
@@ -386,8 +434,30 @@ class ScanTask(BaseTask):
                         sample_count=self.sample_count,
                         composite=self.composite,
                         case_insensitive=self.case_insensitive,
+                        summary_only=self.summary_only,
+                        output_format=self.output_format,
                     ).execute()
 
+                    manifest["tables"].append(
+                        {
+                            "schemas": schema_fqns,
+                            "table": table,
+                            # Including the csv files written next to the workbook
+                            "files": [
+                                get_manifest_relpath(f, self.final_outdir)
+                                for f in sorted(Path(self.final_outdir).iterdir())
+                                if f.stem == table_outfile_fqn.stem
+                                or f.name.startswith(f"{table_outfile_fqn.stem}__")
+                            ],
+                        }
+                    )
+
+            manifest_fqn = get_manifest_fqn(
+                self.final_outdir, self.shard_index, self.shard_count
+            )
+            log.debug(f"Writing scan manifest into: {manifest_fqn}")
+            write_manifest(manifest, manifest_fqn)
+
         exec_time = time.time() - start_time
         compare_flag = " --compare" if self.compare else ""
         log.info(f"Finished task: scan{compare_flag} in {exec_time:.2f} seconds")
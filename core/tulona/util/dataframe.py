@@ -1,12 +1,27 @@
 import logging
-from typing import List, Tuple, Union
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
-from tulona.exceptions import TulonaFundamentalError
+from tulona.exceptions import TulonaFundamentalError, TulonaInvalidConfigError
+from tulona.util.metrics import phase
 
 log = logging.getLogger(__name__)
 
+KEY_COLUMN = "tulona__key"
+
+# Strings with at most this share of distinct values are stored as categoricals
+CATEGORY_RATIO_THRESHOLD = 0.5
+# The merged frame and the intermediates of the join take roughly this many times
+# the memory of the sides being compared
+COMPARISON_MEMORY_FACTOR = 3
+MEMORY_UNITS = {"": 1, "k": 2**10, "m": 2**20, "g": 2**30, "t": 2**40}
+# Differences right at the tolerance aren't lost to float rounding errors
+TOLERANCE_SLACK = 1e-9
+
 
 def apply_column_exclusion(
     df: pd.DataFrame,
@@ -45,3 +60,455 @@ def get_sample_rows_for_each_value(
         df_list.append(df_uv.sample(n=min(df_uv.shape[0], n_per_value)))
     sample_df = pd.concat(df_list, axis=0)
     return sample_df
+
+
+def get_comparison_column_groups(
+    columns: List[str],
+    ds_compressed_names: List[str],
+    skip_columns: Union[str, Tuple[str], List[str], None] = None,
+) -> List[List[str]]:
+    # Columns produced by perform_comparison are named <column>-<datasource>
+    skip_columns = [skip_columns] if isinstance(skip_columns, str) else skip_columns
+    skip_columns = [c.lower() for c in skip_columns] if skip_columns else []
+
+    suffix = f"-{ds_compressed_names[0]}"
+    column_groups = []
+    for col in columns:
+        if not col.endswith(suffix) or col.lower() in skip_columns:
+            continue
+        base = col[: -len(suffix)]
+        group = [f"{base}-{ds}" for ds in ds_compressed_names]
+        if all(c in columns for c in group):
+            column_groups.append(group)
+    return column_groups
+
+
+def get_comparable_values(series: pd.Series) -> pd.Series:
+    # Decimals compare unequal to floats of the same value, compare them as floats
+    if series.dtype == object and pd.api.types.infer_dtype(series) == "decimal":
+        return series.astype(float)
+    return series
+
+
+def is_number_dtype(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(
+        series
+    )
+
+
+def get_equal_values(
+    left: pd.Series, right: pd.Series, tolerance: Optional[float] = None
+) -> np.ndarray:
+    # Missing values are equal to each other. With a tolerance, numbers and
+    # timestamps [tolerance in seconds] are equal when they are close enough
+    left_categorical = isinstance(left.dtype, pd.CategoricalDtype)
+    right_categorical = isinstance(right.dtype, pd.CategoricalDtype)
+    if (
+        left_categorical
+        and right_categorical
+        and left.cat.categories.equals(right.cat.categories)
+    ):
+        # Codes are comparable when the categories are, missing values are -1
+        return left.cat.codes.to_numpy() == right.cat.codes.to_numpy()
+    if left_categorical or right_categorical:
+        left, right = left.astype(object), right.astype(object)
+
+    left, right = get_comparable_values(left), get_comparable_values(right)
+    if (
+        tolerance
+        and pd.api.types.is_datetime64_any_dtype(left)
+        and pd.api.types.is_datetime64_any_dtype(right)
+    ):
+        equal = (left - right).abs() <= pd.Timedelta(seconds=tolerance)
+    elif tolerance and is_number_dtype(left) and is_number_dtype(right):
+        equal = (left - right).abs() <= tolerance * (1 + TOLERANCE_SLACK)
+    else:
+        equal = left == right
+    equal = equal.to_numpy(dtype=bool, na_value=False)
+    return equal | (left.isna() & right.isna()).to_numpy()
+
+
+def get_mismatch_mask(
+    df: pd.DataFrame,
+    ds_compressed_names: List[str],
+    skip_columns: Union[str, Tuple[str], List[str], None] = None,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> pd.DataFrame:
+    tolerances = tolerances or {}
+    suffix_len = len(ds_compressed_names[0]) + 1
+    mask = pd.DataFrame(False, index=df.index, columns=df.columns)
+    for group in get_comparison_column_groups(
+        df.columns.tolist(), ds_compressed_names, skip_columns
+    ):
+        tolerance = tolerances.get(group[0][:-suffix_len].lower())
+        mismatch = np.zeros(df.shape[0], dtype=bool)
+        for col in group[1:]:
+            mismatch |= ~get_equal_values(df[group[0]], df[col], tolerance)
+        for col in group:
+            mask[col] = mismatch
+    return mask
+
+
+@phase("compare")
+def get_long_mismatch_frame(
+    df: pd.DataFrame,
+    ds_compressed_names: List[str],
+    primary_key: Union[str, Tuple[str], List[str]],
+    tolerances: Optional[Dict[str, float]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # One row per differing cell: pk..., column, left_value, right_value
+    # along with a summary of mismatch counts per column. More than two
+    # datasources get a value-<datasource> column each instead
+    primary_key = [primary_key] if isinstance(primary_key, str) else list(primary_key)
+    mask = get_mismatch_mask(df, ds_compressed_names, primary_key, tolerances)
+    suffix_len = len(ds_compressed_names[0]) + 1
+    value_columns = (
+        ["left_value", "right_value"]
+        if len(ds_compressed_names) == 2
+        else [f"value-{ds}" for ds in ds_compressed_names]
+    )
+
+    positions = []
+    column_names = []
+    values = [[] for _ in value_columns]
+    summary = {"column": [], "mismatch_count": []}
+    for group in get_comparison_column_groups(
+        df.columns.tolist(), ds_compressed_names, primary_key
+    ):
+        column = group[0][:-suffix_len]
+        rows = np.flatnonzero(mask[group[0]].to_numpy())
+        summary["column"].append(column)
+        summary["mismatch_count"].append(len(rows))
+        if len(rows) == 0:
+            continue
+
+        positions.append(rows)
+        column_names.append(np.full(len(rows), column, dtype=object))
+        for side, col in zip(values, group):
+            side.append(df[col].to_numpy(dtype=object)[rows])
+
+    if positions:
+        positions = np.concatenate(positions)
+        # Keep the rows of the source frame together, in their original order
+        order = np.argsort(positions, kind="stable")
+        positions = positions[order]
+        df_long = df[primary_key].iloc[positions].reset_index(drop=True)
+        df_long["column"] = np.concatenate(column_names)[order]
+        for value_column, side in zip(value_columns, values):
+            df_long[value_column] = np.concatenate(side)[order]
+    else:
+        df_long = pd.DataFrame(columns=primary_key + ["column"] + value_columns)
+
+    df_summary = pd.DataFrame(summary)
+    df_summary["row_count"] = df.shape[0]
+    return df_long, df_summary
+
+
+def factorize_with_missing(values) -> Tuple[np.ndarray, pd.Index]:
+    # Missing keys match each other, like they do in merge
+    codes, uniques = pd.factorize(values)
+    missing = codes == -1
+    if missing.any():
+        codes[missing] = len(uniques)
+        uniques = uniques.insert(len(uniques), np.nan)
+    return codes.astype(np.int64), uniques
+
+
+def factorize_key_column(
+    values: List[pd.Series], case_insensitive: bool = False
+) -> Tuple[np.ndarray, pd.Index]:
+    # Values of all sides are factorized together, so codes are comparable across
+    # sides. Only the distinct values are lowercased for case insensitive keys
+    codes, uniques = factorize_with_missing(pd.concat(values, ignore_index=True))
+    if case_insensitive and isinstance(uniques.dtype, pd.CategoricalDtype):
+        # Compacted string keys are lowercased by their values
+        uniques = pd.Index(np.asarray(uniques), dtype=object)
+    if case_insensitive and pd.api.types.infer_dtype(uniques, skipna=True) == "string":
+        lowered_codes, uniques = factorize_with_missing(uniques.str.lower())
+        codes = lowered_codes[codes]
+    return codes, uniques
+
+
+class KeyEncoding:
+    # Every side's (composite) key is encoded into a single int64 column once, so
+    # joins, anti-joins and filters work on one integer instead of several object
+    # columns. Codes are exact, there are no collisions to check for
+    def __init__(
+        self,
+        dataframes: List[pd.DataFrame],
+        columns: List[str],
+        case_insensitive: bool = False,
+    ):
+        self.columns = columns
+        self.column_codes = []
+        self.uniques = []
+        self.passthrough = len(columns) == 1 and all(
+            pd.api.types.is_int64_dtype(df[columns[0]]) for df in dataframes
+        )
+        if self.passthrough:
+            # A single integer key is its own encoding
+            self.keys = [df[columns[0]].to_numpy() for df in dataframes]
+            return
+
+        combined = None
+        cardinality = 1
+        for col in columns:
+            codes, uniques = factorize_key_column(
+                [df[col] for df in dataframes], case_insensitive
+            )
+            self.column_codes.append(codes)
+            self.uniques.append(uniques)
+            if combined is None:
+                combined = codes
+            else:
+                # Codes are combined positionally, compacted first if they would overflow
+                if cardinality * len(uniques) >= 2**63:
+                    combined, combined_uniques = pd.factorize(combined)
+                    cardinality = len(combined_uniques)
+                combined = combined * len(uniques) + codes
+            cardinality *= len(uniques)
+
+        self.stacked_keys = combined
+        self.keys = np.split(combined, np.cumsum([len(df) for df in dataframes])[:-1])
+
+    def get_values(self, keys: np.ndarray) -> pd.DataFrame:
+        # Key columns of the encoded keys, taken from the first row holding them
+        if self.passthrough:
+            return pd.DataFrame({self.columns[0]: keys})
+        first = np.flatnonzero(~pd.Series(self.stacked_keys).duplicated().to_numpy())
+        positions = first[pd.Index(self.stacked_keys[first]).get_indexer(keys)]
+        return pd.DataFrame(
+            {
+                col: uniques.take(codes[positions])
+                for col, codes, uniques in zip(
+                    self.columns, self.column_codes, self.uniques
+                )
+            }
+        )
+
+
+@phase("compare")
+def get_key_presence_summary(
+    dataframes: List[pd.DataFrame],
+    ds_compressed_names: List[str],
+    columns: Union[str, Tuple[str], List[str]],
+    case_insensitive: bool = False,
+) -> Dict:
+    # Key set arithmetic only, the presence frame is never built
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    keys = KeyEncoding(dataframes, columns, case_insensitive).keys
+    key_sets = [pd.Index(key).unique() for key in keys]
+
+    common = key_sets[0]
+    for keys in key_sets[1:]:
+        common = common.intersection(keys)
+
+    return {
+        "distinct_count": {
+            ds: int(len(keys)) for ds, keys in zip(ds_compressed_names, key_sets)
+        },
+        "common_count": int(len(common)),
+        "only_in": {
+            ds: int(len(keys) - len(common))
+            for ds, keys in zip(ds_compressed_names, key_sets)
+        },
+    }
+
+
+@phase("compare")
+def get_row_comparison_summary(
+    dataframes: List[pd.DataFrame],
+    ds_compressed_names: List[str],
+    primary_key: Union[str, Tuple[str], List[str]],
+    case_insensitive: bool = False,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict, pd.DataFrame]:
+    # Frames are aligned on the primary key and compared column by column,
+    # without building the side by side comparison frame
+    primary_key = [primary_key] if isinstance(primary_key, str) else list(primary_key)
+    primary_key = [k.lower() for k in primary_key]
+
+    common_columns = [c for c in dataframes[0].columns if c not in primary_key]
+    for df in dataframes[1:]:
+        common_columns = [c for c in common_columns if c in df.columns]
+
+    keys = KeyEncoding(dataframes, primary_key, case_insensitive).keys
+    indexed = []
+    for df, key in zip(dataframes, keys):
+        df = df[common_columns].set_index(pd.Index(key))
+        indexed.append(df[~df.index.duplicated()])
+
+    common_keys = indexed[0].index
+    for df in indexed[1:]:
+        common_keys = common_keys.intersection(df.index)
+    aligned = [df.loc[common_keys] for df in indexed]
+
+    tolerances = tolerances or {}
+    column_stats = {"column": [], "mismatch_count": [], "mismatch_rate": []}
+    row_mismatch = np.zeros(len(common_keys), dtype=bool)
+    for col in common_columns:
+        mismatch = np.zeros(len(common_keys), dtype=bool)
+        for df in aligned[1:]:
+            mismatch |= ~get_equal_values(
+                aligned[0][col], df[col], tolerances.get(col.lower())
+            )
+        row_mismatch |= mismatch
+
+        mismatch_count = int(mismatch.sum())
+        column_stats["column"].append(col)
+        column_stats["mismatch_count"].append(mismatch_count)
+        column_stats["mismatch_rate"].append(
+            mismatch_count / len(common_keys) if len(common_keys) else 0.0
+        )
+
+    summary = {
+        "rows_compared": int(len(common_keys)),
+        "rows_matched": int(len(common_keys) - row_mismatch.sum()),
+        "rows_mismatched": int(row_mismatch.sum()),
+        "only_in": {
+            ds: int(len(df.index.difference(common_keys)))
+            for ds, df in zip(ds_compressed_names, indexed)
+        },
+    }
+    return summary, pd.DataFrame(column_stats)
+
+
+def parse_memory_size(value: Union[str, int, None]) -> Optional[int]:
+    # Sizes like 512MB, 2G or a plain number of bytes
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", str(value).lower())
+    if not match:
+        raise TulonaInvalidConfigError(
+            f"Invalid memory size: {value}, expected a size like 512MB or 2GB"
+        )
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
+def get_memory_footprint(dataframes: List[pd.DataFrame]) -> int:
+    # Estimated peak memory of comparing the frames. Shallow, object values
+    # aren't measured one by one
+    return COMPARISON_MEMORY_FACTOR * int(
+        sum(df.memory_usage(deep=False).sum() for df in dataframes)
+    )
+
+
+def get_integer_dtype(columns: List[pd.Series]) -> Optional[np.dtype]:
+    # Smallest integer type holding the values of all sides
+    if not any(len(s) for s in columns):
+        return None
+    low = min(s.min() for s in columns if len(s))
+    high = max(s.max() for s in columns if len(s))
+    for dtype in [np.int8, np.int16, np.int32]:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return None
+
+
+def is_float32_lossless(columns: List[pd.Series]) -> bool:
+    for s in columns:
+        values = s.to_numpy()
+        if not np.array_equal(
+            values.astype(np.float32).astype(np.float64), values, equal_nan=True
+        ):
+            return False
+    return True
+
+
+def scale_decimal_columns(
+    columns: List[pd.Series],
+) -> Tuple[Optional[List[pd.Series]], Optional[int]]:
+    # Decimals of all sides are scaled by the same number of fractional digits, if
+    # the scaled values fit int64. Only the distinct values are converted
+    codes, uniques = pd.factorize(pd.concat(columns, ignore_index=True))
+    scale = 0
+    for value in uniques:
+        if not value.is_finite():
+            return None, None
+        scale = max(scale, -value.as_tuple().exponent)
+
+    scaled = [int(value.scaleb(scale)) for value in uniques]
+    if any(abs(value) >= 2**63 for value in scaled):
+        return None, None
+    values = pd.array(scaled + [None], dtype="Int64").take(codes)
+
+    scaled_columns = []
+    for s, end in zip(columns, np.cumsum([len(s) for s in columns])):
+        start = end - len(s)
+        scaled_columns.append(pd.Series(values[start:end], index=s.index, name=s.name))
+    return scaled_columns, scale
+
+
+def restore_decimal_values(series: pd.Series, scale: int) -> pd.Series:
+    codes, uniques = pd.factorize(series)
+    values = np.array(
+        [Decimal(int(value)).scaleb(-scale) for value in uniques] + [None], dtype=object
+    )
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def restore_decimal_columns(
+    df: pd.DataFrame, decimal_scales: Dict[str, int], ds_compressed_names: List[str]
+) -> pd.DataFrame:
+    # Comparison frames hold the scaled decimals as <column>-<datasource>
+    for col, scale in decimal_scales.items():
+        for name in [f"{col}-{ds}" for ds in ds_compressed_names] + [col]:
+            if name in df.columns:
+                df[name] = restore_decimal_values(df[name], scale)
+    return df
+
+
+@phase("compact")
+def compact_dataframes(
+    dataframes: List[pd.DataFrame],
+    skip_columns: Union[str, Tuple[str], List[str], None] = None,
+) -> Tuple[List[pd.DataFrame], Dict[str, int]]:
+    # Columns present on all sides are compacted to the same dtype on every side,
+    # so values stay comparable. Decimals turn into integers scaled by a common
+    # number of fractional digits, which are returned to restore them later
+    skip_columns = [skip_columns] if isinstance(skip_columns, str) else skip_columns
+    skip_columns = set(skip_columns or [])
+    columns = [
+        c
+        for c in dataframes[0].columns
+        if c not in skip_columns and all(c in df.columns for df in dataframes[1:])
+    ]
+
+    compacted = {}
+    decimal_scales = {}
+    for col in columns:
+        sides = [df[col] for df in dataframes]
+        dtypes = {s.dtype for s in sides}
+        if len(dtypes) > 1:
+            continue
+        dtype = dtypes.pop()
+
+        if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+            target = get_integer_dtype(sides)
+            if target is not None and target.itemsize < dtype.itemsize:
+                compacted[col] = [s.astype(target) for s in sides]
+        elif dtype == np.float64:
+            if is_float32_lossless(sides):
+                compacted[col] = [s.astype(np.float32) for s in sides]
+        elif pd.api.types.is_object_dtype(dtype):
+            kinds = {pd.api.types.infer_dtype(s, skipna=True) for s in sides}
+            kinds.discard("empty")
+            if kinds == {"decimal"}:
+                scaled_sides, scale = scale_decimal_columns(sides)
+                if scaled_sides is not None:
+                    compacted[col] = scaled_sides
+                    decimal_scales[col] = scale
+            elif kinds == {"string"}:
+                uniques = pd.unique(pd.concat([s.dropna() for s in sides]))
+                row_count = sum(len(s) for s in sides)
+                if row_count and len(uniques) <= CATEGORY_RATIO_THRESHOLD * row_count:
+                    category = pd.CategoricalDtype(uniques)
+                    compacted[col] = [s.astype(category) for s in sides]
+
+    if compacted:
+        dataframes = [
+            df.assign(**{col: sides[i] for col, sides in compacted.items()})
+            for i, df in enumerate(dataframes)
+        ]
+        log.debug(f"Compacted columns: {list(compacted)}")
+    return dataframes, decimal_scales
@@ -1,92 +1,161 @@
-from pathlib import Path
-from typing import Dict, List, Tuple, Union
+import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook, styles
+from openpyxl import Workbook, styles
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Border, Side
 from openpyxl.worksheet.worksheet import Worksheet
 
-
-def get_column_index(sheet: Worksheet, column: str):
-    for row in sheet.iter_rows(min_row=1, max_row=1, values_only=True):
-        for idx, cell_value in enumerate(row, 1):
-            if cell_value == column:
-                return idx
-    raise ValueError(f"Column {column} could not be found in the Excel sheet.")
-
-
-# TODO: Testable function - it should take WorkBook as input instead of excel_file and return WorkBook
-# instead of saving the file
-def highlight_mismatch_cells(  # pargma: no cover
-    excel_file,
-    sheet: str,
-    num_ds: int,
+from tulona.util.dataframe import get_comparison_column_groups, get_mismatch_mask
+from tulona.util.metrics import phase
+
+HIGHLIGHT_FILL = styles.PatternFill(
+    start_color="FFFFFF00", end_color="FFFFFF00", fill_type="solid"
+)
+
+LEFT_BORDER = Border(
+    left=Side(border_style="thin"),
+    right=Side(border_style="dotted"),
+    top=Side(border_style="thin"),
+    bottom=Side(border_style="thin"),
+)
+
+MIDDLE_BORDER = Border(
+    left=Side(border_style="dotted"),
+    right=Side(border_style="dotted"),
+    top=Side(border_style="thin"),
+    bottom=Side(border_style="thin"),
+)
+
+RIGHT_BORDER = Border(
+    left=Side(border_style="dotted"),
+    right=Side(border_style="thin"),
+    top=Side(border_style="thin"),
+    bottom=Side(border_style="thin"),
+)
+
+HEADER_FONT = styles.Font(bold=True)
+HEADER_BORDER = Border(
+    left=Side(border_style="thin"),
+    right=Side(border_style="thin"),
+    top=Side(border_style="thin"),
+    bottom=Side(border_style="thin"),
+)
+HEADER_ALIGNMENT = styles.Alignment(horizontal="center", vertical="top")
+
+# Types openpyxl can write as they are, anything else is written as string
+CELL_TYPES = (
+    str,
+    bool,
+    int,
+    float,
+    Decimal,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+)
+
+
+def get_group_borders(
+    columns: List[str],
+    ds_compressed_names: List[str],
+    skip_columns: Union[str, Tuple[str], List[str]] = None,
+) -> Dict[str, Border]:
+    borders = {}
+    for group in get_comparison_column_groups(columns, ds_compressed_names, skip_columns):
+        for i, col in enumerate(group):
+            if i == 0:
+                borders[col] = LEFT_BORDER
+            elif i == len(group) - 1:
+                borders[col] = RIGHT_BORDER
+            else:
+                borders[col] = MIDDLE_BORDER
+    return borders
+
+
+@phase("highlight")
+def highlight_mismatch_cells(
+    worksheet: Worksheet,
+    df: pd.DataFrame,
+    ds_compressed_names: List[str],
+    skip_columns: Union[str, Tuple[str], List[str]] = None,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> None:
+    # Styles the worksheet while it's still held by the writer, only mismatched
+    # cells are touched and the workbook doesn't have to be loaded again
+    mask = get_mismatch_mask(df, ds_compressed_names, skip_columns, tolerances)
+    column_positions = {c: i + 1 for i, c in enumerate(df.columns)}
+
+    borders = get_group_borders(df.columns.tolist(), ds_compressed_names, skip_columns)
+    for col, border in borders.items():
+        # First row is the header
+        mismatch_rows = np.flatnonzero(mask[col].to_numpy()) + 2
+        for row in mismatch_rows:
+            cell = worksheet.cell(row=int(row), column=column_positions[col])
+            cell.fill = HIGHLIGHT_FILL
+            cell.border = border
+
+
+def get_cell_value(value):
+    if value is None:
+        return None
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if isinstance(value, np.datetime64):
+        return pd.Timestamp(value).to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, CELL_TYPES):
+        return value
+    return str(value)
+
+
+def write_dataframe_sheet(
+    workbook: Workbook,
+    sheet_name: str,
+    df: pd.DataFrame,
+    ds_compressed_names: List[str] = None,
     skip_columns: Union[str, Tuple[str], List[str]] = None,
-):
-    wb = load_workbook(excel_file)
-    ws = wb[sheet]
-
-    yellow_fill = styles.PatternFill(
-        start_color="FFFFFF00", end_color="FFFFFF00", fill_type="solid"
-    )
-
-    left_border = Border(
-        left=Side(border_style="thin"),
-        right=Side(border_style="dotted"),
-        top=Side(border_style="thin"),
-        bottom=Side(border_style="thin"),
-    )
-
-    middle_border = Border(
-        left=Side(border_style="dotted"),
-        right=Side(border_style="dotted"),
-        top=Side(border_style="thin"),
-        bottom=Side(border_style="thin"),
-    )
-
-    right_border = Border(
-        left=Side(border_style="dotted"),
-        right=Side(border_style="thin"),
-        top=Side(border_style="thin"),
-        bottom=Side(border_style="thin"),
-    )
-
-    if skip_columns:
-        skip_columns = (
-            skip_columns
-            if isinstance(skip_columns, list) or isinstance(skip_columns, tuple)
-            else [skip_columns]
-        )
-        skip_idxs = [get_column_index(ws, c.lower()) - 1 for c in skip_columns]
-        compareable_col_idxs = list(set(range(ws.max_column)) - set(skip_idxs))
-    else:
-        compareable_col_idxs = list(range(ws.max_column))
-
-    for row in ws.iter_rows(
-        min_row=2, min_col=0, max_row=ws.max_row, max_col=ws.max_column
-    ):
-        for col_idx in compareable_col_idxs[::num_ds]:
-            equal = []
-            for i in range(num_ds - 1):
-                equal.append(row[col_idx + i].value == row[col_idx + i + 1].value)
-
-            if not all(equal):
-                for i in range(num_ds):
-                    row[col_idx + i].fill = yellow_fill
-
-                    if i == 0:
-                        row[col_idx].border = left_border
-                    elif i == num_ds - 1:
-                        row[col_idx + i].border = right_border
-                    else:
-                        row[col_idx + i].border = middle_border
-
-    wb.save(excel_file)
-
-
-def dataframes_into_excel(  # pargma: no cover
-    sheet_df_map: Dict, outfile_fqn: Union[Path, str], mode: str
+    tolerances: Optional[Dict[str, float]] = None,
 ) -> None:
-    with pd.ExcelWriter(outfile_fqn, mode=mode) as writer:
-        for sheet, df in sheet_df_map.items():
-            df.to_excel(writer, sheet_name=sheet, index=False)
+    # Rows are streamed into a write-only workbook, so mismatch styling is
+    # attached to the cells as they are created instead of afterwards
+    worksheet = workbook.create_sheet(title=sheet_name)
+
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(worksheet, value=str(col))
+        cell.font = HEADER_FONT
+        cell.border = HEADER_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+        header.append(cell)
+    worksheet.append(header)
+
+    borders = {}
+    mask = None
+    if ds_compressed_names:
+        with phase("highlight"):
+            borders = get_group_borders(
+                df.columns.tolist(), ds_compressed_names, skip_columns
+            )
+            mask = get_mismatch_mask(
+                df, ds_compressed_names, skip_columns, tolerances
+            ).to_numpy()
+    positions = [(i, borders[c]) for i, c in enumerate(df.columns) if c in borders]
+
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None)):
+        values = [get_cell_value(v) for v in row]
+        if mask is None or not mask[row_idx].any():
+            worksheet.append(values)
+            continue
+
+        for i, border in positions:
+            if mask[row_idx, i]:
+                cell = WriteOnlyCell(worksheet, value=values[i])
+                cell.fill = HIGHLIGHT_FILL
+                cell.border = border
+                values[i] = cell
+        worksheet.append(values)
@@ -37,6 +37,11 @@ def get_runid():
     return runid
 
 
+def get_run_outdir(base_dir: str, runid: str) -> Path:
+    # Run level artifacts (metrics, profiles etc.) live next to the task outputs
+    return Path(base_dir, runid)
+
+
 def get_task_outdir(base_dir: str, runid: str, ds_list: list) -> Path:
     final_outdir = Path(base_dir, "_".join(ds_list), runid)
     return final_outdir
@@ -46,7 +51,7 @@ def get_task_outfile(task_conf: Dict) -> str:
     task = task_conf["task"].replace("-", "_")
     extra_params = []
     for p in task_conf:
-        if p not in ["task", "datasources"]:
+        if p not in ["task", "datasources", "output_format", "name", "depends_on"]:
             if isinstance(task_conf[p], int):
                 extra_params.extend([p.replace("_", ""), str(task_conf[p])])
             else:
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from tulona.util.profiling import memory_tracker
+from tulona.util.tracing import span
+
+log = logging.getLogger(__name__)
+
+# Labels of the running task/datasource/phase, propagated to threads with copy_context
+_task: ContextVar[Optional[str]] = ContextVar("tulona_metrics_task", default=None)
+_datasource: ContextVar[Optional[str]] = ContextVar(
+    "tulona_metrics_datasource", default=None
+)
+_record: ContextVar[Optional[Dict]] = ContextVar("tulona_metrics_record", default=None)
+_collector: ContextVar[Optional["MetricsCollector"]] = ContextVar(
+    "tulona_metrics_collector", default=None
+)
+
+
+class MetricsCollector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records: List[Dict] = []
+
+    def add(self, record: Dict) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records = []
+
+    def get_records(self) -> List[Dict]:
+        with self._lock:
+            return list(self.records)
+
+    def get_summary(self) -> List[Dict]:
+        # Aggregated by task, datasource and phase in the order first seen
+        summary = {}
+        for r in self.get_records():
+            key = (r["task"], r["datasource"], r["phase"])
+            if key not in summary:
+                summary[key] = {
+                    "task": r["task"],
+                    "datasource": r["datasource"],
+                    "phase": r["phase"],
+                    "count": 0,
+                    "seconds": 0.0,
+                    "rows": 0,
+                    "bytes": 0,
+                }
+            agg = summary[key]
+            agg["count"] += 1
+            agg["seconds"] += r["seconds"]
+            agg["rows"] += r["rows"]
+            agg["bytes"] += r["bytes"]
+        return list(summary.values())
+
+    def write_json(self, path: Union[str, Path], **extra) -> None:
+        log.debug(f"Writing metrics into: {path}")
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {**extra, "summary": self.get_summary(), "phases": self.get_records()},
+                f,
+                indent=2,
+                default=str,
+            )
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        log.debug(f"Writing metrics into prometheus textfile: {path}")
+        lines = []
+        for name, field, help_text in [
+            ("tulona_phase_seconds_total", "seconds", "Time spent in the phase"),
+            ("tulona_phase_rows_total", "rows", "Rows extracted in the phase"),
+            ("tulona_phase_bytes_total", "bytes", "Bytes extracted in the phase"),
+            ("tulona_phase_count_total", "count", "Number of times the phase ran"),
+        ]:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for agg in self.get_summary():
+                labels = ",".join(
+                    f'{k}="{str(agg[k] or "").replace(chr(34), "")}"'
+                    for k in ["task", "datasource", "phase"]
+                )
+                lines.append(f"{name}{{{labels}}} {agg[field]}")
+
+        # Textfile collectors may read at any time, so the file is replaced atomically
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+metrics = MetricsCollector()
+
+
+def get_collector() -> MetricsCollector:
+    # Jobs of `tulona serve` record into a collector of their own
+    collector = _collector.get()
+    return metrics if collector is None else collector
+
+
+@contextmanager
+def collect_metrics(collector: MetricsCollector):
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def task_metrics(task: str):
+    token = _task.set(task)
+    try:
+        yield
+    finally:
+        _task.reset(token)
+
+
+@contextmanager
+def phase(name: str, datasource: Optional[str] = None):
+    # Nested phases inherit the datasource of the enclosing one
+    record = {
+        "task": _task.get(),
+        "datasource": datasource or _datasource.get(),
+        "phase": name,
+        "started_at": time.time(),
+        "seconds": 0.0,
+        "rows": 0,
+        "bytes": 0,
+    }
+    ds_token = _datasource.set(record["datasource"])
+    record_token = _record.set(record)
+    if memory_tracker.active:
+        memory_tracker.enter(record)
+    start_time = time.perf_counter()
+    try:
+        with span(
+            name, **{"tulona.phase": name, "tulona.datasource": record["datasource"]}
+        ):
+            yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start_time
+        if "memory_peak" in record and memory_tracker.active:
+            memory_tracker.exit(record)
+        _record.reset(record_token)
+        _datasource.reset(ds_token)
+        get_collector().add(record)
+
+
+def add_volume(rows: int, nbytes: int) -> None:
+    # Volume is attributed to the innermost running phase, if any
+    record = _record.get()
+    if record is not None:
+        record["rows"] += rows
+        record["bytes"] += nbytes
+
+
+def add_dataframe_volume(df) -> None:
+    # Shallow size, measuring every object value would cost another pass over the data
+    if _record.get() is not None:
+        add_volume(len(df), int(df.memory_usage(deep=False).sum()))
@@ -0,0 +1,316 @@
+import logging
+import re
+from decimal import ROUND_HALF_UP, Context, Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.metrics import phase
+
+log = logging.getLogger(__name__)
+
+# Catalog data types of the supported platforms, by how their values are normalized
+TYPE_KINDS = {
+    "numeric": [
+        "numeric",
+        "decimal",
+        "dec",
+        "number",
+        "fixed",
+        "money",
+        "smallmoney",
+        "bignumeric",
+        "bigdecimal",
+    ],
+    "integer": [
+        "tinyint",
+        "smallint",
+        "mediumint",
+        "int",
+        "integer",
+        "bigint",
+        "byteint",
+        "int2",
+        "int4",
+        "int8",
+        "int64",
+    ],
+    "float": [
+        "real",
+        "float",
+        "float4",
+        "float8",
+        "float64",
+        "double",
+        "double precision",
+    ],
+    "timestamp": [
+        "timestamp",
+        "timestamp without time zone",
+        "timestamp_ntz",
+        "datetime",
+        "datetime2",
+        "smalldatetime",
+    ],
+    "timestamp_tz": [
+        "timestamp with time zone",
+        "timestamptz",
+        "timestamp_tz",
+        "timestamp_ltz",
+        "datetimeoffset",
+    ],
+    "string": [
+        "char",
+        "character",
+        "nchar",
+        "bpchar",
+        "varchar",
+        "character varying",
+        "nvarchar",
+        "varchar2",
+        "nvarchar2",
+        "text",
+        "tinytext",
+        "mediumtext",
+        "longtext",
+        "string",
+        "clob",
+    ],
+}
+NUMBER_KINDS = ["numeric", "integer", "float"]
+TIMESTAMP_KINDS = ["timestamp", "timestamp_tz"]
+
+# Wide enough for the largest decimals of all platforms (38 digits)
+DECIMAL_CONTEXT = Context(prec=80)
+
+
+def get_type_kind(data_type: str) -> Optional[str]:
+    for kind, data_types in TYPE_KINDS.items():
+        if data_type in data_types:
+            return kind
+    return None
+
+
+def get_optional_int(value) -> Optional[int]:
+    if value is None or pd.isna(value):
+        return None
+    return int(value)
+
+
+def get_column_types(df_meta: pd.DataFrame) -> Dict[str, Dict]:
+    # Kind, numeric scale and fractional seconds precision of every column in the
+    # catalog. Type parameters are taken from the type name when the catalog
+    # doesn't have them in columns of their own [e.g. NUMERIC(10, 2) in BigQuery]
+    column_types = {}
+    for row in df_meta.to_dict(orient="records"):
+        data_type = str(row["data_type"]).lower()
+        params = [
+            int(p) for p in re.findall(r"\d+", "".join(re.findall(r"\(.*?\)", data_type)))
+        ]
+        kind = get_type_kind(re.sub(r"\(.*?\)", "", data_type).strip())
+
+        scale = get_optional_int(row.get("numeric_scale"))
+        if scale is None and kind == "numeric" and len(params) == 2:
+            scale = params[1]
+        precision = get_optional_int(row.get("datetime_precision"))
+        if precision is None and kind in TIMESTAMP_KINDS and len(params) == 1:
+            precision = params[0]
+
+        column_types[str(row["column_name"]).lower()] = {
+            "kind": kind,
+            "scale": scale if kind == "numeric" else None,
+            "precision": precision if kind in TIMESTAMP_KINDS else None,
+        }
+    return column_types
+
+
+def has_timezone(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return True
+    first = series.first_valid_index()
+    return first is not None and getattr(series[first], "tzinfo", None) is not None
+
+
+def get_value_kind(series: pd.Series) -> Optional[str]:
+    # Kind of the values, for columns without a catalog type [e.g. queries]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "timestamp_tz" if has_timezone(series) else "timestamp"
+    if pd.api.types.is_bool_dtype(series):
+        return None
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if not pd.api.types.is_object_dtype(series):
+        return None
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred == "datetime":
+        return "timestamp_tz" if has_timezone(series) else "timestamp"
+    return {
+        "decimal": "numeric",
+        "integer": "integer",
+        "floating": "float",
+        "mixed-integer-float": "float",
+        "string": "string",
+    }.get(inferred)
+
+
+def get_canonical_nulls(series: pd.Series) -> pd.Series:
+    # None, NaN, NaT and NA all become None in object columns
+    if series.dtype == object and series.isna().any():
+        return series.where(series.notna(), None)
+    return series
+
+
+def map_distinct_values(series: pd.Series, func) -> pd.Series:
+    # Every distinct value is converted once, missing values become None
+    codes, uniques = pd.factorize(series)
+    values = np.array([func(v) for v in uniques] + [None], dtype=object)
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def round_decimal_values(series: pd.Series, scale: int) -> pd.Series:
+    exponent = Decimal(1).scaleb(-scale)
+
+    def round_value(value):
+        value = Decimal(value)
+        if not value.is_finite():
+            return value
+        return value.quantize(exponent, rounding=ROUND_HALF_UP, context=DECIMAL_CONTEXT)
+
+    return map_distinct_values(series, round_value)
+
+
+def normalize_numeric_columns(
+    columns: List[pd.Series], column_types: List[Dict], kinds: List[str]
+) -> Optional[List[pd.Series]]:
+    # Values are rounded to the smallest scale declared by the catalogs. Sides
+    # holding floats make all of them floats, exact values stay decimals otherwise
+    scales = [
+        t["scale"]
+        for t, kind in zip(column_types, kinds)
+        if kind == "numeric" and t.get("scale") is not None
+    ]
+    scale = min(scales) if scales else None
+
+    if any(pd.api.types.is_float_dtype(s) for s in columns) or "float" in kinds:
+        try:
+            columns = [
+                (
+                    s.astype(np.float64)
+                    if pd.api.types.is_numeric_dtype(s)
+                    else pd.to_numeric(s).astype(np.float64)
+                )
+                for s in columns
+            ]
+        except (ValueError, TypeError) as exc:
+            log.debug(f"Numbers of {columns[0].name} are left as they are: {exc}")
+            return None
+        return [s.round(scale) for s in columns] if scale is not None else columns
+
+    # Nothing to round when all sides are declared with the same scale
+    if scale is None or (len(scales) == len(columns) and len(set(scales)) == 1):
+        return [get_canonical_nulls(s) for s in columns]
+    return [round_decimal_values(s, scale) if s.dtype == object else s for s in columns]
+
+
+def normalize_timestamp_columns(
+    columns: List[pd.Series], column_types: List[Dict]
+) -> Optional[List[pd.Series]]:
+    # Timestamps with a time zone are compared in UTC, naive ones are taken as UTC
+    # when any side has a time zone. Values are rounded to the smallest fractional
+    # seconds precision declared by the catalogs
+    try:
+        columns = [
+            (
+                s
+                if pd.api.types.is_datetime64_any_dtype(s)
+                else pd.to_datetime(s, utc=has_timezone(s))
+            )
+            for s in columns
+        ]
+    except (ValueError, TypeError, OverflowError) as exc:
+        log.debug(f"Timestamps of {columns[0].name} are left as they are: {exc}")
+        return None
+
+    if any(s.dt.tz is not None for s in columns):
+        columns = [
+            s.dt.tz_convert("UTC") if s.dt.tz is not None else s.dt.tz_localize("UTC")
+            for s in columns
+        ]
+
+    precisions = [t["precision"] for t in column_types if t.get("precision") is not None]
+    if precisions and min(precisions) < 9:
+        freq = to_offset(pd.Timedelta(10 ** (9 - min(precisions)), unit="ns"))
+        columns = [s.dt.round(freq) for s in columns]
+    return columns
+
+
+def trim_string_values(series: pd.Series) -> pd.Series:
+    # Trailing blanks, like the padding of CHAR columns, don't make values differ
+    if pd.api.types.infer_dtype(series, skipna=True) != "string":
+        return get_canonical_nulls(series)
+    return map_distinct_values(series, str.rstrip)
+
+
+@phase("normalize")
+def normalize_dataframes(
+    dataframes: List[pd.DataFrame],
+    column_types: Optional[List[Dict[str, Dict]]] = None,
+) -> List[pd.DataFrame]:
+    # Values of every side are brought to one representation before they are
+    # joined, driven by the catalog types of the columns where they are known
+    column_types = column_types or [{} for _ in dataframes]
+    columns = [
+        c for c in dataframes[0].columns if all(c in df.columns for df in dataframes[1:])
+    ]
+
+    normalized = {}
+    for col in columns:
+        sides = [df[col] for df in dataframes]
+        types = [ctypes.get(col, {}) for ctypes in column_types]
+        kinds = [t.get("kind") or get_value_kind(s) for t, s in zip(types, sides)]
+
+        values = None
+        if all(k in NUMBER_KINDS for k in kinds) and set(kinds) != {"integer"}:
+            values = normalize_numeric_columns(sides, types, kinds)
+        elif all(k in TIMESTAMP_KINDS for k in kinds):
+            values = normalize_timestamp_columns(sides, types)
+        elif all(k == "string" for k in kinds):
+            values = [trim_string_values(s) for s in sides]
+
+        if values is None and any(s.dtype == object for s in sides):
+            values = [get_canonical_nulls(s) for s in sides]
+        if values is not None:
+            normalized[col] = values
+
+    if normalized:
+        dataframes = [
+            df.assign(**{col: sides[i] for col, sides in normalized.items()})
+            for i, df in enumerate(dataframes)
+        ]
+    return dataframes
+
+
+def get_tolerances(ds_configs: List[Dict]) -> Dict[str, float]:
+    # Columns whose values may differ by up to the given amount, seconds for
+    # timestamps. The largest tolerance of all datasources applies
+    tolerances = {}
+    for ds_config in ds_configs:
+        for col, tolerance in (ds_config.get("tolerance") or {}).items():
+            if (
+                isinstance(tolerance, bool)
+                or not isinstance(tolerance, (int, float))
+                or tolerance < 0
+            ):
+                raise TulonaInvalidConfigError(
+                    f"Tolerance of column {col} must be a non negative number,"
+                    f" found: {tolerance}"
+                )
+            col = col.lower()
+            tolerances[col] = max(tolerances.get(col, 0), tolerance)
+    return tolerances
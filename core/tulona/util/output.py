@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook
+
+from tulona.config.project import OUTPUT_FORMATS
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.excel import highlight_mismatch_cells, write_dataframe_sheet
+from tulona.util.filesystem import create_dir_if_not_exist
+from tulona.util.metrics import phase
+
+log = logging.getLogger(__name__)
+
+# Concurrent tasks may resolve to the same output file, writes to it are serialised
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def get_path_lock(path: Path) -> threading.Lock:
+    key = str(Path(path).resolve())
+    with _path_locks_guard:
+        if key not in _path_locks:
+            _path_locks[key] = threading.Lock()
+        return _path_locks[key]
+
+
+def get_sheet_file_path(outfile_fqn: Path, sheet_name: str, output_format: str) -> Path:
+    sheet = re.sub(r"[^0-9a-zA-Z]+", "_", sheet_name).strip("_").lower()
+    return Path(outfile_fqn.parent, f"{outfile_fqn.stem}__{sheet}.{output_format}")
+
+
+def dataframe_to_arrow(df: pd.DataFrame):
+    import pyarrow as pa
+
+    # Object columns with mixed types (e.g. metric values) can't be inferred
+    # by arrow, those are written as strings
+    arrays = []
+    for col in df.columns:
+        try:
+            arrays.append(pa.array(df[col], from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array(df[col].map(lambda v: None if pd.isna(v) else str(v))))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def write_dataframe_file(df: pd.DataFrame, path: Path, output_format: str) -> None:
+    if output_format == "jsonl":
+        df.to_json(path, orient="records", lines=True, date_format="iso")
+        return
+
+    import pyarrow as pa
+
+    table = dataframe_to_arrow(df)
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path)
+    elif output_format == "arrow":
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    elif output_format == "csv.zst":
+        import pyarrow.csv as pcsv
+
+        with pa.CompressedOutputStream(str(path), "zstd") as sink:
+            pcsv.write_csv(table, sink)
+    else:
+        raise TulonaInvalidConfigError(
+            f"Output format {output_format} is not supported."
+            f" Supported formats: {OUTPUT_FORMATS}"
+        )
+
+
+# Collects sheets produced by one or more tasks and writes the output file once
+class OutputSession:
+    def __init__(self, outfile_fqn: Union[Path, str], output_format: str = "xlsx"):
+        if output_format not in OUTPUT_FORMATS:
+            raise TulonaInvalidConfigError(
+                f"Output format {output_format} is not supported."
+                f" Supported formats: {OUTPUT_FORMATS}"
+            )
+        self.outfile_fqn = Path(outfile_fqn)
+        self.output_format = output_format
+        self.sheets = {}
+        self.summary = {}
+
+    def add_sheet(
+        self,
+        sheet_name: str,
+        df: pd.DataFrame,
+        ds_compressed_names: List[str] = None,
+        skip_columns: Union[str, Tuple[str], List[str]] = None,
+        tolerances: Optional[Dict[str, float]] = None,
+    ) -> None:
+        if sheet_name in self.sheets:
+            raise ValueError(f"Sheet '{sheet_name}' already exists in the output")
+        log.debug(f"Adding sheet '{sheet_name}' to output: {self.outfile_fqn}")
+        self.sheets[sheet_name] = (df, ds_compressed_names, skip_columns, tolerances)
+
+    def merge(self, other: "OutputSession") -> None:
+        for sheet, sheet_args in other.sheets.items():
+            self.add_sheet(sheet, *sheet_args)
+        self.summary.update(other.summary)
+
+    def add_summary(self, section: str, summary: Dict) -> None:
+        log.debug(f"Adding summary '{section}' to output: {self.outfile_fqn}")
+        self.summary[section] = summary
+
+    @property
+    def summary_file_fqn(self) -> Path:
+        return Path(self.outfile_fqn.parent, f"{self.outfile_fqn.stem}__summary.json")
+
+    def write_summary(self) -> None:
+        log.debug(f"Writing summary report into: {self.summary_file_fqn}")
+        with open(self.summary_file_fqn, "w") as f:
+            json.dump(self.summary, f, indent=2, default=str)
+
+        # Per column statistics are also written as a table for columnar formats
+        if self.output_format in ["parquet", "arrow"]:
+            for section, summary in self.summary.items():
+                if "columns" in summary:
+                    path = get_sheet_file_path(
+                        self.outfile_fqn, f"summary {section}", self.output_format
+                    )
+                    log.debug(f"Writing column summary into: {path}")
+                    write_dataframe_file(
+                        pd.DataFrame(summary["columns"]), path, self.output_format
+                    )
+
+    def write_sheets(self) -> None:
+        if self.output_format != "xlsx":
+            # Columnar formats have no sheets, every sheet becomes a file
+            for sheet, (df, *_) in self.sheets.items():
+                path = get_sheet_file_path(self.outfile_fqn, sheet, self.output_format)
+                log.debug(f"Writing sheet '{sheet}' into: {path}")
+                write_dataframe_file(df, path, self.output_format)
+        elif os.path.exists(self.outfile_fqn):
+            log.debug(f"Appending {len(self.sheets)} sheet[s] into: {self.outfile_fqn}")
+            # Existing workbook has to be loaded anyway, append everything at once
+            with pd.ExcelWriter(self.outfile_fqn, mode="a") as writer:
+                for sheet, sheet_args in self.sheets.items():
+                    df, ds_compressed_names, skip_columns, tolerances = sheet_args
+                    df.to_excel(writer, sheet_name=sheet, index=False)
+                    if ds_compressed_names:
+                        highlight_mismatch_cells(
+                            worksheet=writer.sheets[sheet],
+                            df=df,
+                            ds_compressed_names=ds_compressed_names,
+                            skip_columns=skip_columns,
+                            tolerances=tolerances,
+                        )
+        else:
+            log.debug(f"Writing {len(self.sheets)} sheet[s] into: {self.outfile_fqn}")
+            workbook = Workbook(write_only=True)
+            for sheet, sheet_args in self.sheets.items():
+                df, ds_compressed_names, skip_columns, tolerances = sheet_args
+                write_dataframe_sheet(
+                    workbook=workbook,
+                    sheet_name=sheet,
+                    df=df,
+                    ds_compressed_names=ds_compressed_names,
+                    skip_columns=skip_columns,
+                    tolerances=tolerances,
+                )
+            workbook.save(self.outfile_fqn)
+
+    def write(self) -> None:
+        if not self.sheets and not self.summary:
+            log.debug(f"Nothing to write into: {self.outfile_fqn}")
+            return
+
+        _ = create_dir_if_not_exist(self.outfile_fqn.parent)
+        with get_path_lock(self.outfile_fqn), phase("write"):
+            if self.summary:
+                self.write_summary()
+                self.summary = {}
+            if self.sheets:
+                self.write_sheets()
+                self.sheets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.write()
+
+
+@contextmanager
+def get_output_session(
+    outfile_fqn: Union[Path, str],
+    session: OutputSession = None,
+    output_format: str = "xlsx",
+) -> OutputSession:
+    # Reuse the session handed down by a parent task, otherwise own one
+    if session is not None:
+        yield session
+    else:
+        with OutputSession(outfile_fqn, output_format) as own_session:
+            yield own_session
@@ -0,0 +1,141 @@
+import json
+import logging
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Union
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SAMPLING_INTERVAL = 0.005
+TOP_ALLOCATIONS = 25
+
+
+def get_frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    # Wall clock sampler of all threads, cheap enough to leave on for a whole run.
+    # Output is in collapsed stack format, readable by speedscope and flamegraph.pl
+    def __init__(self, interval: float = DEFAULT_SAMPLING_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="tulona-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(get_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: Union[str, Path]) -> None:
+        log.debug(f"Writing CPU profile into: {path}")
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class MemoryTracker:
+    # Peak traced memory of every phase. The peak is checked at every phase boundary
+    # and attributed to all the phases running at that point, so nested and
+    # concurrent phases each get the peak reached while they were running
+    def __init__(self):
+        self.active = False
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._running: List[Dict] = []
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self.peak = 0
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+        tracemalloc.stop()
+
+    def _checkpoint(self) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        for record in self._running:
+            record["memory_peak"] = max(record["memory_peak"], peak)
+        # Python < 3.9 can't reset the peak, phases then get the peak of the run so far
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    def enter(self, record: Dict) -> None:
+        with self._lock:
+            self._checkpoint()
+            record["memory_start"] = tracemalloc.get_traced_memory()[0]
+            record["memory_peak"] = record["memory_start"]
+            self._running.append(record)
+
+    def exit(self, record: Dict) -> None:
+        with self._lock:
+            self._checkpoint()
+            self._running = [r for r in self._running if r is not record]
+            record["memory_end"] = tracemalloc.get_traced_memory()[0]
+
+    def write_report(self, path: Union[str, Path], records: List[Dict]) -> None:
+        log.debug(f"Writing memory report into: {path}")
+        with self._lock:
+            self._checkpoint()
+        current = tracemalloc.get_traced_memory()[0]
+        top = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+        report = {
+            "current": current,
+            "peak": self.peak,
+            "phases": [
+                {
+                    k: r.get(k)
+                    for k in [
+                        "task",
+                        "datasource",
+                        "phase",
+                        "memory_start",
+                        "memory_end",
+                        "memory_peak",
+                    ]
+                }
+                for r in records
+                if "memory_peak" in r
+            ],
+            "top_allocations": [
+                {"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in top
+            ],
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+memory_tracker = MemoryTracker()
@@ -0,0 +1,73 @@
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from tulona.exceptions import TulonaInvalidConfigError
+
+MANIFEST_PREFIX = "scan_manifest"
+
+
+def parse_shard(shard: Union[str, None]) -> Tuple[int, int]:
+    # Shards are written as i/N where i is 1 based
+    if not shard:
+        return 1, 1
+    try:
+        index, count = (int(s) for s in str(shard).split("/"))
+    except ValueError:
+        raise TulonaInvalidConfigError(f"Shard must be of the form i/N, got: {shard}")
+    if count < 1 or not 1 <= index <= count:
+        raise TulonaInvalidConfigError(
+            f"Shard index must be between 1 and N, got: {shard}"
+        )
+    return index, count
+
+
+def get_shard_key(schema_fqns: List[str], table: str) -> str:
+    return f"{'|'.join(schema_fqns)}|{table}".lower()
+
+
+def in_shard(key: str, index: int, count: int) -> bool:
+    # crc32 is stable across processes and machines unlike hash()
+    return zlib.crc32(key.encode()) % count == index - 1
+
+
+def get_manifest_fqn(outdir: Union[str, Path], index: int, count: int) -> Path:
+    if count == 1:
+        return Path(outdir, f"{MANIFEST_PREFIX}.json")
+    return Path(outdir, f"{MANIFEST_PREFIX}__shard{index}of{count}.json")
+
+
+def get_manifest_relpath(path: Union[str, Path], manifest_dir: Union[str, Path]) -> str:
+    # Output files are recorded relative to the manifest, so that shards run on
+    # other machines or in other directories can be collected into one place
+    return Path(os.path.relpath(path, manifest_dir)).as_posix()
+
+
+def resolve_manifest_paths(manifest: Dict, manifest_fqn: Union[str, Path]) -> Dict:
+    manifest_dir = Path(manifest_fqn).parent
+    return {
+        **manifest,
+        "files": [str(Path(manifest_dir, f)) for f in manifest["files"]],
+        "tables": [
+            {**t, "files": [str(Path(manifest_dir, f)) for f in t["files"]]}
+            for t in manifest["tables"]
+        ],
+    }
+
+
+def write_manifest(manifest: Dict, manifest_fqn: Union[str, Path]) -> None:
+    with open(manifest_fqn, "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+
+def find_manifests(inputs: List[Union[str, Path]]) -> List[Path]:
+    manifests = []
+    for inp in inputs:
+        inp = Path(inp)
+        if inp.is_file():
+            manifests.append(inp)
+        else:
+            manifests.extend(sorted(inp.rglob(f"{MANIFEST_PREFIX}*.json")))
+    return manifests
@@ -1,8 +1,27 @@
-from typing import Dict, List, Optional, Tuple, Union
+import logging
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import pandas as pd
 
 from tulona.exceptions import TulonaNotImplementedError
+from tulona.util.metrics import add_dataframe_volume, phase
+from tulona.util.tracing import sanitize_query, span
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50000
+
+# Dialects whose SQLAlchemy driver streams through a server side cursor with
+# `stream_results` (psycopg2 named cursor, pymysql SSCursor).
+# Others are streamed with `fetchmany` on a DBAPI cursor with `arraysize` set.
+SERVER_SIDE_CURSOR_DBTYPES = ["postgres", "mysql"]
+
+# Number of rows from which an extraction is considered large enough
+# for the bulk extraction fast path of the adapter (if there is one)
+BULK_EXTRACTION_THRESHOLD = 10000
 
 
 def get_table_fqn(database: Optional[str], schema: str, table: str) -> str:
@@ -34,19 +53,171 @@ def get_sample_row_query(dbtype: str, data_container: str, sample_count: int):
     return query
 
 
-def get_column_query(table_fqn: str, columns: List[str], quoted=False):
-    column_expr = ", ".join([f'"{c}"' if quoted else c for c in columns])
+def get_column_query(
+    table_fqn: str,
+    columns: Optional[List[str]],
+    quoted=False,
+    query_expr: Optional[str] = None,
+):
+    if columns:
+        column_expr = ", ".join([f'"{c}"' if quoted else c for c in columns])
+    else:
+        column_expr = "*"
     query = f"""select {column_expr} from {table_fqn}"""
+    if query_expr:
+        query = f"{query} where {query_expr}"
 
     return query
 
 
-def get_query_output_as_df(connection_manager, query_text: str):  # pragma: no cover
+def sql_span(connection_manager, query_text: str):
+    return span(
+        "sql",
+        kind="client",
+        **{
+            "db.system": connection_manager.conn_profile["type"].lower(),
+            "db.statement": sanitize_query(query_text),
+            "tulona.datasource": getattr(connection_manager, "datasource", None),
+        },
+    )
+
+
+def get_query_output_as_df(connection_manager, query_text: str, bulk: bool = False):
+    with sql_span(connection_manager, query_text) as attributes:
+        df = extract_query_output_as_df(connection_manager, query_text, bulk=bulk)
+        attributes["db.response.rows"] = len(df)
+    add_dataframe_volume(df)
+    return df
+
+
+def extract_query_output_as_df(
+    connection_manager, query_text: str, bulk: bool = False
+):  # pragma: no cover
+    dbtype = connection_manager.conn_profile["type"].lower()
+    if bulk and dbtype == "postgres":
+        from tulona.adapter.postgres import copy_query_output_as_df
+
+        try:
+            log.debug("Extracting query output with COPY")
+            return copy_query_output_as_df(connection_manager.engine, query_text)
+        except TulonaNotImplementedError as exc:
+            log.debug(f"{exc}, falling back to regular fetch")
+        except Exception as exc:
+            log.warning(f"COPY extraction failed, falling back to regular fetch: {exc}")
+    elif bulk and dbtype == "snowflake":
+        from tulona.adapter.snowflake import fetch_query_output_as_df
+
+        log.debug("Extracting query output as Arrow result batches")
+        return fetch_query_output_as_df(connection_manager.engine, query_text)
+    elif bulk and dbtype == "bigquery":
+        from tulona.adapter.bigquery import (
+            get_storage_clients,
+            read_query_output_as_arrow,
+        )
+
+        try:
+            log.debug("Extracting query output with BigQuery Storage Read API")
+            client, read_client = get_storage_clients(connection_manager.conn_profile)
+            return read_query_output_as_arrow(client, read_client, query_text).to_pandas()
+        except Exception as exc:
+            log.warning(
+                f"Storage API extraction failed, falling back to regular fetch: {exc}"
+            )
+
     with connection_manager.engine.connect() as conn:
         df = pd.read_sql_query(query_text, conn)
     return df
 
 
+def get_table_output_as_df(
+    connection_manager,
+    table_fqn: str,
+    columns: Optional[List[str]] = None,
+    query_expr: Optional[str] = None,
+    quoted: bool = False,
+    bulk: bool = True,
+) -> pd.DataFrame:  # pragma: no cover
+    dbtype = connection_manager.conn_profile["type"].lower()
+    query = get_column_query(table_fqn, columns, quoted=quoted, query_expr=query_expr)
+    if bulk and dbtype == "bigquery":
+        from tulona.adapter.bigquery import get_storage_clients, read_table_as_arrow
+
+        # Column projection and row restriction are pushed down to the read session
+        try:
+            log.debug(f"Reading {table_fqn} with BigQuery Storage Read API")
+            with sql_span(connection_manager, query) as attributes:
+                _, read_client = get_storage_clients(connection_manager.conn_profile)
+                df = read_table_as_arrow(
+                    read_client,
+                    project=connection_manager.conn_profile["project"],
+                    table_fqn=table_fqn,
+                    columns=columns,
+                    row_restriction=query_expr,
+                ).to_pandas()
+                attributes["db.response.rows"] = len(df)
+            add_dataframe_volume(df)
+            return df
+        except Exception as exc:
+            log.warning(f"Storage API read failed, falling back to query: {exc}")
+
+    sanitized_query = get_column_query(table_fqn, columns, quoted=quoted)
+    log.debug(f"Executing query: {sanitized_query}{' where (...)' if query_expr else ''}")
+    return get_query_output_as_df(connection_manager, query, bulk=bulk)
+
+
+def rows_to_batch(
+    rows: Sequence, columns: List[str], as_arrow: bool = False
+) -> Union[pd.DataFrame, "pa.Table"]:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    if as_arrow:
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(df, preserve_index=False)
+    return df
+
+
+def get_query_output_as_batches(
+    connection_manager,
+    query_text: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    as_arrow: bool = False,
+) -> Iterator[Union[pd.DataFrame, "pa.Table"]]:
+    dbtype = connection_manager.conn_profile["type"].lower()
+
+    if dbtype == "snowflake":
+        from tulona.adapter.snowflake import fetch_query_output_batches
+
+        log.debug("Streaming query output as Arrow result batches for snowflake")
+        yield from fetch_query_output_batches(
+            connection_manager.engine, query_text, as_arrow=as_arrow
+        )
+    elif dbtype in SERVER_SIDE_CURSOR_DBTYPES:
+        log.debug(f"Streaming query output with server side cursor for {dbtype}")
+        with connection_manager.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=batch_size
+            ).exec_driver_sql(query_text)
+            columns = list(result.keys())
+            for rows in result.partitions(batch_size):
+                yield rows_to_batch(rows, columns, as_arrow)
+    else:
+        log.debug(f"Streaming query output with DBAPI cursor for {dbtype}")
+        raw_conn = connection_manager.engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(query_text)
+            columns = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows_to_batch(rows, columns, as_arrow)
+            cursor.close()
+        finally:
+            raw_conn.close()
+
+
 def build_filter_query_expression(
     df: pd.DataFrame,
     primary_key: Union[List, Tuple, str],
@@ -209,3 +380,22 @@ def get_table_data_query(
             dbtype=dbtype, data_container=data_container, sample_count=sample_count
         )
     return query
+
+
+def get_row_count_query(data_container: str) -> str:
+    return f"select count(*) as row_count from {data_container}"
+
+
+def get_row_count(connection_manager, data_container: str) -> Optional[int]:
+    # Aggregate is pushed down so that the whole table is never extracted
+    query = get_row_count_query(data_container)
+    log.debug(f"Executing query: {query}")
+    try:
+        with phase("catalog"):
+            df = get_query_output_as_df(
+                connection_manager=connection_manager, query_text=query
+            )
+    except Exception as exc:
+        log.warning(f"Could not count rows of {data_container}: {exc}")
+        return None
+    return int(df.iloc[0, 0])
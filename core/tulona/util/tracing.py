@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+log = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 2000
+SERVICE_NAME = "tulona"
+SPAN_KINDS = {"internal": 1, "client": 3}
+
+_span: ContextVar[Optional[Dict]] = ContextVar("tulona_tracing_span", default=None)
+
+
+def sanitize_query(query: str) -> str:
+    # Literals may hold data, only the shape of the statement is kept
+    query = re.sub(r"'(?:[^']|'')*'", "?", query)
+    query = re.sub(r"\b\d+(?:\.\d+)?\b", "?", query)
+    query = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", query)
+    query = re.sub(r"\s+", " ", query).strip()
+    if len(query) > MAX_STATEMENT_LENGTH:
+        query = f"{query[:MAX_STATEMENT_LENGTH]}..."
+    return query
+
+
+def get_attribute_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    # Spans are only collected while the tracer is active, so that untraced runs
+    # don't pay for them
+    def __init__(self):
+        self.active = False
+        self.trace_id = None
+        self._lock = threading.Lock()
+        self.spans: List[Dict] = []
+
+    def start(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        with self._lock:
+            self.spans = []
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    def add(self, span: Dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def get_spans(self) -> List[Dict]:
+        with self._lock:
+            return list(self.spans)
+
+    def write_otlp_json(self, path: Union[str, Path]) -> None:
+        # Same layout as an OTLP/HTTP JSON export request, so the file can be
+        # replayed into any OpenTelemetry collector or opened by trace viewers
+        log.debug(f"Writing trace into: {path}")
+        spans = []
+        for s in self.get_spans():
+            spans.append(
+                {
+                    "traceId": self.trace_id,
+                    "spanId": s["span_id"],
+                    "parentSpanId": s["parent_span_id"] or "",
+                    "name": s["name"],
+                    "kind": SPAN_KINDS[s["kind"]],
+                    "startTimeUnixNano": str(s["start_time"]),
+                    "endTimeUnixNano": str(s["end_time"]),
+                    "attributes": [
+                        {"key": k, "value": get_attribute_value(v)}
+                        for k, v in s["attributes"].items()
+                        if v is not None
+                    ],
+                    "status": (
+                        {"code": 2, "message": s["error"]} if s["error"] else {"code": 1}
+                    ),
+                }
+            )
+        export = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": get_attribute_value(SERVICE_NAME),
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "tulona"}, "spans": spans}],
+                }
+            ]
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(export, f, indent=2, default=str)
+
+
+tracer = Tracer()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    if not tracer.active:
+        yield {}
+        return
+
+    parent = _span.get()
+    current = {
+        "span_id": os.urandom(8).hex(),
+        "parent_span_id": parent["span_id"] if parent else None,
+        "name": name,
+        "kind": kind,
+        "attributes": attributes,
+        "start_time": time.time_ns(),
+        "end_time": None,
+        "error": None,
+    }
+    token = _span.set(current)
+    try:
+        yield current["attributes"]
+    except Exception as exc:
+        current["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current["end_time"] = time.time_ns()
+        _span.reset(token)
+        tracer.add(current)
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pytest
+
+from tulona.adapter.bigquery import get_table_path, read_table_as_arrow
+
+
+@pytest.mark.parametrize(
+    "table_fqn,expected",
+    [
+        (
+            "training-338516.dummy_fashion_retail.customers",
+            "projects/training-338516/datasets/dummy_fashion_retail/tables/customers",
+        ),
+        (
+            "`training-338516`.dummy_fashion_retail.customers",
+            "projects/training-338516/datasets/dummy_fashion_retail/tables/customers",
+        ),
+    ],
+)
+def test_get_table_path(table_fqn, expected):
+    actual = get_table_path(table_fqn)
+    assert actual == expected
+
+
+class DummyReadClient:
+    def __init__(self, stream_tables):
+        self.stream_tables = stream_tables
+        self.requested_session = None
+        self.max_stream_count = None
+
+    def create_read_session(self, parent, read_session, max_stream_count):
+        self.requested_session = read_session
+        self.max_stream_count = max_stream_count
+        return SimpleNamespace(
+            streams=[SimpleNamespace(name=name) for name in self.stream_tables]
+        )
+
+    def read_rows(self, name):
+        return SimpleNamespace(to_arrow=lambda session: self.stream_tables[name])
+
+
+def test_read_table_as_arrow():
+    read_client = DummyReadClient(
+        {
+            "stream1": pa.table({"customer_id": [1, 2]}),
+            "stream2": pa.table({"customer_id": [3]}),
+        }
+    )
+    table = read_table_as_arrow(
+        read_client,
+        project="training-338516",
+        table_fqn="training-338516.dummy_fashion_retail.customers",
+        columns=["customer_id"],
+        row_restriction="customer_id > 0",
+        max_streams=2,
+    )
+
+    assert sorted(table.column("customer_id").to_pylist()) == [1, 2, 3]
+    assert read_client.max_stream_count == 2
+    read_options = read_client.requested_session.read_options
+    assert list(read_options.selected_fields) == ["customer_id"]
+    assert read_options.row_restriction == "customer_id > 0"
@@ -0,0 +1,160 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from tulona.adapter.postgres import (
+    copy_output_to_df,
+    get_copy_query,
+    get_copy_unsupported_columns,
+)
+
+
+@pytest.mark.parametrize(
+    "query_text,expected",
+    [
+        (
+            "select * from corporate.employee;",
+            "copy (select * from corporate.employee) to stdout"
+            " with (format csv, header true, null '\\N')",
+        ),
+    ],
+)
+def test_get_copy_query(query_text, expected):
+    actual = get_copy_query(query_text)
+    assert actual == expected
+
+
+def test_copy_output_to_df():
+    buffer = io.BytesIO(
+        b"id,code,name,active,joined,updated\n"
+        b"1,007,a,t,2024-01-31,2024-01-31 10:00:00\n"
+        b'2,\\N,"",f,\\N,\\N\n'
+    )
+    column_types = [
+        ("id", 23),
+        ("code", 1043),
+        ("name", 25),
+        ("active", 16),
+        ("joined", 1082),
+        ("updated", 1114),
+    ]
+    df = copy_output_to_df(buffer, column_types)
+
+    assert df["id"].tolist() == [1, 2]
+    assert df["code"].tolist()[0] == "007"
+    assert pd.isna(df["code"].tolist()[1])
+    assert df["name"].tolist() == ["a", ""]
+    assert df["active"].tolist() == [True, False]
+    assert df["joined"].tolist() == [datetime.date(2024, 1, 31), None]
+    assert df["updated"].tolist()[0] == pd.Timestamp("2024-01-31 10:00:00")
+    assert pd.isna(df["updated"].tolist()[1])
+
+
+def test_copy_output_to_df_exact_values():
+    buffer = io.BytesIO(
+        b"amount,payload,note,doc,tag\n"
+        b'12345678901234567.89,\\x00ff,"\\N","{""a"": 1}",a1b2\n'
+        b"\\N,\\N,\\N,\\N,\\N\n"
+    )
+    column_types = [
+        ("amount", 1700),
+        ("payload", 17),
+        ("note", 25),
+        ("doc", 3802),
+        ("tag", 2950),
+    ]
+    df = copy_output_to_df(buffer, column_types)
+
+    assert df["amount"].tolist() == [Decimal("12345678901234567.89"), None]
+    assert df["payload"].tolist() == [b"\x00\xff", None]
+    # A quoted value equal to the NULL marker is text
+    assert df["note"].tolist() == ["\\N", None]
+    assert df["doc"].tolist() == [{"a": 1}, None]
+    assert df["tag"].tolist() == ["a1b2", None]
+
+
+@pytest.mark.parametrize(
+    "column_types,expected",
+    [
+        ([("id", 23), ("name", 1043), ("joined", 1082)], []),
+        (
+            [("id", 23), ("tags", 1009), ("at", 1083), ("took", 1186)],
+            ["tags", "at", "took"],
+        ),
+    ],
+)
+def test_get_copy_unsupported_columns(column_types, expected):
+    assert get_copy_unsupported_columns(column_types) == expected
+
+
+def test_copy_output_to_df_matches_regular_fetch():
+    extensions = pytest.importorskip("psycopg2.extensions")
+
+    column_types = [
+        ("id", 23),
+        ("active", 16),
+        ("score", 701),
+        ("amount", 1700),
+        ("name", 25),
+        ("code", 1042),
+        ("doc", 3802),
+        ("joined", 1082),
+        ("updated", 1114),
+    ]
+    rows = [
+        [
+            "1",
+            "t",
+            "1.5",
+            "10.10",
+            "a",
+            "007",
+            '{"a": 1}',
+            "2024-01-31",
+            "2024-01-31 10:00:00",
+        ],
+        [
+            "2",
+            "f",
+            "2",
+            "0.000001",
+            "",
+            "x",
+            "[1, 2]",
+            "1999-12-31",
+            "1999-12-31 23:59:59.5",
+        ],
+        ["3", None, None, None, None, None, None, None, None],
+    ]
+
+    def quote(value):
+        if value is None:
+            return "\\N"
+        return '"' + value.replace('"', '""') + '"'
+
+    buffer = io.BytesIO(
+        (
+            ",".join(name for name, _ in column_types)
+            + "\n"
+            + "".join(",".join(quote(v) for v in row) + "\n" for row in rows)
+        ).encode()
+    )
+    df = copy_output_to_df(buffer, column_types)
+
+    # The regular fetch builds the frame from the values psycopg2 parses from the
+    # same text, numerics are kept as Decimal instead of being coerced to float
+    records = [
+        [
+            None if v is None else extensions.string_types[oid](v, None)
+            for v, (_, oid) in zip(row, column_types)
+        ]
+        for row in rows
+    ]
+    expected = pd.DataFrame.from_records(
+        records, columns=[name for name, _ in column_types], coerce_float=False
+    )
+
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
@@ -0,0 +1,67 @@
+import pytest
+
+from tulona.adapter.registry import EngineRegistry, get_pool_options, get_profile_key
+
+
+@pytest.mark.parametrize(
+    "profile1,profile2,expected",
+    [
+        (
+            {"type": "postgres", "host": "localhost", "port": 5432},
+            {"port": 5432, "host": "localhost", "type": "postgres"},
+            True,
+        ),
+        (
+            {"type": "postgres", "host": "localhost", "port": 5432},
+            {"type": "postgres", "host": "localhost", "port": 5433},
+            False,
+        ),
+    ],
+)
+def test_get_profile_key(profile1, profile2, expected):
+    actual = get_profile_key(profile1) == get_profile_key(profile2)
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "conn_profile,expected",
+    [
+        (
+            {"type": "postgres"},
+            {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True},
+        ),
+        (
+            {"type": "postgres", "pool_size": 2, "max_overflow": 0},
+            {"pool_size": 2, "max_overflow": 0, "pool_pre_ping": True},
+        ),
+    ],
+)
+def test_get_pool_options(conn_profile, expected):
+    actual = get_pool_options(conn_profile)
+    assert actual == expected
+
+
+class DummyEngine:
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.disposed = False
+
+    def dispose(self):
+        self.disposed = True
+
+
+def test_engine_registry():
+    def factory(conn_profile, **kwargs):
+        return DummyEngine(**kwargs)
+
+    registry = EngineRegistry()
+    engine1 = registry.get_engine({"type": "postgres", "host": "a"}, factory)
+    engine2 = registry.get_engine({"type": "postgres", "host": "a"}, factory)
+    engine3 = registry.get_engine({"type": "postgres", "host": "b"}, factory)
+
+    assert engine1 is engine2
+    assert engine1 is not engine3
+    assert engine1.options["pool_pre_ping"] is True
+
+    registry.dispose_all()
+    assert engine1.disposed and engine3.disposed
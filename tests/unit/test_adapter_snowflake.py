@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from snowflake.connector.errors import NotSupportedError
+
+from tulona.adapter.snowflake import (
+    SnowflakeConnection,
+    fetch_query_output_as_df,
+    fetch_query_output_batches,
+    normalize_column_name,
+)
+
+fakesnow = pytest.importorskip("fakesnow")
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("CUSTOMER_ID", "customer_id"),
+        ("customer_id", "customer_id"),
+        ("CustomerId", "CustomerId"),
+    ],
+)
+def test_normalize_column_name(name, expected):
+    actual = normalize_column_name(name)
+    assert actual == expected
+
+
+@pytest.fixture
+def snowflake_engine():
+    with fakesnow.patch():
+        engine = SnowflakeConnection(
+            credentials={
+                "account": "account",
+                "warehouse": "warehouse",
+                "database": "db1",
+                "schema": "sc1",
+                "user": "user",
+                "password": "password",
+            }
+        ).get_engine()
+        with engine.connect() as conn:
+            conn.exec_driver_sql("create database if not exists db1")
+            conn.exec_driver_sql("create schema if not exists db1.sc1")
+            conn.exec_driver_sql(
+                "create table db1.sc1.customers (ID int, NAME varchar, BALANCE number(38, 2))"
+            )
+            conn.exec_driver_sql(
+                "insert into db1.sc1.customers values"
+                " (1, 'a', 123456789012345678.91), (2, 'b', null)"
+            )
+        yield engine
+        engine.dispose()
+
+
+def test_fetch_query_output_as_df(snowflake_engine):
+    df = fetch_query_output_as_df(snowflake_engine, "select * from db1.sc1.customers")
+    assert df.columns.tolist() == ["id", "name", "balance"]
+    assert df.shape[0] == 2
+    assert df["balance"][0] == Decimal("123456789012345678.91")
+
+
+def test_fetch_query_output_as_df_decimal_setting(snowflake_engine, monkeypatch):
+    settings = []
+    fetch_pandas_all = fakesnow.cursor.FakeSnowflakeCursor.fetch_pandas_all
+
+    def fetch_pandas_all_recorded(self, **kwargs):
+        settings.append(self._conn._arrow_number_to_decimal)
+        return fetch_pandas_all(self, **kwargs)
+
+    monkeypatch.setattr(
+        fakesnow.cursor.FakeSnowflakeCursor, "fetch_pandas_all", fetch_pandas_all_recorded
+    )
+    fetch_query_output_as_df(snowflake_engine, "select * from db1.sc1.customers")
+
+    # Exact decimals are only enabled for the extraction, not the pooled connection
+    assert settings == [True]
+    raw_conn = snowflake_engine.raw_connection()
+    assert raw_conn.dbapi_connection._arrow_number_to_decimal is False
+    raw_conn.close()
+
+
+def test_fetch_query_output_as_df_without_arrow(snowflake_engine, monkeypatch):
+    def fetch_pandas_all(self, **kwargs):
+        raise NotSupportedError
+
+    monkeypatch.setattr(
+        fakesnow.cursor.FakeSnowflakeCursor, "fetch_pandas_all", fetch_pandas_all
+    )
+
+    df = fetch_query_output_as_df(snowflake_engine, "select * from db1.sc1.customers")
+    assert df.columns.tolist() == ["id", "name", "balance"]
+    assert df["balance"][0] == Decimal("123456789012345678.91")
+
+
+@pytest.mark.parametrize("as_arrow", [True, False])
+def test_fetch_query_output_batches(snowflake_engine, as_arrow):
+    batches = list(
+        fetch_query_output_batches(
+            snowflake_engine, "select * from db1.sc1.customers", as_arrow=as_arrow
+        )
+    )
+    assert all(isinstance(b, pa.Table if as_arrow else pd.DataFrame) for b in batches)
+    assert sum(b.num_rows if as_arrow else b.shape[0] for b in batches) == 2
@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from tulona.adapter.connection import load_adapter
+from tulona.cli.base import cli, get_task_nodes
+from tulona.exceptions import TulonaNotImplementedError
+
+HEAVY_MODULES = [
+    "pandas",
+    "sqlalchemy",
+    "snowflake",
+    "cryptography",
+    "pymysql",
+    "psycopg2",
+    "google.cloud",
+    "openpyxl",
+]
+
+
+def test_cli_import_is_lightweight():
+    code = (
+        "import sys; import tulona.cli.base;"
+        f" print(','.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_cli_help_has_no_side_effects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    assert not (tmp_path / "log").exists()
+
+
+@pytest.mark.parametrize(
+    "dbtype,expected",
+    [
+        ("postgres", "get_postgres_engine"),
+        ("MySQL", "get_mysql_engine"),
+        pytest.param(
+            "oracle",
+            None,
+            marks=pytest.mark.xfail(
+                raises=TulonaNotImplementedError,
+                match="Tulona connection manager is not set up for",
+            ),
+        ),
+    ],
+)
+def test_load_adapter(dbtype, expected):
+    actual = load_adapter(dbtype)
+    assert actual.__name__ == expected
+
+
+def test_get_task_nodes():
+    project = {
+        "datasources": {
+            "ds1": {"connection_profile": "pgdb"},
+            "ds2": {"connection_profile": "mydb"},
+        },
+        "task_config": [
+            {"task": "ping", "datasources": ["ds1"], "name": "ping_pg"},
+            {"task": "compare", "datasources": ["ds1", "ds2"], "depends_on": "ping_pg"},
+        ],
+    }
+    nodes = get_task_nodes(project, profile={})
+
+    assert [n.name for n in nodes] == ["ping_pg", "compare_2"]
+    assert nodes[1].depends_on == ["ping_pg"]
+    assert nodes[1].resources == ["pgdb", "mydb"]
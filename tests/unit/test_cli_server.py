@@ -0,0 +1,146 @@
+import json
+import os
+import stat
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from tulona.cli import base as base_module
+from tulona.cli.server import JobManager, create_server
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.metrics import metrics, phase
+
+PROJECT = {
+    "outdir": "output",
+    "output_format": "xlsx",
+    "datasources": {"ds1": {}, "ds2": {}},
+}
+
+
+def _dummy_build_task(executed, fail=False):
+    def build_task(tconf, project, profile):
+        class DummyTask:
+            def execute(self):
+                executed.append(project["runid"])
+                # Tasks may change the project config, like ScanTask does
+                project["datasources"]["ds1"]["schema"] = project["runid"]
+                with phase("extract", datasource="ds1"):
+                    pass
+                if fail:
+                    raise RuntimeError("job failed")
+
+        return DummyTask()
+
+    return build_task
+
+
+def _wait(manager, job_id):
+    for _ in range(100):
+        if manager.get(job_id).status in ["success", "failed"]:
+            return manager.get(job_id)
+        time.sleep(0.02)
+    raise TimeoutError(job_id)
+
+
+@pytest.mark.parametrize(
+    "task_config",
+    [
+        {"task": "compare", "datasources": ["ds1", "ds2"]},
+        pytest.param(
+            {"task": "run", "datasources": ["ds1"]},
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            {"task": "compare", "datasources": ["ds1", "missing"]},
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            {"task": "compare"},
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+    ],
+)
+def test_job_manager_validate(task_config):
+    JobManager(PROJECT, {}, max_workers=1).validate(task_config)
+
+
+@pytest.mark.parametrize("fail,expected", [(False, "success"), (True, "failed")])
+def test_job_manager_run(monkeypatch, tmp_path, fail, expected):
+    executed = []
+    records = metrics.get_records()
+    monkeypatch.setattr(base_module, "build_task", _dummy_build_task(executed, fail))
+    manager = JobManager({**PROJECT, "outdir": str(tmp_path)}, {}, max_workers=2)
+
+    jobs = [manager.submit({"task": "profile", "datasources": ["ds1"]}) for _ in range(2)]
+    jobs = [_wait(manager, job.id) for job in jobs]
+    manager.shutdown()
+
+    assert [job.status for job in jobs] == [expected, expected]
+    assert (jobs[0].error is not None) == fail
+    # Every job runs with a project config, run id and metrics of its own
+    assert len(set(executed)) == 2
+    assert all(job.id in job.outdir for job in jobs)
+    assert manager.project["datasources"]["ds1"] == {}
+    for job in jobs:
+        content = json.loads(Path(job.outdir, "metrics.json").read_text())
+        assert content["job"] == job.id
+        assert [r["phase"] for r in content["phases"]] == ["extract"]
+        assert str(Path(job.outdir, "metrics.json")) in job.outputs
+    assert metrics.get_records() == records
+
+
+def test_server_routes(monkeypatch, tmp_path):
+    monkeypatch.setattr(base_module, "build_task", _dummy_build_task([]))
+    manager = JobManager({**PROJECT, "outdir": str(tmp_path)}, {}, max_workers=1)
+    server = create_server(manager, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def request(path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            with urllib.request.urlopen(f"{url}{path}", data=data) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read())
+
+    try:
+        assert request("/health") == (200, {"status": "ok"})
+
+        status, job = request("/jobs", {"task": "ping", "datasources": ["ds1"]})
+        assert status == 202
+        _wait(manager, job["id"])
+        status, job = request(f"/jobs/{job['id']}")
+        assert (status, job["status"]) == (200, "success")
+
+        assert request("/jobs", {"task": "ping"})[0] == 400
+        assert request("/jobs/unknown")[0] == 404
+        assert len(request("/jobs")[1]) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        manager.shutdown()
+
+
+def test_unix_server_socket_path(tmp_path):
+    manager = JobManager({**PROJECT, "outdir": str(tmp_path)}, {}, max_workers=1)
+    socket_path = tmp_path / "tulona.sock"
+
+    # A stale socket is replaced and removed again on close
+    create_server(manager, socket_path=str(socket_path)).socket.close()
+    assert stat.S_ISSOCK(os.stat(socket_path).st_mode)
+    server = create_server(manager, socket_path=str(socket_path))
+    server.server_close()
+    assert not socket_path.exists()
+
+    # A regular file at the path is left alone
+    socket_path.write_text("data")
+    with pytest.raises(TulonaInvalidConfigError):
+        create_server(manager, socket_path=str(socket_path))
+    assert socket_path.read_text() == "data"
+    manager.shutdown()
@@ -0,0 +1,16 @@
+import pytest
+
+from tulona.config.project import ProjectModel
+from tulona.task.compare import get_memory_budget
+
+
+@pytest.mark.parametrize(
+    "memory_budget,expected",
+    [(None, None), (1073741824, 1073741824), ("1GB", 1073741824)],
+)
+def test_project_memory_budget(memory_budget, expected):
+    project = ProjectModel(
+        version="2.0", name="test", datasources={}, memory_budget=memory_budget
+    )
+    assert project.memory_budget == memory_budget
+    assert get_memory_budget(None, project.model_dump()) == expected
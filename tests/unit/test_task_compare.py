@@ -0,0 +1,87 @@
+import json
+import threading
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from tulona.task import compare as compare_module
+from tulona.task.compare import CompareRowTask, CompareTask
+
+
+def _dummy_task(sheet, barrier, fail=False):
+    class DummyTask:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.session = None
+
+        def extract_confs(self):
+            return {"primary_key": ("id",)}
+
+        def execute(self):
+            # Every phase waits for the others, which only works when they overlap
+            barrier.wait(timeout=5)
+            if fail:
+                raise RuntimeError(f"{sheet} failed")
+            self.session.add_sheet(sheet, pd.DataFrame({"id": [1]}))
+
+    return DummyTask
+
+
+def test_compare_task_runs_phases_concurrently(monkeypatch, tmp_path):
+    barrier = threading.Barrier(3)
+    monkeypatch.setattr(compare_module, "get_datasource_plans", lambda *args: {})
+    monkeypatch.setattr(compare_module, "ProfileTask", _dummy_task("Profile", barrier))
+    monkeypatch.setattr(
+        compare_module, "CompareRowTask", _dummy_task("Row", barrier, fail=True)
+    )
+    monkeypatch.setattr(
+        compare_module, "CompareColumnTask", _dummy_task("Column", barrier)
+    )
+
+    outfile = tmp_path / "compare__default.xlsx"
+    CompareTask(
+        profile={},
+        project={"datasources": {"ds1": {}, "ds2": {}}},
+        datasources=["ds1", "ds2"],
+        outfile_fqn=outfile,
+    ).execute()
+
+    # Failure of one phase doesn't affect the others, sheets keep the phase order
+    assert load_workbook(outfile).sheetnames == ["Profile", "Column"]
+
+
+def test_compare_row_write_summary(monkeypatch, tmp_path):
+    monkeypatch.setattr(compare_module, "get_row_count", lambda conman, container: 10)
+    dataframes = [
+        pd.DataFrame({"id": [1, 2, 3], "age": [10, 20, 30]}),
+        pd.DataFrame({"id": [1, 2], "age": [10, 21]}),
+    ]
+    task = CompareRowTask(
+        profile={},
+        project={},
+        datasources=["ds1", "ds2"],
+        outfile_fqn=tmp_path / "compare_row__summaryonly.xlsx",
+        sample_count=3,
+        summary_only=True,
+    )
+    task.write_summary(
+        econf_dict={
+            "ds_name_compressed_list": ["ds1", "ds2"],
+            "connection_managers": [None, None],
+            "tolerances": {},
+        },
+        dataframes=dataframes,
+        primary_key=("id",),
+        data_containers=["t1", "t2"],
+    )
+
+    with open(tmp_path / "compare_row__summaryonly__summary.json") as f:
+        summary = json.load(f)["compare_row"]
+    assert summary["row_count"] == {"ds1": 10, "ds2": 10}
+    sample = summary["sample"]
+    assert sample["sample_count"] == 3
+    assert sample["rows_compared"] == 2
+    assert sample["rows_mismatched"] == 1
+    # Keys only the filtered side has can't be known
+    assert sample["only_in"] == {"ds1": 1}
+    assert [c["mismatch_count"] for c in sample["columns"]] == [1]
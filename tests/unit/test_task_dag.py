@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.task.dag import FAILED, SKIPPED, SUCCESS, DagScheduler, TaskNode
+
+
+def _node(name, depends_on=None, resources=None, run=None):
+    return TaskNode(
+        name=name,
+        run=run or (lambda: None),
+        depends_on=depends_on or [],
+        resources=resources or [],
+    )
+
+
+@pytest.mark.parametrize(
+    "nodes,expected",
+    [
+        (
+            [_node("a"), _node("b", ["c"]), _node("c", ["a"])],
+            ["a", "c", "b"],
+        ),
+        (
+            [_node("a"), _node("b"), _node("c", ["a", "b"])],
+            ["a", "b", "c"],
+        ),
+        pytest.param(
+            [_node("a", ["b"]), _node("b", ["a"])],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            [_node("a", ["missing"])],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            [_node("a"), _node("a")],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+    ],
+)
+def test_dag_scheduler_order(nodes, expected):
+    scheduler = DagScheduler(nodes, max_workers=1)
+    assert scheduler.order == expected
+
+
+def test_dag_scheduler_failure_skips_dependents():
+    executed = []
+
+    def run(name, fail=False):
+        def _run():
+            executed.append(name)
+            if fail:
+                raise RuntimeError(f"{name} failed")
+
+        return _run
+
+    nodes = [
+        _node("a", run=run("a", fail=True)),
+        _node("b", ["a"], run=run("b")),
+        _node("c", ["b"], run=run("c")),
+        _node("d", run=run("d")),
+    ]
+    status = DagScheduler(nodes, max_workers=2).run()
+
+    assert status == {"a": FAILED, "b": SKIPPED, "c": SKIPPED, "d": SUCCESS}
+    assert sorted(executed) == ["a", "d"]
+
+
+def test_dag_scheduler_resource_limits():
+    lock = threading.Lock()
+    active = {"pg": 0, "my": 0}
+    peak = {"pg": 0, "my": 0}
+
+    def run(resource):
+        def _run():
+            with lock:
+                active[resource] += 1
+                peak[resource] = max(peak[resource], active[resource])
+            time.sleep(0.05)
+            with lock:
+                active[resource] -= 1
+
+        return _run
+
+    nodes = [_node(f"pg{i}", resources=["pg"], run=run("pg")) for i in range(4)]
+    nodes += [_node(f"my{i}", resources=["my"], run=run("my")) for i in range(4)]
+    status = DagScheduler(nodes, max_workers=8, resource_limits={"pg": 1}).run()
+
+    assert set(status.values()) == {SUCCESS}
+    assert peak["pg"] == 1
+    assert peak["my"] > 1
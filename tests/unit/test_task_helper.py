@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from tulona.task.helper import (
+    get_presence_mismatches,
+    perform_chunked_comparison,
+    perform_comparison,
+)
+from tulona.util.dataframe import compact_dataframes, restore_decimal_columns
+
+DS_NAMES = ["ds1", "ds2", "ds3"]
+
+
+@pytest.fixture
+def dataframes():
+    return [
+        pd.DataFrame({"id": [1, 2, 3, 4], "age": [10, 20, 30, 40], "name": list("abcd")}),
+        pd.DataFrame({"id": [4, 2, 1, 5], "age": [40, 21, 10, 50], "name": list("dbaz")}),
+        pd.DataFrame(
+            {"id": [1, 2, 3, 4], "age": [10, 20, 30, 41], "name": list("aXcd"), "x": 1}
+        ),
+    ]
+
+
+def chained_merge(dataframes, on):
+    # Reference result, one merge per datasource
+    df_merge = dataframes[0].rename(columns=lambda c: c if c == on else f"{c}-ds1")
+    for ds, df in zip(DS_NAMES[1:], dataframes[1:]):
+        df = df[dataframes[0].columns].rename(
+            columns=lambda c: c if c == on else f"{c}-{ds}"
+        )
+        df_merge = df_merge.merge(df, on=on)
+    return df_merge
+
+
+def test_perform_comparison_nway(dataframes):
+    df_comp = perform_comparison(DS_NAMES, dataframes, on="id")
+
+    expected = chained_merge(dataframes, "id")
+    expected = expected[["id"] + sorted(c for c in expected.columns if c != "id")]
+    assert_frame_equal(
+        df_comp.sort_values("id").reset_index(drop=True),
+        expected.sort_values("id").reset_index(drop=True),
+    )
+
+
+def test_perform_nway_comparison_presence(dataframes):
+    keys = [df[["id"]] for df in dataframes]
+    df_comp = perform_comparison(
+        DS_NAMES, keys, on="id", how="outer", indicator="presence", validate="one_to_one"
+    )
+    presence = dict(zip(df_comp["id"], df_comp["presence"]))
+    assert presence == {
+        1: "ds1, ds2, ds3",
+        2: "ds1, ds2, ds3",
+        3: "ds1, ds3",
+        4: "ds1, ds2, ds3",
+        5: "ds2",
+    }
+
+    df_mismatch = get_presence_mismatches(df_comp, DS_NAMES, "presence")
+    assert df_mismatch["id"].tolist() == [3, 5]
+
+
+def test_perform_nway_comparison_case_insensitive():
+    dataframes = [pd.DataFrame({"code": [c]}) for c in ["A", "a", "a"]]
+    df_comp = perform_comparison(
+        DS_NAMES,
+        dataframes,
+        on="code",
+        how="outer",
+        indicator="presence",
+        case_insensitive=True,
+    )
+    assert df_comp["presence"].tolist() == ["ds1, ds2, ds3"]
+
+
+def test_perform_nway_comparison_duplicate_keys():
+    dataframes = [pd.DataFrame({"id": [1, 1], "v": [i, i + 1]}) for i in range(3)]
+    df_comp = perform_comparison(DS_NAMES, dataframes, on="id")
+    assert df_comp.shape == (2, 4)
+    assert df_comp["v-ds3"].tolist() == [2, 3]
+
+    with pytest.raises(pd.errors.MergeError, match="not unique"):
+        perform_comparison(DS_NAMES, dataframes, on="id", validate="one_to_one")
+
+
+def test_get_presence_mismatches_two_way():
+    df_comp = pd.DataFrame(
+        {"id": [1, 2, 3], "presence": ["both", "left_only", "right_only"]}
+    )
+    df_mismatch = get_presence_mismatches(df_comp, ["ds1", "ds2"], "presence")
+    assert df_mismatch["presence"].tolist() == ["ds1", "ds2"]
+
+
+@pytest.mark.parametrize("how", ["inner", "outer"])
+@pytest.mark.parametrize("ds_names", [DS_NAMES[:2], DS_NAMES])
+def test_perform_chunked_comparison(dataframes, ds_names, how):
+    dataframes = dataframes[: len(ds_names)]
+    expected = perform_comparison(ds_names, dataframes, on="id", how=how)
+    # A tiny budget forces one chunk per key, rows keep the unchunked order
+    actual = perform_chunked_comparison(
+        ds_names, dataframes, on="id", how=how, memory_budget=1
+    )
+    assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_perform_chunked_comparison_reduce(dataframes):
+    keys = [df[["id"]] for df in dataframes]
+
+    def reduce(df_comp):
+        return get_presence_mismatches(df_comp, DS_NAMES, "presence")
+
+    kwargs = dict(how="outer", indicator="presence", validate="one_to_one", reduce=reduce)
+    unchunked = perform_chunked_comparison(DS_NAMES, keys, on="id", **kwargs)
+    chunked = perform_chunked_comparison(
+        DS_NAMES, keys, on="id", memory_budget=1, **kwargs
+    )
+    assert chunked["id"].tolist() == unchunked["id"].tolist() == [3, 5]
+
+
+@pytest.mark.parametrize("memory_budget", [None, 1])
+def test_perform_chunked_comparison_compacted_keys(memory_budget):
+    dataframes = [
+        pd.DataFrame(
+            [(c, Decimal(a)) for c in codes for a in ["1.5", "2.25", "3"]],
+            columns=["code", "amount"],
+        )
+        for codes in ["aB", "Ab", "ac"]
+    ]
+    compacted, decimal_scales = compact_dataframes(dataframes)
+    assert compacted[0]["code"].dtype == "category"
+
+    kwargs = dict(
+        on=["code", "amount"],
+        how="outer",
+        indicator="presence",
+        validate="one_to_one",
+        case_insensitive=True,
+        reduce=lambda df: get_presence_mismatches(df, DS_NAMES, "presence"),
+    )
+    expected = perform_chunked_comparison(
+        DS_NAMES, [df.drop_duplicates() for df in dataframes], **kwargs
+    )
+    actual = perform_chunked_comparison(
+        DS_NAMES,
+        [df.drop_duplicates() for df in compacted],
+        memory_budget=memory_budget,
+        **kwargs,
+    )
+    actual = restore_decimal_columns(actual, decimal_scales, DS_NAMES)
+    assert sorted(zip(actual["code"], actual["amount"], actual["presence"])) == sorted(
+        zip(expected["code"], expected["amount"], expected["presence"])
+    )
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.task.merge import MergeResultsTask, merge_manifests
+
+
+def _manifest(shard, shard_count=2, datasources=("ds1", "ds2"), tables=()):
+    return {
+        "datasources": list(datasources),
+        "runid": f"runid_{shard}",
+        "shard": shard,
+        "shard_count": shard_count,
+        "files": [],
+        "tables": [{"schemas": ["a.s", "b.s"], "table": t, "files": []} for t in tables],
+    }
+
+
+@pytest.mark.parametrize(
+    "manifests,expected",
+    [
+        (
+            [_manifest(2, tables=["t2"]), _manifest(1, tables=["t3", "t1"])],
+            ["t1", "t2", "t3"],
+        ),
+        ([_manifest(1, tables=["t1"])], ["t1"]),
+        pytest.param(
+            [_manifest(1), _manifest(2, shard_count=3)],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            [_manifest(1), _manifest(1)],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            [_manifest(1), _manifest(2, datasources=["ds1", "ds3"])],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+    ],
+)
+def test_merge_manifests(manifests, expected):
+    merged = merge_manifests(manifests)
+    assert [t["table"] for t in merged["tables"]] == expected
+
+
+def test_merge_results_task(tmp_path, monkeypatch):
+    for shard, table in [(1, "t1"), (2, "t2")]:
+        shard_dir = tmp_path / f"shard{shard}"
+        shard_dir.mkdir()
+        summary_file = shard_dir / f"compare_table__{table}__summary.json"
+        summary_file.write_text(json.dumps({"compare_row": {"rows_compared": shard}}))
+        (shard_dir / f"compare_table__{table}.csv").write_text("id\n1\n")
+        manifest = _manifest(shard, tables=[table])
+        # Paths are relative to the manifest, shards are merged from anywhere
+        manifest["tables"][0]["files"] = [
+            f"compare_table__{table}.csv",
+            summary_file.name,
+        ]
+        (shard_dir / f"scan_manifest__shard{shard}of2.json").write_text(
+            json.dumps(manifest)
+        )
+
+    outdir = tmp_path / "merged"
+    monkeypatch.chdir(shard_dir)
+    MergeResultsTask(inputs=[tmp_path], final_outdir=outdir).execute()
+
+    assert (outdir / "compare_table__t1__summary.json").exists()
+    assert (outdir / "compare_table__t2__summary.json").exists()
+    merged = json.loads((outdir / "merge_manifest.json").read_text())
+    assert merged["missing_shards"] == []
+    assert merged["tables"][0]["files"] == [
+        "compare_table__t1.csv",
+        "compare_table__t1__summary.json",
+    ]
+    assert (outdir / "compare_table__t2.csv").exists()
+    rows = list(load_workbook(outdir / "scan_summary.xlsx")["tables"].values)
+    assert rows[0] == ("schemas", "table", "shard", "compare_row.rows_compared")
+    assert [r[1:] for r in rows[1:]] == [("t1", 1, 1), ("t2", 2, 2)]
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from tulona.exceptions import TulonaMissingPrimaryKeyError
+from tulona.task import plan as plan_module
+from tulona.task.plan import DatasourcePlan, get_datasource_plans, get_table_location
+
+
+@pytest.mark.parametrize(
+    "dbtype,ds_config,expected",
+    [
+        (
+            "postgres",
+            {"database": "db", "schema": "sc", "table": "tb"},
+            ("db", "sc", "tb"),
+        ),
+        ("mysql", {"database": "db", "schema": "sc", "table": "tb"}, (None, "sc", "tb")),
+        (
+            "bigquery",
+            {"project": "pr", "dataset": "ds", "table": "tb"},
+            ("pr", "ds", "tb"),
+        ),
+        ("snowflake", {"query": "select 1"}, (None, None, None)),
+    ],
+)
+def test_get_table_location(dbtype, ds_config, expected):
+    assert get_table_location(dbtype, ds_config) == expected
+
+
+def _plan(ds_config):
+    return DatasourcePlan(
+        ds_name="employee_postgres",
+        ds_config=ds_config,
+        dbtype="postgres",
+        connection_manager=SimpleNamespace(engine=None),
+        database="db",
+        schema="sc",
+        table=ds_config.get("table"),
+    )
+
+
+@pytest.mark.parametrize(
+    "ds_config,reflected,expected",
+    [
+        ({"table": "tb", "primary_key": "id"}, [], ("id",)),
+        ({"table": "tb", "primary_key": ["b", "a"]}, [], ("a", "b")),
+        ({"table": "tb"}, ["id"], ("id",)),
+        pytest.param(
+            {"query": "select 1"},
+            [],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaMissingPrimaryKeyError),
+        ),
+    ],
+)
+def test_datasource_plan_primary_key(monkeypatch, ds_config, reflected, expected):
+    calls = []
+
+    def get_table_primary_keys(engine, schema, table):
+        calls.append((schema, table))
+        return reflected
+
+    monkeypatch.setattr(plan_module, "get_table_primary_keys", get_table_primary_keys)
+    plan = _plan(ds_config)
+
+    assert plan.get_primary_key() == expected
+    assert plan.get_primary_key() == expected
+    # Catalog is queried at most once
+    assert len(calls) <= 1
+    assert plan.table_fqn == "db.sc.tb"
+    assert plan.ds_name_compressed == "employeepostgres"
+
+
+def test_get_datasource_plans_reuse(monkeypatch):
+    created = []
+
+    def get_datasource_plan(profile, project, ds_name):
+        created.append(ds_name)
+        return ds_name
+
+    monkeypatch.setattr(plan_module, "get_datasource_plan", get_datasource_plan)
+    plans = get_datasource_plans({}, {}, ["ds1", "ds2"])
+    plans = get_datasource_plans({}, {}, ["ds1", "ds2", "ds3"], plans)
+
+    assert created == ["ds1", "ds2", "ds3"]
+    assert list(plans) == ["ds1", "ds2", "ds3"]
+
+
+def test_datasource_plan_column_types(monkeypatch):
+    def get_query_output_as_df(connection_manager, query_text):
+        return pd.DataFrame(
+            {
+                "COLUMN_NAME": ["Amount"],
+                "DATA_TYPE": ["numeric"],
+                "NUMERIC_SCALE": [2],
+                "DATETIME_PRECISION": [None],
+            }
+        )
+
+    monkeypatch.setattr(plan_module, "get_query_output_as_df", get_query_output_as_df)
+    assert _plan({"table": "tb"}).get_column_types() == {
+        "amount": {"kind": "numeric", "scale": 2, "precision": None}
+    }
+    # Queries have no catalog entry
+    assert _plan({"query": "select 1"}).get_column_types() == {}
@@ -1,9 +1,23 @@
+from decimal import Decimal
+
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
 
-from tulona.exceptions import TulonaFundamentalError
-from tulona.util.dataframe import apply_column_exclusion, get_sample_rows_for_each_value
+from tulona.exceptions import TulonaFundamentalError, TulonaInvalidConfigError
+from tulona.util.dataframe import (
+    KeyEncoding,
+    apply_column_exclusion,
+    compact_dataframes,
+    get_comparison_column_groups,
+    get_key_presence_summary,
+    get_long_mismatch_frame,
+    get_mismatch_mask,
+    get_row_comparison_summary,
+    get_sample_rows_for_each_value,
+    parse_memory_size,
+    restore_decimal_columns,
+)
 
 
 @pytest.mark.parametrize(
@@ -73,3 +87,334 @@ def test_get_sample_rows_for_each_value(df, n_per_value, column_name, expected):
     grouped = df.groupby(column_name).size().reset_index(name="row_count")
     actual = grouped.to_dict("split")["data"]
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "columns,ds_compressed_names,skip_columns,expected",
+    [
+        (
+            ["id", "age-ds1", "age-ds2", "name-ds1", "name-ds2"],
+            ["ds1", "ds2"],
+            "id",
+            [["age-ds1", "age-ds2"], ["name-ds1", "name-ds2"]],
+        ),
+        (
+            ["id-ds1", "id-ds2", "age-ds1", "age-ds2", "age-ds3"],
+            ["ds1", "ds2", "ds3"],
+            ["ID-DS1"],
+            [["age-ds1", "age-ds2", "age-ds3"]],
+        ),
+    ],
+)
+def test_get_comparison_column_groups(
+    columns, ds_compressed_names, skip_columns, expected
+):
+    actual = get_comparison_column_groups(columns, ds_compressed_names, skip_columns)
+    assert actual == expected
+
+
+def test_get_mismatch_mask():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "amount-ds1": [Decimal("1.50"), Decimal("2.00"), None, Decimal("4.00")],
+            "amount-ds2": [1.5, 2.5, None, None],
+            "name-ds1": ["a", "b", "c", None],
+            "name-ds2": ["a", "b", "x", None],
+        }
+    )
+    mask = get_mismatch_mask(df, ["ds1", "ds2"], skip_columns="id")
+
+    assert mask["id"].tolist() == [False] * 4
+    assert mask["amount-ds1"].tolist() == [False, True, False, True]
+    assert mask["amount-ds2"].tolist() == [False, True, False, True]
+    assert mask["name-ds1"].tolist() == [False, False, True, False]
+
+
+def test_get_mismatch_mask_tolerance():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "amount-ds1": [Decimal("1.00"), Decimal("2.00"), None],
+            "amount-ds2": [1.01, 2.02, None],
+            "ts-ds1": pd.to_datetime(["2024-01-01 00:00:00"] * 3),
+            "ts-ds2": pd.to_datetime(
+                ["2024-01-01 00:00:01", "2024-01-01 00:00:05", "2024-01-01"]
+            ),
+        }
+    )
+    mask = get_mismatch_mask(
+        df, ["ds1", "ds2"], skip_columns="id", tolerances={"amount": 0.01, "ts": 1}
+    )
+    assert mask["amount-ds1"].tolist() == [False, True, False]
+    assert mask["ts-ds1"].tolist() == [False, True, False]
+
+    mask = get_mismatch_mask(df, ["ds1", "ds2"], skip_columns="id")
+    assert mask["amount-ds1"].tolist() == [True, True, False]
+
+
+def test_get_long_mismatch_frame():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "age-ds1": [10, 20, 30],
+            "age-ds2": [10, 21, 31],
+            "name-ds1": ["a", "b", "c"],
+            "name-ds2": ["a", "x", "c"],
+        }
+    )
+    df_long, df_summary = get_long_mismatch_frame(df, ["ds1", "ds2"], ["id"])
+
+    expected = pd.DataFrame(
+        {
+            "id": [2, 2, 3],
+            "column": ["age", "name", "age"],
+            "left_value": [20, "b", 30],
+            "right_value": [21, "x", 31],
+        }
+    )
+    assert_frame_equal(df_long, expected, check_dtype=False)
+    assert df_summary.to_dict(orient="list") == {
+        "column": ["age", "name"],
+        "mismatch_count": [2, 1],
+        "row_count": [3, 3],
+    }
+
+
+def test_get_long_mismatch_frame_nway():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "age-ds1": [10, 20],
+            "age-ds2": [10, 20],
+            "age-ds3": [10, 22],
+        }
+    )
+    df_long, _ = get_long_mismatch_frame(df, ["ds1", "ds2", "ds3"], ["id"])
+
+    expected = pd.DataFrame(
+        {
+            "id": [2],
+            "column": ["age"],
+            "value-ds1": [20],
+            "value-ds2": [20],
+            "value-ds3": [22],
+        }
+    )
+    assert_frame_equal(df_long, expected, check_dtype=False)
+
+
+def test_get_long_mismatch_frame_no_mismatch():
+    df = pd.DataFrame({"id": [1], "age-ds1": [10], "age-ds2": [10]})
+    df_long, df_summary = get_long_mismatch_frame(df, ["ds1", "ds2"], "id")
+
+    assert df_long.empty
+    assert df_long.columns.tolist() == ["id", "column", "left_value", "right_value"]
+    assert df_summary["mismatch_count"].tolist() == [0]
+
+
+@pytest.mark.parametrize(
+    "case_insensitive,expected_only_in",
+    [
+        (False, {"ds1": 2, "ds2": 1}),
+        (True, {"ds1": 1, "ds2": 0}),
+    ],
+)
+def test_get_key_presence_summary(case_insensitive, expected_only_in):
+    df1 = pd.DataFrame({"code": ["a", "b", "C", "d"]})
+    df2 = pd.DataFrame({"code": ["a", "b", "c", "b"]})
+    actual = get_key_presence_summary(
+        [df1, df2], ["ds1", "ds2"], "code", case_insensitive=case_insensitive
+    )
+    assert actual["only_in"] == expected_only_in
+    assert actual["distinct_count"]["ds1"] == 4
+
+
+def test_get_row_comparison_summary():
+    df1 = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "age": [10, 20, 30, 40],
+            "amount": [Decimal("1.5"), Decimal("2.0"), None, Decimal("4.0")],
+        }
+    )
+    df2 = pd.DataFrame(
+        {
+            "id": [3, 2, 1],
+            "age": [31, 20, 10],
+            "amount": [None, 2.5, 1.5],
+        }
+    )
+    summary, df_columns = get_row_comparison_summary([df1, df2], ["ds1", "ds2"], ["id"])
+
+    assert summary == {
+        "rows_compared": 3,
+        "rows_matched": 1,
+        "rows_mismatched": 2,
+        "only_in": {"ds1": 1, "ds2": 0},
+    }
+    assert df_columns["column"].tolist() == ["age", "amount"]
+    assert df_columns["mismatch_count"].tolist() == [1, 1]
+    assert df_columns["mismatch_rate"].tolist() == pytest.approx([1 / 3, 1 / 3])
+
+
+@pytest.mark.parametrize(
+    "dataframes,columns",
+    [
+        ([pd.DataFrame({"id": [3, 1, 2]}), pd.DataFrame({"id": [2, 4]})], ["id"]),
+        (
+            [
+                pd.DataFrame({"code": ["a", "b", "c", None], "n": [1, 1, 2, 3]}),
+                pd.DataFrame({"code": ["b", "z", None], "n": [1, 1, 3]}),
+            ],
+            ["code", "n"],
+        ),
+        # Equal values of different types, like merge does
+        (
+            [
+                pd.DataFrame({"code": ["a", "b"], "n": [1, 2]}),
+                pd.DataFrame({"code": ["b", "a"], "n": [2.0, 1.5]}),
+            ],
+            ["code", "n"],
+        ),
+    ],
+)
+def test_key_encoding(dataframes, columns):
+    encoding = KeyEncoding(dataframes, columns)
+    assert [k.dtype for k in encoding.keys] == ["int64", "int64"]
+
+    # Encoded keys are equal exactly when the keys are
+    rows = [tuple(r) for df in dataframes for r in df[columns].itertuples(index=False)]
+    encoded = [k for key in encoding.keys for k in key]
+    for i in range(len(rows)):
+        for j in range(len(rows)):
+            assert (rows[i] == rows[j]) == (encoded[i] == encoded[j])
+
+    # Key values are recovered from the encoded key
+    key_values = encoding.get_values(encoding.keys[1])
+    assert_frame_equal(
+        key_values, dataframes[1][columns].reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_key_encoding_case_insensitive():
+    dataframes = [pd.DataFrame({"code": ["A", "b"]}), pd.DataFrame({"code": ["a", "B"]})]
+    encoding = KeyEncoding(dataframes, ["code"], case_insensitive=True)
+    assert encoding.keys[0].tolist() == encoding.keys[1].tolist()
+    assert encoding.get_values(encoding.keys[0])["code"].tolist() == ["a", "b"]
+
+
+def test_key_encoding_high_cardinality():
+    # Combined cardinality overflows int64 and gets compacted
+    df = pd.DataFrame({f"c{i}": range(10000) for i in range(5)})
+    encoding = KeyEncoding([df, df.iloc[::-1]], df.columns.tolist())
+    assert encoding.keys[0].tolist() == encoding.keys[1][::-1].tolist()
+    assert len(set(encoding.keys[0])) == 10000
+
+
+def test_compact_dataframes():
+    dataframes = [
+        pd.DataFrame(
+            {
+                "id": [1, 2, 3, 4],
+                "small": [1, 2, 3, 4],
+                "large": [1, 2, 3, 2**40],
+                "half": [0.5, 1.5, None, 2.0],
+                "third": [1 / 3, 1.0, 2.0, 3.0],
+                "status": ["on", "off", "on", None],
+                "name": list("abcd"),
+                "amount": [Decimal("1.5"), Decimal("-2.25"), None, Decimal("3")],
+            }
+        ),
+        pd.DataFrame(
+            {
+                "id": [1, 2, 3, 4],
+                "small": [1, 2, 3, 300],
+                "large": [1, 2, 3, 4],
+                "half": [0.5, 1.5, 2.5, 3.0],
+                "third": [1.0, 1.0, 2.0, 3.0],
+                "status": ["on", "on", "off", "off"],
+                "name": list("efgh"),
+                "amount": [Decimal("1.50"), Decimal("2"), Decimal("0"), None],
+            }
+        ),
+    ]
+    compacted, decimal_scales = compact_dataframes(dataframes, skip_columns="id")
+
+    # Both sides share the compacted dtype
+    for col in dataframes[0].columns:
+        assert compacted[0][col].dtype == compacted[1][col].dtype
+    assert compacted[0]["id"].dtype == "int64"
+    assert compacted[0]["small"].dtype == "int16"
+    assert compacted[0]["large"].dtype == "int64"
+    assert compacted[0]["half"].dtype == "float32"
+    assert compacted[0]["third"].dtype == "float64"
+    assert compacted[0]["status"].dtype == "category"
+    assert compacted[0]["name"].dtype == "object"
+
+    assert decimal_scales == {"amount": 2}
+    assert compacted[0]["amount"].tolist() == [150, -225, pd.NA, 300]
+    assert compacted[1]["amount"].tolist() == [150, 200, 0, pd.NA]
+
+    # The originals are left untouched
+    assert dataframes[0]["small"].dtype == "int64"
+
+    df = pd.DataFrame(
+        {f"amount-{ds}": df["amount"] for ds, df in zip(["ds1", "ds2"], compacted)}
+    )
+    restored = restore_decimal_columns(df, decimal_scales, ["ds1", "ds2"])
+    assert restored["amount-ds1"].tolist()[:2] == [Decimal("1.5"), Decimal("-2.25")]
+    assert restored["amount-ds1"][2] is None
+    assert restored["amount-ds2"].tolist()[:3] == [
+        Decimal("1.5"),
+        Decimal("2"),
+        Decimal("0"),
+    ]
+
+
+def test_compact_dataframes_keeps_mismatches():
+    dataframes = [
+        pd.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "status": ["on", "off", None],
+                "amount": [Decimal("1.10"), Decimal("2"), None],
+            }
+        ),
+        pd.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "status": ["on", "on", None],
+                "amount": [Decimal("1.1"), Decimal("2.01"), None],
+            }
+        ),
+    ]
+    expected = get_row_comparison_summary(dataframes, ["ds1", "ds2"], "id")
+    compacted, _ = compact_dataframes(dataframes, skip_columns="id")
+    actual = get_row_comparison_summary(compacted, ["ds1", "ds2"], "id")
+
+    assert actual[0] == expected[0]
+    assert_frame_equal(actual[1], expected[1])
+    assert actual[1]["mismatch_count"].tolist() == [1, 1]
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, None),
+        (1024, 1024),
+        ("1024", 1024),
+        ("512MB", 512 * 2**20),
+        ("2gb", 2 * 2**30),
+        ("1.5 GiB", int(1.5 * 2**30)),
+        ("64k", 64 * 2**10),
+        pytest.param(
+            "lots", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)
+        ),
+        pytest.param(
+            "2XB", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)
+        ),
+    ],
+)
+def test_parse_memory_size(value, expected):
+    assert parse_memory_size(value) == expected
@@ -1,35 +1,28 @@
-import pytest
+import pandas as pd
 from openpyxl import Workbook
 
-from tulona.util.excel import get_column_index
+from tulona.util.excel import highlight_mismatch_cells
 
 
-def _create_dummy_sheet():
+def test_highlight_mismatch_cells():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "age-ds1": [10, 20],
+            "age-ds2": [10, 21],
+        }
+    )
     wb = Workbook()
     ws = wb.active
-    ws.title = "DummySheet"
+    ws.append(df.columns.tolist())
+    for row in df.itertuples(index=False):
+        ws.append(list(row))
 
-    for row in range(1, 6):
-        for col in range(1, 6):
-            ws.cell(row=row, column=col, value=f"Row{row} Col{col}")
+    highlight_mismatch_cells(ws, df, ["ds1", "ds2"], skip_columns="id")
 
-    return wb
-
-
-@pytest.mark.parametrize(
-    "sheet,column,expected",
-    [
-        (_create_dummy_sheet()["DummySheet"], "Row1 Col2", 2),
-        pytest.param(
-            _create_dummy_sheet()["DummySheet"],
-            "Row1 Col10",
-            2,
-            marks=pytest.mark.xfail(
-                raises=ValueError, match="could not be found in the Excel sheet"
-            ),
-        ),
-    ],
-)
-def test_get_column_index(sheet, column, expected):
-    actual = get_column_index(sheet, column)
-    assert actual == expected
+    assert ws.cell(row=2, column=2).fill.fill_type is None
+    assert ws.cell(row=3, column=1).fill.fill_type is None
+    assert ws.cell(row=3, column=2).fill.fill_type == "solid"
+    assert ws.cell(row=3, column=3).fill.fill_type == "solid"
+    assert ws.cell(row=3, column=2).border.left.border_style == "thin"
+    assert ws.cell(row=3, column=3).border.right.border_style == "thin"
@@ -0,0 +1,64 @@
+import json
+
+import pandas as pd
+import pytest
+
+from tulona.util.metrics import add_dataframe_volume, metrics, phase, task_metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_phase_records():
+    with task_metrics("compare"):
+        with phase("extract", datasource="ds1"):
+            add_dataframe_volume(pd.DataFrame({"a": [1, 2, 3]}))
+            with phase("catalog"):
+                add_dataframe_volume(pd.DataFrame({"a": [1]}))
+        with phase("extract", datasource="ds1"):
+            add_dataframe_volume(pd.DataFrame({"a": [4]}))
+    # Volume outside of a phase is not attributed anywhere
+    add_dataframe_volume(pd.DataFrame({"a": [5]}))
+
+    summary = {(s["task"], s["datasource"], s["phase"]): s for s in metrics.get_summary()}
+    assert list(summary) == [("compare", "ds1", "catalog"), ("compare", "ds1", "extract")]
+    assert summary[("compare", "ds1", "extract")]["count"] == 2
+    assert summary[("compare", "ds1", "extract")]["rows"] == 4
+    assert summary[("compare", "ds1", "catalog")]["rows"] == 1
+    assert summary[("compare", "ds1", "extract")]["bytes"] > 0
+
+
+def test_phase_decorator_records_failures():
+    @phase("compare")
+    def fail():
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert [r["phase"] for r in metrics.get_records()] == ["compare"]
+
+
+def test_metrics_writers(tmp_path):
+    with task_metrics("profile"), phase("write", datasource="ds1"):
+        pass
+
+    metrics.write_json(tmp_path / "metrics.json", runid="runid_1")
+    content = json.loads((tmp_path / "metrics.json").read_text())
+    assert content["runid"] == "runid_1"
+    assert content["summary"][0]["phase"] == "write"
+
+    metrics.write_prometheus(tmp_path / "tulona.prom")
+    lines = (tmp_path / "tulona.prom").read_text().splitlines()
+    assert (
+        'tulona_phase_count_total{task="profile",datasource="ds1",phase="write"} 1'
+        in lines
+    )
+    # Temporary file of the atomic replace is gone
+    assert sorted(tmp_path.iterdir()) == [
+        tmp_path / "metrics.json",
+        tmp_path / "tulona.prom",
+    ]
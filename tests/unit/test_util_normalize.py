@@ -0,0 +1,150 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.dataframe import get_row_comparison_summary
+from tulona.util.normalize import get_column_types, get_tolerances, normalize_dataframes
+
+
+def test_get_column_types():
+    df_meta = pd.DataFrame(
+        {
+            "column_name": ["Amount", "price", "created_at", "name", "id", "flag"],
+            "data_type": [
+                "NUMBER",
+                "NUMERIC(10, 2)",
+                "timestamp with time zone",
+                "character",
+                "bigint",
+                "boolean",
+            ],
+            "numeric_scale": [2, None, None, None, 0, None],
+            "datetime_precision": [None, None, 3, None, None, None],
+        }
+    )
+    assert get_column_types(df_meta) == {
+        "amount": {"kind": "numeric", "scale": 2, "precision": None},
+        "price": {"kind": "numeric", "scale": 2, "precision": None},
+        "created_at": {"kind": "timestamp_tz", "scale": None, "precision": 3},
+        "name": {"kind": "string", "scale": None, "precision": None},
+        "id": {"kind": "integer", "scale": None, "precision": None},
+        "flag": {"kind": None, "scale": None, "precision": None},
+    }
+
+
+def test_normalize_dataframes_numeric():
+    dataframes = [
+        pd.DataFrame(
+            {
+                "amount": [Decimal("1.005"), Decimal("2.10"), None],
+                "ratio": [Decimal("0.50"), Decimal("1.25"), None],
+                "count": [1, 2, 3],
+            }
+        ),
+        pd.DataFrame(
+            {
+                "amount": [Decimal("1.01"), Decimal("2.1"), np.nan],
+                "ratio": [0.5, 1.25, np.nan],
+                "count": [1, 2, 3],
+            }
+        ),
+    ]
+    column_types = [
+        {"amount": {"kind": "numeric", "scale": 3}},
+        {"amount": {"kind": "numeric", "scale": 2}},
+    ]
+    left, right = normalize_dataframes(dataframes, column_types)
+
+    # Rounded to the smallest declared scale, half away from zero
+    assert left["amount"].tolist() == [Decimal("1.01"), Decimal("2.10"), None]
+    assert right["amount"].tolist() == [Decimal("1.01"), Decimal("2.10"), None]
+    # Decimals compared with floats become floats
+    assert left["ratio"].dtype == right["ratio"].dtype == "float64"
+    assert left["count"].dtype == "int64"
+
+
+def test_normalize_dataframes_timestamps():
+    utc = datetime.timezone.utc
+    cet = datetime.timezone(datetime.timedelta(hours=1))
+    dataframes = [
+        pd.DataFrame(
+            {
+                "ts": [
+                    datetime.datetime(2024, 1, 1, 13, 0, 0, 123456, tzinfo=cet),
+                    None,
+                ]
+            }
+        ),
+        pd.DataFrame({"ts": pd.to_datetime(["2024-01-01 12:00:00.123", None])}),
+    ]
+    column_types = [
+        {"ts": {"kind": "timestamp_tz", "precision": 6}},
+        {"ts": {"kind": "timestamp", "precision": 3}},
+    ]
+    left, right = normalize_dataframes(dataframes, column_types)
+
+    assert str(left["ts"].dtype) == str(right["ts"].dtype) == "datetime64[ns, UTC]"
+    assert (
+        left["ts"][0] == right["ts"][0] == pd.Timestamp("2024-01-01 12:00:00.123", tz=utc)
+    )
+    assert pd.isna(left["ts"][1]) and pd.isna(right["ts"][1])
+
+
+def test_normalize_dataframes_strings_and_nulls():
+    dataframes = [
+        pd.DataFrame({"code": ["ab  ", " c", None], "misc": [1, "x", np.nan]}),
+        pd.DataFrame({"code": ["ab", " c", np.nan], "misc": [1, "x", pd.NaT]}),
+    ]
+    left, right = normalize_dataframes(dataframes)
+
+    assert left["code"].tolist() == right["code"].tolist() == ["ab", " c", None]
+    assert left["misc"].tolist() == right["misc"].tolist() == [1, "x", None]
+    # The originals are left untouched
+    assert dataframes[0]["code"][0] == "ab  "
+
+
+def test_normalize_dataframes_removes_spurious_mismatches():
+    dataframes = [
+        pd.DataFrame(
+            {
+                "id": [1, 2],
+                "amount": [Decimal("10.50"), Decimal("3.00")],
+                "name": ["x   ", "y"],
+            }
+        ),
+        pd.DataFrame({"id": [1, 2], "amount": [10.5, 3.01], "name": ["x", "y"]}),
+    ]
+    _, before = get_row_comparison_summary(dataframes, ["ds1", "ds2"], "id")
+    _, after = get_row_comparison_summary(
+        normalize_dataframes(dataframes), ["ds1", "ds2"], "id"
+    )
+    assert before["mismatch_count"].tolist() == [1, 1]
+    assert after["mismatch_count"].tolist() == [1, 0]
+
+
+@pytest.mark.parametrize(
+    "ds_configs,expected",
+    [
+        ([{}, {"tolerance": None}], {}),
+        (
+            [{"tolerance": {"Amount": 0.01}}, {"tolerance": {"amount": 0.1, "ts": 1}}],
+            {"amount": 0.1, "ts": 1},
+        ),
+        pytest.param(
+            [{"tolerance": {"amount": "0.1"}}],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+        pytest.param(
+            [{"tolerance": {"amount": -1}}],
+            None,
+            marks=pytest.mark.xfail(raises=TulonaInvalidConfigError),
+        ),
+    ],
+)
+def test_get_tolerances(ds_configs, expected):
+    assert get_tolerances(ds_configs) == expected
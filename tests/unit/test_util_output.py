@@ -0,0 +1,145 @@
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.excel import get_cell_value
+from tulona.util.output import OutputSession, get_output_session
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, None),
+        (np.nan, None),
+        (pd.NaT, None),
+        (np.int64(5), 5),
+        (Decimal("1.50"), Decimal("1.50")),
+        ("abc", "abc"),
+        ({"a": 1}, "{'a': 1}"),
+    ],
+)
+def test_get_cell_value(value, expected):
+    actual = get_cell_value(value)
+    assert actual == expected
+
+
+def test_output_session_write(tmp_path):
+    outfile = tmp_path / "out.xlsx"
+    df_comp = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "age-ds1": [10, 20],
+            "age-ds2": [10, 21],
+        }
+    )
+    df_plain = pd.DataFrame({"presence": ["ds1", None]})
+
+    with OutputSession(outfile) as session:
+        session.add_sheet(
+            "Row Comparison",
+            df_comp,
+            ds_compressed_names=["ds1", "ds2"],
+            skip_columns="id",
+        )
+        session.add_sheet("Col Comp- id", df_plain)
+        assert not outfile.exists()
+
+    wb = load_workbook(outfile)
+    assert wb.sheetnames == ["Row Comparison", "Col Comp- id"]
+
+    ws = wb["Row Comparison"]
+    assert [c.value for c in ws[1]] == ["id", "age-ds1", "age-ds2"]
+    assert [c.value for c in ws[3]] == [2, 20, 21]
+    assert ws["B2"].fill.fill_type is None
+    assert ws["A3"].fill.fill_type is None
+    assert ws["B3"].fill.fill_type == "solid"
+    assert ws["C3"].fill.fill_type == "solid"
+    assert wb["Col Comp- id"]["A3"].value is None
+
+
+def test_output_session_append(tmp_path):
+    outfile = tmp_path / "out.xlsx"
+    with OutputSession(outfile) as session:
+        session.add_sheet("first", pd.DataFrame({"a": [1]}))
+
+    # Parent sessions are shared, a new one appends to an existing file
+    parent = OutputSession(outfile)
+    with get_output_session(outfile, parent) as session:
+        session.add_sheet("second", pd.DataFrame({"b": [2]}))
+    assert load_workbook(outfile).sheetnames == ["first"]
+
+    parent.write()
+    assert load_workbook(outfile).sheetnames == ["first", "second"]
+
+    with pytest.raises(ValueError):
+        parent.add_sheet("third", pd.DataFrame())
+        parent.add_sheet("third", pd.DataFrame())
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [
+        "parquet",
+        "arrow",
+        "csv.zst",
+        "jsonl",
+        pytest.param("xls", marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)),
+    ],
+)
+def test_output_session_columnar(tmp_path, output_format):
+    outfile = tmp_path / "compare__default.xlsx"
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "value-ds1": [Decimal("1.5"), "NA"],
+            "value-ds2": [1.5, None],
+        }
+    )
+    with OutputSession(outfile, output_format) as session:
+        session.add_sheet("Metric Comparison", df)
+
+    path = tmp_path / f"compare__default__metric_comparison.{output_format}"
+    assert not outfile.exists()
+    assert path.exists()
+
+    if output_format == "jsonl":
+        actual = pd.read_json(path, lines=True)
+    else:
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+        import pyarrow.parquet as pq
+
+        if output_format == "parquet":
+            table = pq.read_table(path)
+        elif output_format == "arrow":
+            table = pa.ipc.open_file(str(path)).read_all()
+        else:
+            table = pcsv.read_csv(pa.CompressedInputStream(str(path), "zstd"))
+        actual = table.to_pandas()
+
+    assert actual.columns.tolist() == ["id", "value-ds1", "value-ds2"]
+    assert actual["id"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("output_format", ["xlsx", "parquet"])
+def test_output_session_summary(tmp_path, output_format):
+    outfile = tmp_path / "compare__summaryonly.xlsx"
+    summary = {
+        "rows_compared": 2,
+        "columns": [{"column": "age", "mismatch_count": 1, "mismatch_rate": 0.5}],
+    }
+    with OutputSession(outfile, output_format) as session:
+        session.add_summary("compare_row", summary)
+
+    # Nothing but the report is written
+    assert not outfile.exists()
+    with open(tmp_path / "compare__summaryonly__summary.json") as f:
+        assert json.load(f) == {"compare_row": summary}
+
+    column_summary = tmp_path / "compare__summaryonly__summary_compare_row.parquet"
+    assert column_summary.exists() == (output_format == "parquet")
@@ -0,0 +1,60 @@
+import json
+import time
+
+import pytest
+
+from tulona.util.metrics import metrics, phase
+from tulona.util.profiling import SamplingProfiler, memory_tracker
+
+
+def busy_function(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        sum(range(1000))
+
+
+def test_sampling_profiler(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_function(0.2)
+    profiler.stop()
+
+    profiler.write_collapsed(tmp_path / "cpu_profile.collapsed")
+    lines = (tmp_path / "cpu_profile.collapsed").read_text().splitlines()
+    assert lines
+    # Every line is a ; separated stack rooted at the thread name, followed by a count
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_function (unit/test_util_profiling.py" in line for line in lines)
+
+
+@pytest.fixture
+def tracked_memory():
+    metrics.reset()
+    memory_tracker.start()
+    yield
+    memory_tracker.stop()
+    metrics.reset()
+
+
+def test_memory_tracker_phase_peaks(tracked_memory, tmp_path):
+    size = 10 * 1024 * 1024
+    with phase("compare"):
+        with phase("extract"):
+            data = bytearray(size)
+            del data
+        with phase("write"):
+            pass
+
+    peaks = {
+        r["phase"]: r["memory_peak"] - r["memory_start"] for r in metrics.get_records()
+    }
+    # Allocation of the inner phase counts for the enclosing one too, not for its sibling
+    assert peaks["extract"] > 0.9 * size
+    assert peaks["compare"] > 0.9 * size
+    assert peaks["write"] < 0.1 * size
+
+    memory_tracker.write_report(tmp_path / "memory.json", metrics.get_records())
+    report = json.loads((tmp_path / "memory.json").read_text())
+    assert report["peak"] > 0.9 * size
+    assert [p["phase"] for p in report["phases"]] == ["extract", "write", "compare"]
@@ -0,0 +1,56 @@
+import pytest
+
+from tulona.exceptions import TulonaInvalidConfigError
+from tulona.util.shard import (
+    get_manifest_relpath,
+    get_shard_key,
+    in_shard,
+    parse_shard,
+    resolve_manifest_paths,
+)
+
+
+@pytest.mark.parametrize(
+    "shard,expected",
+    [
+        (None, (1, 1)),
+        ("1/1", (1, 1)),
+        ("3/4", (3, 4)),
+        pytest.param(
+            "0/4", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)
+        ),
+        pytest.param(
+            "5/4", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)
+        ),
+        pytest.param("2", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)),
+        pytest.param(
+            "a/b", None, marks=pytest.mark.xfail(raises=TulonaInvalidConfigError)
+        ),
+    ],
+)
+def test_parse_shard(shard, expected):
+    assert parse_shard(shard) == expected
+
+
+def test_in_shard_partitions_tables():
+    keys = [get_shard_key(["db1.sc", "db2.sc"], f"table_{i}") for i in range(200)]
+    shards = [[k for k in keys if in_shard(k, i, 4)] for i in range(1, 5)]
+
+    # Every table belongs to exactly one shard and no shard is left empty
+    assert sorted(k for s in shards for k in s) == sorted(keys)
+    assert all(shards)
+    assert get_shard_key(["DB1.SC"], "Table") == get_shard_key(["db1.sc"], "table")
+
+
+def test_manifest_paths(tmp_path):
+    manifest_dir = tmp_path / "shard1"
+    relpath = get_manifest_relpath(manifest_dir / "out" / "a.xlsx", manifest_dir)
+    assert relpath == "out/a.xlsx"
+
+    manifest = {
+        "files": [relpath],
+        "tables": [{"table": "t1", "files": ["t1.xlsx"]}],
+    }
+    resolved = resolve_manifest_paths(manifest, manifest_dir / "scan_manifest.json")
+    assert resolved["files"] == [str(manifest_dir / "out" / "a.xlsx")]
+    assert resolved["tables"][0]["files"] == [str(manifest_dir / "t1.xlsx")]
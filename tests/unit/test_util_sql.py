@@ -1,5 +1,9 @@
+from types import SimpleNamespace
+
 import pandas as pd
+import pyarrow as pa
 import pytest
+from sqlalchemy import create_engine
 
 from tulona.exceptions import TulonaNotImplementedError
 from tulona.util.sql import (
@@ -7,9 +11,12 @@ from tulona.util.sql import (
     get_column_query,
     get_information_schema_query,
     get_metric_query,
+    get_query_output_as_batches,
+    get_row_count,
     get_sample_row_query,
     get_table_data_query,
     get_table_fqn,
+    get_table_output_as_df,
 )
 
 
@@ -402,3 +409,80 @@ def test_get_metric_query(table_fqn, columns_dtype, metrics, quoted, expected):
 def test_get_table_data_query(dbtype, table_fqn, sample_count, query_expr, expected):
     query = get_table_data_query(dbtype, table_fqn, sample_count, query_expr)
     assert query == expected
+
+
+def _sqlite_connection_manager(dbtype, num_rows):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("create table t (id integer, name text)")
+        for i in range(num_rows):
+            conn.exec_driver_sql(f"insert into t values ({i}, 'n{i}')")
+    return SimpleNamespace(conn_profile={"type": dbtype}, engine=engine)
+
+
+@pytest.mark.parametrize(
+    "dbtype,num_rows,batch_size,as_arrow,expected",
+    [
+        ("postgres", 10, 4, False, [4, 4, 2]),
+        ("mssql", 10, 5, False, [5, 5]),
+        ("bigquery", 3, 5, True, [3]),
+        ("mysql", 0, 5, False, []),
+    ],
+)
+def test_get_query_output_as_batches(dbtype, num_rows, batch_size, as_arrow, expected):
+    conman = _sqlite_connection_manager(dbtype, num_rows)
+    batches = list(
+        get_query_output_as_batches(
+            conman,
+            "select * from t order by id",
+            batch_size=batch_size,
+            as_arrow=as_arrow,
+        )
+    )
+    assert [b.num_rows if as_arrow else b.shape[0] for b in batches] == expected
+    for b in batches:
+        assert isinstance(b, pa.Table if as_arrow else pd.DataFrame)
+        assert list(b.column_names if as_arrow else b.columns) == ["id", "name"]
+
+
+@pytest.mark.parametrize(
+    "data_container,expected",
+    [
+        ("t", 7),
+        ("(select * from t where id < 3) as tulona__", 3),
+        ("missing_table", None),
+    ],
+)
+def test_get_row_count(data_container, expected):
+    conman = _sqlite_connection_manager("mssql", 7)
+    assert get_row_count(conman, data_container) == expected
+
+
+@pytest.mark.parametrize(
+    "bulk,expected_reads",
+    [
+        (True, ["t"]),
+        (False, []),
+    ],
+)
+def test_get_table_output_as_df_bigquery(monkeypatch, bulk, expected_reads):
+    from tulona.adapter import bigquery
+
+    reads = []
+
+    def read_table_as_arrow(read_client, project, table_fqn, columns, row_restriction):
+        reads.append(table_fqn)
+        return pa.table({"id": [0, 1, 2]})
+
+    monkeypatch.setattr(
+        bigquery, "get_storage_clients", lambda conn_profile: (None, None)
+    )
+    monkeypatch.setattr(bigquery, "read_table_as_arrow", read_table_as_arrow)
+    conman = _sqlite_connection_manager("bigquery", 3)
+    conman.conn_profile["project"] = "p"
+
+    df = get_table_output_as_df(conman, "t", columns=["id"], bulk=bulk)
+
+    # Small reads run as a plain query instead of a Storage Read API session
+    assert reads == expected_reads
+    assert df["id"].tolist() == [0, 1, 2]
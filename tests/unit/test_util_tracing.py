@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from tulona.util import sql as sql_module
+from tulona.util.metrics import phase
+from tulona.util.sql import get_query_output_as_df
+from tulona.util.tracing import sanitize_query, span, tracer
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("select * from sc.t1", "select * from sc.t1"),
+        (
+            "select *\n  from t where (id, name) in ((1, 'a'), (2, 'it''s'))",
+            "select * from t where (id, name) in ((?, ...), (?, ...))",
+        ),
+        (
+            "select * from t where id in (10, 20, 30.5)",
+            "select * from t where id in (?, ...)",
+        ),
+        ("select * from t limit 20", "select * from t limit ?"),
+    ],
+)
+def test_sanitize_query(query, expected):
+    assert sanitize_query(query) == expected
+
+
+@pytest.fixture
+def active_tracer():
+    tracer.start()
+    yield tracer
+    tracer.stop()
+
+
+def test_spans(monkeypatch, active_tracer, tmp_path):
+    monkeypatch.setattr(
+        sql_module,
+        "extract_query_output_as_df",
+        lambda *args, **kwargs: pd.DataFrame({"a": [1, 2]}),
+    )
+    conman = SimpleNamespace(conn_profile={"type": "Postgres"}, datasource="ds1")
+
+    with span("task compare", **{"tulona.task": "compare"}):
+        with phase("extract", datasource="ds1"):
+            get_query_output_as_df(conman, "select * from t where id = 10")
+        with pytest.raises(RuntimeError):
+            with phase("compare"):
+                raise RuntimeError("failed")
+
+    spans = {s["name"]: s for s in tracer.get_spans()}
+    assert spans["sql"]["parent_span_id"] == spans["extract"]["span_id"]
+    assert spans["extract"]["parent_span_id"] == spans["task compare"]["span_id"]
+    assert spans["sql"]["attributes"] == {
+        "db.system": "postgres",
+        "db.statement": "select * from t where id = ?",
+        "tulona.datasource": "ds1",
+        "db.response.rows": 2,
+    }
+    assert spans["compare"]["error"] == "RuntimeError: failed"
+
+    tracer.write_otlp_json(tmp_path / "trace.json")
+    exported = json.loads((tmp_path / "trace.json").read_text())
+    otlp_spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["traceId"] for s in otlp_spans} == {tracer.trace_id}
+    sql_span = next(s for s in otlp_spans if s["name"] == "sql")
+    assert sql_span["kind"] == 3
+    assert {"key": "db.response.rows", "value": {"intValue": "2"}} in sql_span[
+        "attributes"
+    ]
+
+
+def test_spans_inactive():
+    count = len(tracer.get_spans())
+    with span("task compare") as attributes:
+        attributes["ignored"] = True
+    assert len(tracer.get_spans()) == count